@@ -0,0 +1,90 @@
+# Article bodies, kept out of the articles rows in the article_bodies side table (migration 007),
+# so the joins on articles for titles, links and dates never read them.
+#  - compress_body / decompress_body: zlib in the format of MySQL's COMPRESS() (the length of the text
+#    as 4 little-endian bytes, then the zlib stream), so the migration compresses the existing bodies
+#    in SQL and UNCOMPRESS(body) reads them back in a SQL console.
+#  - text_hash: SHA-1 of a text, stored next to its body (migration 008) so the embedding store
+#    (app/embeddings.py) tells whether a vector was computed from the current text without reading it.
+#  - load_bodies: the texts of a list of articles, fetched in batches when a stage needs them.
+
+import hashlib
+import struct
+import zlib
+
+# zlib level of the stored bodies (the level of MySQL's COMPRESS)
+COMPRESSION_LEVEL = 6
+# Bodies fetched per query
+BODY_BATCH_SIZE = 500
+
+
+def compress_body(text):
+    """
+    Compresses an article text for article_bodies.body.
+    Args:
+        text (str): The article text.
+    Returns:
+        bytes: The compressed text, or None if there is no text.
+    """
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if not data:
+        # COMPRESS('') is the empty string
+        return b""
+    return struct.pack("<I", len(data)) + zlib.compress(data, COMPRESSION_LEVEL)
+
+
+def decompress_body(data) -> str:
+    """
+    Reads back a text compressed by compress_body or MySQL's COMPRESS().
+    Args:
+        data (bytes): The stored body.
+    Returns:
+        str: The article text.
+    """
+    if not data:
+        return ""
+    # COMPRESS() may append a "." after the stream, the decompressor leaves it in unused_data
+    return zlib.decompressobj().decompress(bytes(data)[4:]).decode("utf-8")
+
+
+def text_hash(text) -> bytes:
+    """
+    Hashes an article text, as SHA1() hashes the uncompressed body in MySQL.
+    Args:
+        text (str): The article text.
+    Returns:
+        bytes: The 20 bytes of the SHA-1 digest of the UTF-8 text.
+    """
+    return hashlib.sha1((text or "").encode("utf-8")).digest()
+
+
+def body_row(article_id, text) -> tuple:
+    """The (article_id, body, text_hash) row of an article text, in the body_upsert_sql order."""
+    return article_id, compress_body(text), text_hash(text)
+
+
+def body_upsert_sql(dialect) -> str:
+    """Query to insert or replace the bodies of articles, body_row(article_id, text) per row."""
+    return dialect.upsert("article_bodies", ["article_id", "body", "text_hash"], keys=["article_id"],
+                          update=["body", "text_hash"])
+
+
+def load_bodies(cursor, article_ids, batch_size=BODY_BATCH_SIZE) -> dict:
+    """
+    Fetches and decompresses the texts of some articles, batch_size of them per query.
+    Args:
+        cursor: A cursor of the database connection.
+        article_ids (list): The article IDs.
+        batch_size (int): The number of bodies fetched per query.
+    Returns:
+        dict: Article ID -> text. Articles without a body are missing.
+    """
+    ids = list(dict.fromkeys(int(article_id) for article_id in article_ids))
+    bodies = {}
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        cursor.execute(f"SELECT article_id, body FROM article_bodies WHERE article_id IN ({', '.join(['%s'] * len(batch))})",
+                       batch)
+        bodies.update((row["article_id"], decompress_body(row["body"])) for row in cursor.fetchall())
+    return bodies
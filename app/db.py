@@ -1,22 +1,62 @@
+import atexit
+import sys
+import threading
+import time
+from pathlib import Path
 import pymysql
+from pymysql.constants import SERVER_STATUS
 import os
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from app.dialects import MYSQL, SQLITE, dialect_of
+from app.sqlite_backend import sqlite_connect
 # Not necessary in the scraping workflow, but needed in the Streamlit app
 try: 
     import streamlit as st
 except ImportError:
     pass
 
-def get_conn():
-    try: 
-        cfg = st.secrets["AIVEN"]
-    except: 
-        cfg = {
-            "host": str(os.getenv("AIVEN_HOST")),
-            "port": int(os.getenv("AIVEN_PORT")),
-            "user": str(os.getenv("AIVEN_USER")),
-            "password": str(os.getenv("AIVEN_PASSWORD")),
-            "db": str(os.getenv("AIVEN_DB"))
-        }
+# Database backend: "mysql" (Aiven, or the config given to get_conn) or "sqlite" (embedded, for local runs)
+DB_BACKEND = os.getenv("FOOTY_DB_BACKEND", "mysql")
+# Database file of the SQLite backend
+SQLITE_PATH = Path(os.getenv("SQLITE_PATH", Path(__file__).resolve().parents[1] / "data" / "footy.sqlite3"))
+
+# Connections kept open by the process-wide pool (idle or borrowed)
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+# Idle connections older than this (seconds) are closed instead of reused
+POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))
+# A connection idle for longer than this (seconds) is pinged before it is handed out
+POOL_CHECK_AFTER = float(os.getenv("DB_POOL_CHECK_AFTER", 30))
+# Seconds to wait for a free connection when the pool is at its maximum size
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Rows per chunk of a streamed query
+STREAM_CHUNK_SIZE = int(os.getenv("DB_STREAM_CHUNK_SIZE", 1000))
+# Seconds the MySQL server waits for the client to read more of a streamed result
+# (the pipelines process a chunk before they read the next one)
+STREAM_WRITE_TIMEOUT = 3600
+
+
+def get_conn(cfg=None, ssl=True):
+    """
+    Opens a connection to the configured backend. Every backend returns rows as dicts
+    and takes %s placeholders; dialect_of(conn) gives the SQL that differs between them.
+    Args:
+        cfg (dict): MySQL host, port, user, password and db. Defaults to the Aiven database.
+        ssl (bool): Whether the MySQL connection uses TLS.
+    """
+    if DB_BACKEND == "sqlite":
+        return sqlite_connect(SQLITE_PATH)
+
+    if cfg is None:
+        try: 
+            cfg = st.secrets["AIVEN"]
+        except: 
+            cfg = {
+                "host": str(os.getenv("AIVEN_HOST")),
+                "port": int(os.getenv("AIVEN_PORT")),
+                "user": str(os.getenv("AIVEN_USER")),
+                "password": str(os.getenv("AIVEN_PASSWORD")),
+                "db": str(os.getenv("AIVEN_DB"))
+            }
 
     timeout = 10
     conn = pymysql.connect(
@@ -30,6 +70,239 @@ def get_conn():
         connect_timeout=timeout,
         read_timeout=timeout,
         write_timeout=timeout,
-        ssl={"ssl": {}}  # this enables SSL without needing the cert path
+        ssl={"ssl": {}} if ssl else None  # this enables SSL without needing the cert path
     )
     return conn
+
+
+def get_dialect():
+    """Returns the SQL dialect of the configured backend (see app/dialects.py)."""
+    return SQLITE if DB_BACKEND == "sqlite" else MYSQL
+
+
+def stream_query(conn, query, args=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Runs a query and yields its rows chunk by chunk, without holding the whole result in memory.
+    PyMySQL reads the whole result into the client unless the cursor is unbuffered (SSDictCursor),
+    and an unbuffered result keeps the connection busy until its last row is read: other queries
+    need a second connection meanwhile. sqlite3 cursors always step through the result lazily.
+    Args:
+        conn: An open connection (or pooled connection).
+        query (str): The query.
+        args (tuple): The query parameters.
+        chunk_size (int): The maximum number of rows per chunk.
+    Yields:
+        list: The next chunk of dict rows.
+    """
+    previous_timeout = None
+    if dialect_of(conn) is SQLITE:
+        cur = conn.cursor()
+    else:
+        # The server drops a client that does not read the next rows within net_write_timeout:
+        # it is raised for this query and set back afterwards, as pooled connections are reused
+        with conn.cursor() as setup:
+            setup.execute("SELECT @@SESSION.net_write_timeout AS timeout")
+            previous_timeout = setup.fetchone()["timeout"]
+            setup.execute("SET SESSION net_write_timeout = %s", (STREAM_WRITE_TIMEOUT,))
+        cur = conn.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cur.execute(query, args)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # An unbuffered cursor reads (and drops) the rest of the result before closing
+        cur.close()
+        if previous_timeout is not None:
+            with conn.cursor() as setup:
+                setup.execute("SET SESSION net_write_timeout = %s", (previous_timeout,))
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes free in time."""
+
+
+class PooledConnection:
+    """
+    A connection borrowed from a ConnectionPool. It behaves like the underlying
+    connection, except that close() (or leaving a with block) gives it back to the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise pymysql.err.InterfaceError("connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def close(self):
+        """Returns the connection to the pool, rolling back any open transaction."""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections.
+    Opening a connection to the hosted database costs a TCP and a TLS handshake plus the
+    authentication, several round trips each. The pool keeps up to max_size connections
+    open and hands them out again: the most recently used first, so the surplus stays idle
+    and is closed once it has been idle for max_idle seconds. A connection idle for longer
+    than check_after seconds is pinged before it is handed out, and replaced if the server
+    dropped it. Returned connections are rolled back if they are still in a transaction.
+    """
+
+    def __init__(self, connect=get_conn, max_size=POOL_MAX_SIZE, max_idle=POOL_MAX_IDLE,
+                 check_after=POOL_CHECK_AFTER, timeout=POOL_TIMEOUT):
+        """
+        Args:
+            connect (callable): Opens a new connection.
+            max_size (int): Maximum number of open connections, idle or borrowed.
+            max_idle (float): Seconds after which an idle connection is closed.
+            check_after (float): Seconds of idleness after which a connection is pinged before use.
+            timeout (float): Seconds acquire() waits for a free connection.
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.timeout = timeout
+        # Idle connections with the time they were returned, the most recent last
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        # Connections opened, for logging and benchmarks
+        self.opened = 0
+
+    def acquire(self) -> PooledConnection:
+        """
+        Borrows a connection, opening one if none is idle and the pool is not full.
+        Returns:
+            PooledConnection: The connection, to be closed (or used in a with block) when done.
+        Raises:
+            PoolTimeoutError: If the pool stayed full for the whole timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    expired += self._evict_expired()
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        conn, returned_at = None, None
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(f"no database connection free after {self.timeout} s")
+                    self._cond.wait(remaining)
+        finally:
+            # Closing sends a message to the server, it is done without holding the lock
+            for old in expired:
+                _close_quietly(old)
+
+        # A connection the server may have dropped while idle is checked first
+        if conn is not None and time.monotonic() - returned_at > self.check_after and not _alive(conn):
+            _close_quietly(conn)
+            conn = None
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            self.opened += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Gives a borrowed connection back, discarding it if it is broken."""
+        try:
+            if conn.open and conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                conn.rollback()
+            healthy = conn.open
+        except Exception:
+            healthy = False
+        with self._cond:
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if not healthy:
+            _close_quietly(conn)
+
+    def _evict_expired(self) -> list:
+        # Called with the lock held: the oldest idle connections are at the start of the list
+        now = time.monotonic()
+        expired = []
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            expired.append(self._idle.pop(0)[0])
+            self._size -= 1
+        return expired
+
+    def close(self):
+        """Closes every idle connection. Borrowed connections are closed when they are returned."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+    def __len__(self):
+        return self._size
+
+
+def _alive(conn) -> bool:
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# Process-wide pool shared by the Streamlit sessions of a server, or by the steps of a pipeline script
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Returns the process-wide ConnectionPool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool()
+            atexit.register(_pool.close)
+    return _pool
+
+
+def pooled_conn() -> PooledConnection:
+    """
+    Borrows a connection from the process-wide pool.
+    Use it in a with block, or close it when done: closing gives it back to the pool.
+    Returns:
+        PooledConnection: A connection with a DictCursor, like get_conn().
+    """
+    return get_pool().acquire()
@@ -0,0 +1,160 @@
+# SQL dialects of the supported database backends.
+# Queries are written once with pyformat placeholders (%s, or %(name)s for dict rows), like PyMySQL
+# expects; the SQLite backend translates them. Only the SQL that differs between MySQL and SQLite
+# goes through a dialect: upserts, insert-or-ignore, multi-column IN lists, week arithmetic,
+# string aggregation and a few functions.
+
+
+class MySQLDialect:
+    """SQL of the MySQL backend (Aiven in production, docker-compose locally)."""
+    name = "mysql"
+
+    def upsert(self, table, columns, keys, update=(), expressions=None) -> str:
+        """
+        Builds an INSERT that updates the existing row when a unique key is already taken.
+        Args:
+            table (str): The table.
+            columns (list): The inserted columns, one %s placeholder each.
+            keys (list): The unique key that may conflict (only needed by SQLite).
+            update (list): Columns set to the inserted value on conflict.
+            expressions (dict): Other columns set on conflict, column -> SQL expression
+                (use excluded() to refer to the inserted value).
+        Returns:
+            str: The statement. With PyMySQL, executemany sends it as one multi-row INSERT.
+        """
+        assignments = [f"{column} = {self.excluded(column)}" for column in update]
+        assignments += [f"{column} = {expression}" for column, expression in (expressions or {}).items()]
+        # A no-op assignment keeps the existing row, like INSERT IGNORE but without hiding other errors
+        assignments = assignments or [f"{keys[0]} = {keys[0]}"]
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}")
+
+    def excluded(self, column) -> str:
+        """Refers to the value an upsert tried to insert in a column."""
+        return f"VALUES({column})"
+
+    def insert_ignore(self, table, columns) -> str:
+        """Builds an INSERT that skips the rows whose unique key is already taken."""
+        return f"INSERT IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    def bulk_update(self, table, key, columns, required=()) -> str:
+        """
+        Builds a statement updating columns of existing rows by key, one dict row per updated row.
+        MySQL upserts the rows, so executemany sends a single multi-row statement;
+        required lists the NOT NULL columns without default the INSERT must carry.
+        Args:
+            table (str): The table.
+            key (str): The primary key column.
+            columns (list): The updated columns.
+            required (list): Other columns the INSERT needs (their current values).
+        Returns:
+            str: The statement, with %(name)s placeholders.
+        """
+        inserted = [key, *required, *columns]
+        return (f"INSERT INTO {table} ({', '.join(inserted)}) "
+                f"VALUES ({', '.join(f'%({column})s' for column in inserted)}) "
+                f"ON DUPLICATE KEY UPDATE {', '.join(f'{column} = VALUES({column})' for column in columns)}")
+
+    def tuple_in(self, columns, n) -> str:
+        """Builds a condition matching n tuples of values on several columns, e.g. (a, b) IN ((%s, %s), ...)."""
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        return f"({', '.join(columns)}) IN ({', '.join([row] * n)})"
+
+    def week_start(self, expr) -> str:
+        """Monday of the week of a datetime expression, as a date."""
+        return f"DATE_SUB(DATE({expr}), INTERVAL WEEKDAY({expr}) DAY)"
+
+    def week_end(self, expr) -> str:
+        """Sunday of the week of a datetime expression, as a date."""
+        return self.add_days(self.week_start(expr), 6)
+
+    def add_days(self, expr, days) -> str:
+        """A date expression moved by a number of days."""
+        return f"DATE_ADD({expr}, INTERVAL {days} DAY)"
+
+    def current_date(self) -> str:
+        return "CURDATE()"
+
+    def concat(self, *exprs) -> str:
+        return f"CONCAT({', '.join(exprs)})"
+
+    def group_concat(self, expr, order_by=None, separator=",") -> str:
+        """Concatenates the values of a group, in the given order (e.g. "ABS(score) DESC")."""
+        order = f" ORDER BY {order_by}" if order_by else ""
+        return f"GROUP_CONCAT({expr}{order} SEPARATOR '{separator}')"
+
+    def greatest(self, *exprs) -> str:
+        return f"GREATEST({', '.join(exprs)})"
+
+
+class SQLiteDialect(MySQLDialect):
+    """SQL of the embedded SQLite backend (local runs and benchmarks)."""
+    name = "sqlite"
+
+    def upsert(self, table, columns, keys, update=(), expressions=None) -> str:
+        assignments = [f"{column} = {self.excluded(column)}" for column in update]
+        assignments += [f"{column} = {expression}" for column, expression in (expressions or {}).items()]
+        action = f"DO UPDATE SET {', '.join(assignments)}" if assignments else "DO NOTHING"
+        return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON CONFLICT ({', '.join(keys)}) {action}")
+
+    def excluded(self, column) -> str:
+        return f"excluded.{column}"
+
+    def insert_ignore(self, table, columns) -> str:
+        return f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    def bulk_update(self, table, key, columns, required=()) -> str:
+        # Statements cost no round trip in SQLite, a plain UPDATE per row is the fastest
+        assignments = ", ".join(f"{column} = %({column})s" for column in columns)
+        return f"UPDATE {table} SET {assignments} WHERE {key} = %({key})s"
+
+    def tuple_in(self, columns, n) -> str:
+        # SQLite only accepts a subquery on the right of a row-value IN
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        return f"({', '.join(columns)}) IN (VALUES {', '.join([row] * n)})"
+
+    def week_start(self, expr) -> str:
+        # 'weekday 0' moves forward to the next Sunday (or stays on a Sunday)
+        return f"date({expr}, 'weekday 0', '-6 days')"
+
+    def week_end(self, expr) -> str:
+        return f"date({expr}, 'weekday 0')"
+
+    def add_days(self, expr, days) -> str:
+        return f"date({expr}, '{days:+d} days')"
+
+    def current_date(self) -> str:
+        return "date('now')"
+
+    def concat(self, *exprs) -> str:
+        return "(" + " || ".join(exprs) + ")"
+
+    def group_concat(self, expr, order_by=None, separator=",") -> str:
+        if not order_by:
+            return f"group_concat({expr}, '{separator}')"
+        # Ordered aggregation needs SQLite 3.44, the backend registers an equivalent aggregate
+        key, _, direction = order_by.rpartition(" ")
+        descending = direction.upper() == "DESC"
+        if direction.upper() not in ("ASC", "DESC"):
+            key, descending = order_by, False
+        return f"group_concat_ordered({expr}, {key}, {int(descending)}, '{separator}')"
+
+    def greatest(self, *exprs) -> str:
+        # The multi-argument max() of SQLite is a scalar function
+        return f"max({', '.join(exprs)})"
+
+
+MYSQL = MySQLDialect()
+SQLITE = SQLiteDialect()
+
+
+def dialect_of(conn):
+    """
+    Returns the dialect of a connection or cursor. Connections of the SQLite backend
+    carry their dialect; anything else (PyMySQL connections and cursors) is MySQL.
+    """
+    dialect = getattr(conn, "dialect", None)
+    if dialect is None:
+        dialect = getattr(getattr(conn, "connection", None), "dialect", None)
+    return dialect or MYSQL
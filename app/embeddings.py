@@ -0,0 +1,83 @@
+# Embedding store: the sentence embeddings of the article texts, kept in the article_embeddings
+# table (migration 008) so every article is encoded once per model in its lifetime, whichever stage
+# needs it first (classify_topics.py, cluster_and_keywords.py) and however many teams it is about.
+#  - A vector is keyed by article and model, and stored with the text_hash of the text it was computed
+#    from: it is reused while article_bodies holds the same text, and recomputed after a reparse changes it.
+#  - Vectors are stored as float32, or float16 (EMBEDDING_DTYPE) for half the size; they are always
+#    returned as float32.
+
+import os
+import numpy as np
+from app.bodies import BODY_BATCH_SIZE, load_bodies, text_hash
+from app.dialects import dialect_of
+
+# Type of the stored vectors: float32, or float16 for half the size
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+# text_hash of the articles without a body (they are encoded as an empty text)
+EMPTY_HASH = text_hash("")
+
+
+def embedding_upsert_sql(dialect) -> str:
+    """Query to insert or replace the vectors, (article_id, model, text_hash, dtype, vector) per row."""
+    return dialect.upsert("article_embeddings", ["article_id", "model", "text_hash", "dtype", "vector"],
+                          keys=["article_id", "model"], update=["text_hash", "dtype", "vector"])
+
+
+def load_embeddings(cursor, model, article_ids, batch_size=BODY_BATCH_SIZE) -> dict:
+    """
+    Fetches the stored vectors of some articles that still match their text.
+    Args:
+        cursor: A cursor of the database connection.
+        model (str): The name of the embedding model.
+        article_ids (list): The article IDs.
+        batch_size (int): The number of vectors fetched per query.
+    Returns:
+        dict: Article ID -> float32 vector. Articles without a current vector are missing.
+    """
+    ids = list(dict.fromkeys(int(article_id) for article_id in article_ids))
+    vectors = {}
+    for i in range(0, len(ids), batch_size):
+        batch = ids[i:i + batch_size]
+        cursor.execute(f"""
+        SELECT e.article_id, e.dtype, e.vector
+        FROM article_embeddings e
+        LEFT JOIN article_bodies b ON b.article_id = e.article_id
+        WHERE e.model = %s
+            AND e.article_id IN ({', '.join(['%s'] * len(batch))})
+            AND e.text_hash = COALESCE(b.text_hash, %s)
+        """, [model] + batch + [EMPTY_HASH])
+        vectors.update((row["article_id"], np.frombuffer(row["vector"], dtype=row["dtype"]).astype(np.float32))
+                       for row in cursor.fetchall())
+    return vectors
+
+
+def embed_articles(cursor, encoder, model, article_ids, dtype=EMBEDDING_DTYPE):
+    """
+    The embeddings of some articles: the stored ones, and the others encoded and stored.
+    The new vectors are written on the cursor's connection, the caller commits them with its own rows.
+    Args:
+        cursor: A cursor of the database connection.
+        encoder: The embedding model (a SentenceTransformer).
+        model (str): The name of the embedding model.
+        article_ids (list): The article IDs.
+        dtype (str): The type of the stored vectors, float32 or float16.
+    Returns:
+        tuple: The float32 vectors (np.ndarray, one row per article ID) and the texts loaded to
+            encode the missing ones (dict, article ID -> text).
+    """
+    ids = [int(article_id) for article_id in article_ids]
+    vectors = load_embeddings(cursor, model, ids)
+    missing = [article_id for article_id in dict.fromkeys(ids) if article_id not in vectors]
+    texts = {}
+    if missing:
+        texts = load_bodies(cursor, missing)
+        inputs = [texts.get(article_id, "") for article_id in missing]
+        encoded = np.asarray(encoder.encode(inputs, show_progress_bar=False), dtype=np.float32)
+        stored = encoded.astype(dtype)
+        cursor.executemany(embedding_upsert_sql(dialect_of(cursor)), [
+            (article_id, model, text_hash(text), dtype, vector.tobytes())
+            for article_id, text, vector in zip(missing, inputs, stored)
+        ])
+        # The caller gets the vectors as they are stored (and as a later run reads them back)
+        vectors.update(zip(missing, stored.astype(np.float32)))
+    return np.stack([vectors[article_id] for article_id in ids]), texts
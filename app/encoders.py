@@ -0,0 +1,283 @@
+# The SBERT encoder of the ML pipelines, on one of two CPU backends behind the same encode(texts):
+#  - torch: the SentenceTransformer model as published (the default).
+#  - onnx-int8: the model exported to ONNX with its weights quantized to int8 (dynamic quantization,
+#    the activations are quantized on the fly), run by ONNX Runtime. Several times faster on a CPU, at
+#    the cost of a small drift of the vectors (benchmarks/bench_onnx_encoder.py measures both).
+#    The exported model is written once to ONNX_DIR and loaded from there by the next runs.
+# The vectors of the two backends differ, so they are kept apart in the embedding store (store_name).
+# EncodingScheduler feeds either backend: it tokenizes the texts first, cuts them to the model's window
+# (or into chunks of it whose vectors are averaged), and encodes them in batches of similar lengths
+# sized by a token budget, optionally across a pool of worker processes.
+# onnx-int8 needs optimum and ONNX Runtime (the commented versions of requirements_ml_pipeline.txt).
+# torch and sentence-transformers are only imported when an encoder is loaded, so the pipelines import
+# without them (the benchmarks drive the pipelines' functions with stand-in encoders).
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+# Encoder backend: torch, or onnx-int8
+ENCODER_BACKEND = os.getenv("SBERT_BACKEND", "torch")
+# Threads of the encoder (None: the runtime's default, one per core)
+ENCODER_THREADS = int(os.getenv("SBERT_THREADS")) if os.getenv("SBERT_THREADS") else None
+# Where the quantized ONNX models are exported
+ONNX_DIR = Path(os.getenv("SBERT_ONNX_DIR", BASE_DIR / "app" / "models" / "onnx"))
+# Quantization of the ONNX weights, for the instruction set of the CPU: avx512_vnni, avx512, avx2 or arm64
+QUANTIZATION_CONFIG = os.getenv("SBERT_QUANTIZATION", "avx512_vnni")
+BACKENDS = ("torch", "onnx-int8")
+# Tokens per encoded batch, padding included (the batch size times the length of its longest text)
+TOKEN_BUDGET = int(os.getenv("SBERT_TOKEN_BUDGET", 8192))
+# Worker processes encoding the batches (0: encode in the calling process)
+ENCODER_PROCESSES = int(os.getenv("SBERT_PROCESSES", 0))
+# Texts longer than the model's window: truncate them, or chunk them and average the chunks' vectors
+LONG_TEXTS = os.getenv("SBERT_LONG_TEXTS", "truncate")
+LONG_TEXT_MODES = ("truncate", "chunk")
+# Tokens shared by consecutive chunks of a long text
+CHUNK_OVERLAP = 32
+
+
+def store_name(model_name, backend=ENCODER_BACKEND, long_texts=LONG_TEXTS) -> str:
+    """
+    Name of the vectors of an encoder in the embedding store (article_embeddings.model).
+    Args:
+        model_name (str): The SentenceTransformer model.
+        backend (str): The encoder backend.
+        long_texts (str): How the texts longer than the model's window are encoded.
+    Returns:
+        str: The model name for torch and truncated texts, with the backend and the mode otherwise.
+    """
+    name = model_name
+    if backend != "torch":
+        name += f"@{backend}-{QUANTIZATION_CONFIG}"
+    if long_texts != "truncate":
+        name += f"+{long_texts}"
+    return name
+
+
+def export_onnx_int8(model_name, directory=None) -> Path:
+    """
+    Exports a SentenceTransformer model to ONNX and quantizes its weights to int8, unless already done.
+    Args:
+        model_name (str): The SentenceTransformer model.
+        directory (Path): Where the model is exported. Defaults to a directory of ONNX_DIR named after the model.
+    Returns:
+        Path: The directory of the exported model.
+    """
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from sentence_transformers import SentenceTransformer
+
+    directory = Path(directory or ONNX_DIR / model_name.strip("/").replace("/", "--"))
+    if not (directory / "onnx" / f"model_qint8_{QUANTIZATION_CONFIG}.onnx").exists():
+        logger.info("Exporting %s to ONNX (int8, %s) in %s", model_name, QUANTIZATION_CONFIG, directory)
+        # backend="onnx" converts the PyTorch weights, saved as onnx/model.onnx with the tokenizer and pooling
+        SentenceTransformer(model_name, backend="onnx").save_pretrained(str(directory))
+        # Quantized next to it as onnx/model_qint8_<config>.onnx (what export_dynamic_quantized_onnx_model
+        # of sentence-transformers does, without its check that rejects the ONNX models of recent optimum)
+        quantizer = ORTQuantizer.from_pretrained(directory / "onnx", file_name="model.onnx")
+        quantizer.quantize(getattr(AutoQuantizationConfig, QUANTIZATION_CONFIG)(is_static=False),
+                           save_dir=directory / "onnx", file_suffix=f"qint8_{QUANTIZATION_CONFIG}")
+    return directory
+
+
+def load_encoder(model_name, backend=ENCODER_BACKEND, threads=ENCODER_THREADS) -> "SentenceTransformer":
+    """
+    Loads the SBERT encoder on a CPU backend.
+    Args:
+        model_name (str): The SentenceTransformer model.
+        backend (str): torch or onnx-int8.
+        threads (int): Threads of the encoder, or None for the runtime's default.
+    Returns:
+        SentenceTransformer: The encoder (encode(texts) on either backend).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown encoder backend {backend!r}, expected one of {BACKENDS}")
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    return SentenceTransformer(
+        str(export_onnx_int8(model_name)),
+        backend="onnx",
+        model_kwargs={
+            "file_name": f"onnx/model_qint8_{QUANTIZATION_CONFIG}.onnx",
+            "provider": "CPUExecutionProvider",
+            "session_options": options,
+        },
+    )
+
+
+# Encoder of a worker process of the scheduler's pool
+_worker_encoder = None
+
+
+def _init_worker(model_name, backend, threads):
+    global _worker_encoder
+    _worker_encoder = load_encoder(model_name, backend, threads)
+
+
+def encode_token_ids(encoder, batch) -> np.ndarray:
+    """
+    Encodes texts that are already tokenized, in one forward pass.
+    Args:
+        encoder (SentenceTransformer): The encoder.
+        batch (list): The token IDs of every text, without the special tokens, within the model's window.
+    Returns:
+        np.ndarray: One float32 vector per text.
+    """
+    import torch
+
+    tokenizer = encoder.tokenizer
+    rows = [tokenizer.build_inputs_with_special_tokens(ids) for ids in batch]
+    # Padded on the right to the longest text of the batch, as the tokenizer pads
+    input_ids = torch.full((len(rows), max(map(len, rows))), tokenizer.pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros_like(input_ids)
+    for i, row in enumerate(rows):
+        input_ids[i, :len(row)] = torch.tensor(row)
+        attention_mask[i, :len(row)] = 1
+    features = {"input_ids": input_ids, "attention_mask": attention_mask}
+    if "token_type_ids" in tokenizer.model_input_names:
+        features["token_type_ids"] = torch.zeros_like(input_ids)
+    with torch.inference_mode():
+        return encoder(features)["sentence_embedding"].float().cpu().numpy()
+
+
+def _encode_batch(batch):
+    return encode_token_ids(_worker_encoder, batch)
+
+
+class EncodingScheduler:
+    """
+    Encodes texts with an SBERT encoder in batches planned from their token counts.
+    SentenceTransformer.encode sorts a call's texts by characters, cuts fixed batches of 32 and
+    silently drops the tokens past its window. The scheduler tokenizes the texts once: every text
+    is cut to the window (or split into overlapping chunks of it, whose vectors are averaged by
+    token count), the pieces are sorted by tokens, and each batch takes as many pieces of similar
+    length as fit in token_budget once padded. The batches go to the model as token IDs, in this
+    process or spread over a pool of worker processes that each load the encoder.
+    Same encode(texts) as a SentenceTransformer, so it can stand in for one (app/embeddings.py).
+    """
+
+    def __init__(self, model_name, backend=ENCODER_BACKEND, threads=ENCODER_THREADS, token_budget=TOKEN_BUDGET,
+                 processes=ENCODER_PROCESSES, long_texts=LONG_TEXTS):
+        """
+        Args:
+            model_name (str): The SentenceTransformer model.
+            backend (str): torch or onnx-int8.
+            threads (int): Threads of the encoder in this process, or None for the runtime's default.
+            token_budget (int): Tokens per batch, padding included.
+            processes (int): Worker processes (0: encode in this process).
+            long_texts (str): truncate or chunk the texts longer than the model's window.
+        """
+        from sentence_transformers.models import Normalize
+
+        if long_texts not in LONG_TEXT_MODES:
+            raise ValueError(f"unknown long text mode {long_texts!r}, expected one of {LONG_TEXT_MODES}")
+        self.encoder = load_encoder(model_name, backend, threads)
+        self.tokenizer = self.encoder.tokenizer
+        self.token_budget = token_budget
+        self.long_texts = long_texts
+        # Tokens of a text that fit in the window, next to the special tokens ([CLS] and [SEP])
+        self.window = self.encoder.max_seq_length - self.tokenizer.num_special_tokens_to_add()
+        self.normalized = any(isinstance(module, Normalize) for module in self.encoder)
+        self.pool = None
+        if processes:
+            # Spawned, not forked: the parent's runtime threads do not survive a fork
+            self.pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker,
+                                            initargs=(model_name, backend, max(1, (os.cpu_count() or 1) // processes)))
+
+    def split(self, texts) -> list:
+        """
+        Tokenizes the texts and cuts them to the model's window.
+        Args:
+            texts (list): The texts.
+        Returns:
+            list: The (text index, token IDs) of every piece to encode.
+        """
+        ids = self.tokenizer(list(texts), add_special_tokens=False, return_attention_mask=False,
+                             return_token_type_ids=False, verbose=False)["input_ids"]
+        pieces = []
+        for i, text_ids in enumerate(ids):
+            if len(text_ids) <= self.window or self.long_texts == "truncate":
+                pieces.append((i, text_ids[:self.window]))
+            else:
+                step = self.window - CHUNK_OVERLAP
+                pieces.extend((i, text_ids[start:start + self.window])
+                              for start in range(0, len(text_ids) - CHUNK_OVERLAP, step))
+        return pieces
+
+    def plan(self, pieces) -> list:
+        """
+        Groups the pieces into batches of similar lengths within the token budget.
+        Args:
+            pieces (list): The pieces of split().
+        Returns:
+            list: The batches, lists of pieces.
+        """
+        batches, batch = [], []
+        for piece in sorted(pieces, key=lambda p: len(p[1])):
+            # Sorted by length, the piece is the longest of the batch: every text is padded to its length
+            if batch and (len(batch) + 1) * (len(piece[1]) + 2) > self.token_budget:
+                batches.append(batch)
+                batch = []
+            batch.append(piece)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def encode(self, texts, show_progress_bar=False) -> np.ndarray:
+        """
+        Encodes texts.
+        Args:
+            texts (list): The texts.
+            show_progress_bar (bool): Ignored, for the interface of SentenceTransformer.encode.
+        Returns:
+            np.ndarray: One float32 vector per text.
+        """
+        batches = self.plan(self.split(texts))
+        inputs = [[ids for _, ids in batch] for batch in batches]
+        if self.pool is not None:
+            outputs = self.pool.map(_encode_batch, inputs)
+        else:
+            outputs = (encode_token_ids(self.encoder, batch) for batch in inputs)
+
+        # Sum of the pieces' vectors weighted by their tokens (a single piece for most texts)
+        sums = np.zeros((len(texts), self.encoder.get_sentence_embedding_dimension()), dtype=np.float32)
+        weights = np.zeros(len(texts), dtype=np.float32)
+        for batch, vectors in zip(batches, outputs):
+            for (i, ids), vector in zip(batch, vectors):
+                sums[i] += max(len(ids), 1) * vector
+                weights[i] += max(len(ids), 1)
+        vectors = sums / weights[:, None]
+        if self.normalized:
+            # The mean of unit vectors is shorter than them: back on the sphere the model encodes to
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
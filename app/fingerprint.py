@@ -0,0 +1,152 @@
+# Near-duplicate detection for article texts, shared by the scraper loader and the ML pipelines.
+#  - minhash: signature of the set of word 3-grams of a text (NUM_PERM 32-bit minimums). The share of
+#    equal positions in two signatures estimates the Jaccard similarity of the two texts.
+#  - band_keys: LSH banding. The signature is cut into BANDS bands of ROWS values, each hashed into one
+#    bucket key. Texts with a high similarity share a bucket in at least one band with high probability,
+#    so candidates are found with exact lookups (an index in the database, a dict in LSHIndex)
+#    instead of comparing against every stored article.
+#  - assign_duplicates: the original (oldest) article every new article duplicates.
+
+import re
+from hashlib import blake2b
+import numpy as np
+
+# Signature layout: NUM_PERM values, cut into BANDS bands of ROWS values
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Two texts are near-duplicates if their estimated Jaccard similarity reaches this value
+# (about 3 sentences of 25 replaced). With 16 bands of 4 rows, pairs at 0.7 share a bucket 99% of the time
+SIMILARITY_THRESHOLD = 0.7
+# Words per shingle
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+# Universal hash functions h(x) = (a * x + b) mod p, one per permutation, fixed so signatures are comparable
+_PRIME = 4294967291  # largest prime below 2**32
+_rng = np.random.default_rng(20250901)
+_A = _rng.integers(1, 2**31, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**31, size=NUM_PERM, dtype=np.uint64)
+
+
+def minhash(text):
+    """
+    Computes the MinHash signature of a text.
+    Args:
+        text (str): The article text.
+    Returns:
+        np.ndarray: NUM_PERM uint32 values, or None if the text has no words.
+    """
+    words = _WORD_RE.findall(text.lower()) if text else []
+    if not words:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+
+    # Stable 32-bit hash of every shingle (Python's hash() changes between processes)
+    hashes = np.fromiter((int.from_bytes(blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                          for s in shingles), dtype=np.uint64, count=len(shingles))
+    # a < 2**31 and x < 2**32, so a * x + b fits in 64 bits
+    permuted = (hashes[:, None] * _A + _B) % _PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def to_bytes(signature) -> bytes:
+    """Serializes a signature for the articles.minhash column (NUM_PERM * 4 bytes)."""
+    return signature.astype("<u4").tobytes()
+
+
+def from_bytes(data) -> np.ndarray:
+    """Reads a signature stored with to_bytes."""
+    return np.frombuffer(data, dtype="<u4")
+
+
+def band_keys(signature) -> list:
+    """Returns the bucket key (32-bit) of every band of a signature, band 0 first."""
+    data = to_bytes(signature)
+    step = ROWS * 4
+    return [int.from_bytes(blake2b(data[i:i + step], digest_size=4).digest(), "little")
+            for i in range(0, len(data), step)]
+
+
+def similarity(a, b) -> float:
+    """Returns the estimated Jaccard similarity of the texts of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class LSHIndex:
+    """
+    In-memory LSH index of signatures, with one hash table per band.
+    A query only compares the signatures sharing a bucket with it, so its cost depends
+    on the number of similar articles, not on the number of indexed articles.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._tables = [{} for _ in range(BANDS)]
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key, signature, canonical=None, keys=None):
+        """
+        Indexes a signature.
+        Args:
+            key: The article ID.
+            signature (np.ndarray): Its signature.
+            canonical: ID of the article it duplicates, or None if it is an original.
+            keys (list): Its band keys, if already computed.
+        """
+        if key in self._entries:
+            self.remove(key)
+        keys = keys or band_keys(signature)
+        self._entries[key] = (signature, canonical, keys)
+        for table, bucket in zip(self._tables, keys):
+            table.setdefault(bucket, []).append(key)
+
+    def remove(self, key):
+        _, _, keys = self._entries.pop(key)
+        for table, bucket in zip(self._tables, keys):
+            table[bucket].remove(key)
+
+    def canonical(self, key):
+        """Returns the original article of an indexed article (itself if it is not a duplicate)."""
+        canonical = self._entries[key][1]
+        return key if canonical is None else canonical
+
+    def query(self, signature, keys=None) -> list:
+        """
+        Finds the indexed near-duplicates of a signature.
+        Args:
+            signature (np.ndarray): The signature to look up.
+            keys (list): Its band keys, if already computed.
+        Returns:
+            list: (key, similarity) of every indexed signature at or above the threshold.
+        """
+        candidates = set()
+        for table, bucket in zip(self._tables, keys or band_keys(signature)):
+            candidates.update(table.get(bucket, ()))
+        matches = [(key, similarity(signature, self._entries[key][0])) for key in candidates]
+        return [(key, s) for key, s in matches if s >= self.threshold]
+
+
+def assign_duplicates(index, articles) -> dict:
+    """
+    Finds the original article every new article duplicates, and adds the new articles to the index.
+    Articles are processed in ID order, so an article only duplicates older ones and
+    duplicates of duplicates point to the same original.
+    Args:
+        index (LSHIndex): The stored articles that may be duplicated, keyed by article ID.
+        articles (list): (article_id, signature) of the new articles. Signatures may be None.
+    Returns:
+        dict: Article ID -> ID of the original article, or None if it is not a near-duplicate.
+    """
+    duplicate_of = {}
+    for article_id, signature in sorted(articles, key=lambda a: a[0]):
+        if signature is None:
+            duplicate_of[article_id] = None
+            continue
+        originals = [index.canonical(key) for key, _ in index.query(signature) if key < article_id]
+        duplicate_of[article_id] = min(originals) if originals else None
+        index.add(article_id, signature, duplicate_of[article_id])
+    return duplicate_of
@@ -1,20 +1,27 @@
 # Purpose:
 #  - Find article/team pairs that don't yet have a topic assigned.
-#  - Compute SBERT embeddings for each article text.
+#  - Get the SBERT embedding of each article text from the embedding store (app/embeddings.py),
+#    encoding the originals not embedded yet (near-duplicates reuse the embedding of their original).
 #  - Predict topic label and probability with a saved sklearn pipeline.
-#  - Upsert (insert or update) the prediction into the weekly_topic table.
+#  - Upsert (insert or update) the prediction into the weekly_topic table, committing every batch.
+#    The committed rows are the checkpoint: they leave the pending rows, so a rerun after a crash
+#    only classifies the batches that were not committed.
 
 from joblib import load
 from pathlib import Path
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 import numpy as np
 import logging
 import sys
+import time
 from pathlib import Path
 project_root = Path(__file__).resolve().parents[2]   
 sys.path.append(str(project_root))
-from app.db import get_conn
+from app.db import pooled_conn, stream_query
+from app.dialects import dialect_of
+from app.embeddings import embed_articles
+from app.encoders import ENCODER_BACKEND, EncodingScheduler, store_name
+from app.queries import unlabeled_topics_query
 
 # Logging setup (helps debugging)
 logging.basicConfig(level=logging.INFO)
@@ -25,58 +32,93 @@ BASE_DIR = Path(__file__).resolve().parents[2]   # repo root (adjust if differen
 MODEL_DIR = BASE_DIR / "app" / "models"
 MODEL_NAME = "topic_clf_v1_20250809T153500Z.joblib"   # adjust to your file
 SBERT_MODEL = "all-MiniLM-L6-v2"
+# Name of its vectors in the embedding store (the backends' vectors differ slightly)
+EMBEDDING_MODEL = store_name(SBERT_MODEL)
 BATCH_SIZE = 256
 
-# Query to upsert the rows
-UPSERT_SQL = """
-INSERT INTO weekly_topic
-  (team_id, week_start, week_end, article_id, topic_id, topic_probability)
-VALUES (%s, %s, %s, %s, %s, %s)
-ON DUPLICATE KEY UPDATE
-  topic_id = VALUES(topic_id),
-  topic_probability = VALUES(topic_probability)
-"""
 
+def upsert_sql(dialect):
+    """Query to upsert the rows, in the SQL of the connection's backend"""
+    return dialect.upsert("weekly_topic",
+                          ["team_id", "week_start", "week_end", "article_id", "topic_id", "topic_probability"],
+                          keys=["team_id", "week_start", "week_end", "article_id"],
+                          update=["topic_id", "topic_probability"])
 
-def fetch_unlabeled_articles(cursor):
+
+def iter_unlabeled_articles(con, chunk_size=BATCH_SIZE):
     """
-    Fetch all (team_id, article_id, week_start, week_end, full_text) tuples
-    for which weekly_topic.topic_id is NULL or the weekly_topic row doesn't exist.
+    Stream the (team_id, article_id, original_id, week_start, week_end) rows
+    for which weekly_topic.topic_id is NULL or the weekly_topic row doesn't exist,
+    as DataFrames of up to chunk_size rows (memory stays flat however many rows are pending).
+    original_id is the article a near-duplicate copies, or the article itself.
+    The connection is busy until the last chunk is read: use another one for the other queries.
     """
-    query = """
-    SELECT
-        at.team_id,
-        a.id AS article_id,
-        DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY) AS week_start,
-        DATE_ADD(
-            DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY),
-            INTERVAL 6 DAY
-        ) AS week_end,
-        a.full_text
-    FROM article_teams at
-    JOIN articles a ON a.id = at.article_id
-    LEFT JOIN weekly_topic wt
-        ON wt.article_id = a.id
-        AND wt.team_id = at.team_id
-        AND wt.week_start = DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY)
-        AND wt.week_end   = DATE_ADD(DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY), INTERVAL 6 DAY)
-    WHERE wt.topic_id IS NULL;
+    for rows in stream_query(con, unlabeled_topics_query(dialect_of(con)), chunk_size=chunk_size):
+        yield pd.DataFrame(rows)
+
+
+def classify_batch(clf, sbert, cursor, batch):
     """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    # If no rows, return an empty DataFrame with the right columns
-    if not rows:
-        return pd.DataFrame(columns=cols)
-    return pd.DataFrame(rows, columns=cols)
-
-
-def batch_iter(df, size):
-    """Generator that yields dataframe batches"""
-    for i in range(0, len(df), size):
-        # "yield" returns one batch at a time to the caller (doesn't build all batches at once)
-        yield df.iloc[i:i+size]
-    
+    Predicts the topic of a batch of rows.
+    Args:
+        clf: The sklearn pipeline.
+        sbert: The SBERT model.
+        cursor: A cursor to load the texts with.
+        batch (pd.DataFrame): The rows, as iter_unlabeled_articles yields them.
+    Returns:
+        list: The rows to upsert, in the upsert_sql order.
+    """
+    # embeddings of the original articles, from the store: near-duplicates and articles tagged with
+    # several teams reuse the same embedding, and only the articles never embedded before are encoded
+    emb, _ = embed_articles(cursor, sbert, EMBEDDING_MODEL, batch["original_id"].tolist())
+
+    # one predict_proba gives both the topic (the most probable class, what predict returns) and its probability
+    topic_probs = clf.predict_proba(emb)
+    best = topic_probs.argmax(axis=1)
+    topic_preds = clf.classes_[best]
+    pred_probs = topic_probs[np.arange(len(best)), best]
+
+    return [
+        (int(team_id), week_start, week_end, int(article_id), int(pred_idx), float(pred_prob))
+        for team_id, week_start, week_end, article_id, pred_idx, pred_prob in zip(
+            batch["team_id"], batch["week_start"], batch["week_end"], batch["article_id"], topic_preds, pred_probs)
+    ]
+
+
+def classify_pending(clf, sbert, read_con, con, batch_size=BATCH_SIZE):
+    """
+    Classifies every pending row, batch by batch, committing each batch with its new embeddings:
+    a crash later in the run keeps the batches already done.
+    Args:
+        clf: The sklearn pipeline.
+        sbert: The SBERT model.
+        read_con: The connection the pending rows are streamed from.
+        con: The connection the texts are loaded and the rows written with.
+        batch_size (int): Rows per batch.
+    Returns:
+        int: The number of rows classified.
+    """
+    cursor = con.cursor()
+    upsert = upsert_sql(dialect_of(con))
+    n_rows = 0
+    start = time.perf_counter()
+    try:
+        for batch in iter_unlabeled_articles(read_con, batch_size):
+            upsert_rows = classify_batch(clf, sbert, cursor, batch)
+
+            # send the batch (executemany is faster than looped execute) and commit it
+            cursor.executemany(upsert, upsert_rows)
+            con.commit()
+            n_rows += len(upsert_rows)
+            logger.info("Committed %d weekly_topic rows (%.0f rows/s).", n_rows, n_rows / (time.perf_counter() - start))
+    except Exception as e:
+        con.rollback()
+        logger.exception("DB write error, rolled back the current batch (%d rows committed before): %s", n_rows, e)
+        raise
+    finally:
+        cursor.close()
+    return n_rows
+
 
 def main(): 
     # 1) locate and load the saved sklearn pipeline
@@ -89,69 +131,22 @@ def main():
     clf = load(model_path)
     
     # 2) load SBERT model for embeddings
-    logger.info("Loading SBERT model: %s", SBERT_MODEL)
-    sbert = SentenceTransformer(SBERT_MODEL)
-
-    # 3) connect to DB
-    con = get_conn()
-    cursor = con.cursor()
-
-    # 4) fetch the list of rows to classify
-    articles = fetch_unlabeled_articles(cursor)
-    if articles.empty:
-        logger.info("No articles to classify. Exiting.")
-        cursor.close()
-        con.close()
-        return
-
-    # 5) process in batches (memory-friendly)
-    logger.info("Found %d articles to classify.", len(articles))
-    upsert_rows = []
-
-    for batch in batch_iter(articles, BATCH_SIZE):
-
-        texts = batch["full_text"].tolist()
-        # encode texts into embeddings
-        emb = sbert.encode(texts, show_progress_bar=False)
-
-        # get predictions and probabilities
-        topic_preds = clf.predict(emb)
-        topic_probs = clf.predict_proba(emb)
-
-        # build the rows to upsert (match the UPSERT_SQL order)
-        for i, row in enumerate(articles.itertuples(index=False)):
-            article_id = int(row.article_id)
-            team_id = int(row.team_id) 
-            week_start = row.week_start   
-            week_end = row.week_end
-            pred_idx = int(topic_preds[i])
-            pred_prob = float(np.max(topic_probs[i,]))
-
-            upsert_rows.append(
-                (team_id, week_start, week_end, article_id, pred_idx, pred_prob) #pred_prob
-            )
-
-    # 6) write results in a single transaction (executemany is faster than looped execute)
-    if upsert_rows: 
-        try:
-            logger.info("Upserting %d weekly_topic rows...", len(upsert_rows))
-            cursor.executemany(UPSERT_SQL, upsert_rows)
-
-            con.commit()
-            logger.info("DB commit successful.")
-        except Exception as e:
-            con.rollback()
-            logger.exception("DB write error, rolled back: %s", e)
-            raise
-        finally:
-            cursor.close()
-            con.close()
-    
-    else: 
-        logger.info("No rows to upsert.")
-        cursor.close()
+    logger.info("Loading SBERT model: %s (%s)", SBERT_MODEL, ENCODER_BACKEND)
+    # texts cut to the model's window and batched by tokens (app/encoders.py)
+    sbert = EncodingScheduler(SBERT_MODEL)
+
+    # 3) connect to DB: one connection streams the rows to classify, the other loads the texts and writes
+    read_con = pooled_conn()
+    con = pooled_conn()
+
+    # 4) stream the rows to classify and process them batch by batch (memory-friendly)
+    try:
+        if classify_pending(clf, sbert, read_con, con) == 0:
+            logger.info("No articles to classify. Exiting.")
+    finally:
         con.close()
-
+        read_con.close()
+        sbert.close()
 
 
 if __name__ == "__main__": 
@@ -6,7 +6,6 @@
 
 from pathlib import Path
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 import numpy as np
 import logging
 from keybert import KeyBERT
@@ -18,7 +17,13 @@ import sys
 from pathlib import Path
 project_root = Path(__file__).resolve().parents[2]   
 sys.path.append(str(project_root))
-from app.db import get_conn
+from app.bodies import load_bodies
+from app.db import STREAM_CHUNK_SIZE, pooled_conn, stream_query
+from app.dialects import dialect_of
+from app.embeddings import embed_articles
+from app.encoders import ENCODER_BACKEND, EncodingScheduler, store_name
+from app.queries import unclustered_query
+from app.teams import HEADLINE_MATCHER, TEAM_NAMES
 
 # Logging setup (helps debugging)
 logging.basicConfig(level=logging.INFO)
@@ -27,6 +32,8 @@ logger = logging.getLogger(__name__)
 # Paths / model names / constants
 BASE_DIR = Path(__file__).resolve().parents[2]   # repo root (adjust if different)
 SBERT_MODEL = "all-MiniLM-L6-v2"
+# Name of its vectors in the embedding store (the backends' vectors differ slightly)
+EMBEDDING_MODEL = store_name(SBERT_MODEL)
 KEYBERT_MODEL = "distilbert-base-nli-mean-tokens"
 SPACY_MODEL = "en_core_web_sm"
 
@@ -35,77 +42,47 @@ TABLE_WEEKLY_TOPIC = "weekly_topic"
 TABLE_WEEKLY_CLUSTER = "weekly_clusters"
 TABLE_WEEKLY_KEYWORDS = "weekly_keywords"
 
-# Define team aliases for filtering keywords
-TEAM_ALIASES = {
-    1: r"\b(?:Arsenal|Gunners)\b",
-    2: r"\b(?:Chelsea|Blues)\b",
-    3: r"\b(?:Liverpool|Reds)\b",
-    4: r"\b(?:Manchester City|Man City)\b",
-    5: r"\b(?:Manchester United|Man Utd|Red Devils|Man United)\b",
-    6: r"\b(?:Tottenham Hotspur|Spurs|Tottenham)\b"
-}
-
-# Query to upsert the rows
-UPSERT_WEEKLY_TOPICS = f"""
-INSERT INTO {TABLE_WEEKLY_TOPIC}
-  (team_id, week_start, week_end, article_id, cluster_id)
-VALUES (%s, %s, %s, %s, %s)
-ON DUPLICATE KEY UPDATE
-  cluster_id = VALUES(cluster_id)
-"""
-UPSERT_WEEKLY_CLUSTERS = f"""
-INSERT INTO {TABLE_WEEKLY_CLUSTER}
-  (team_id, week_start, week_end, cluster_id, size)
-VALUES (%s, %s, %s, %s, %s)
-ON DUPLICATE KEY UPDATE
-  size = VALUES(size)
-"""
-UPSERT_WEEKLY_KEYWORDS = f"""
-INSERT INTO {TABLE_WEEKLY_KEYWORDS}
-  (team_id, week_start, week_end, cluster_id, keyword, score)
-VALUES (%s, %s, %s, %s, %s, %s)
-ON DUPLICATE KEY UPDATE
-  score = VALUES(score)
-"""
-
-
-def fetch_unlabeled_articles(cursor):
-    """
-    Fetch all (team_id, article_id, week_start, week_end, full_text) tuples
-    for which weekly_topic.cluster_id is NULL or the weekly_topic row doesn't exist.
+# Team aliases for filtering keywords, compiled once per team from the shared registry
+TEAM_ALIASES = {team_id: HEADLINE_MATCHER.alias_pattern(team) for team_id, team in TEAM_NAMES.items()}
+
+# Queries to upsert the rows, in the SQL of the connection's backend
+def upsert_weekly_topics(dialect):
+    return dialect.upsert(TABLE_WEEKLY_TOPIC, ["team_id", "week_start", "week_end", "article_id", "cluster_id"],
+                          keys=["team_id", "week_start", "week_end", "article_id"], update=["cluster_id"])
+
+
+def upsert_weekly_clusters(dialect):
+    return dialect.upsert(TABLE_WEEKLY_CLUSTER, ["team_id", "week_start", "week_end", "cluster_id", "size"],
+                          keys=["team_id", "week_start", "week_end", "cluster_id"], update=["size"])
+
+
+def upsert_weekly_keywords(dialect):
+    return dialect.upsert(TABLE_WEEKLY_KEYWORDS, ["team_id", "week_start", "week_end", "cluster_id", "keyword", "score"],
+                          keys=["team_id", "week_start", "week_end", "cluster_id", "keyword"], update=["score"])
+
+
+def iter_unlabeled_weeks(con, chunk_size=STREAM_CHUNK_SIZE):
     """
-    # cannot select articles of this week
-    query = """
-    SELECT
-    at.team_id,
-    a.id AS article_id,
-    DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY) AS week_start,
-    DATE_ADD(
-        DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY),
-        INTERVAL 6 DAY
-    ) AS week_end,
-    a.full_text,
-    wt.topic_id
-    FROM article_teams at
-    JOIN articles a ON a.id = at.article_id
-    LEFT JOIN weekly_topic wt
-    ON wt.article_id = a.id
-    AND wt.team_id = at.team_id
-    AND wt.week_start = DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY)
-    AND wt.week_end   = DATE_ADD(DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY), INTERVAL 6 DAY)
-    WHERE wt.cluster_id IS NULL
-    AND DATE_ADD(
-        DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY),
-        INTERVAL 6 DAY
-    ) < CURDATE()
+    Stream the (team_id, article_id, original_id, week_start, week_end, topic_id) rows
+    for which weekly_topic.cluster_id is NULL or the weekly_topic row doesn't exist,
+    one team/week at a time: only the rows of the current team and week are held in memory.
+    original_id is the article a near-duplicate copies, or the article itself.
+    The connection is busy until the last week is read: use another one for the other queries.
+    Yields:
+        tuple: (team_id, week_start, week_end) and the DataFrame of its rows.
     """
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    cols = [c[0] for c in cursor.description]
-    # If no rows, return an empty DataFrame with the right columns
-    if not rows:
-        return pd.DataFrame(columns=cols)
-    return pd.DataFrame(rows, columns=cols)
+    key, rows = None, []
+    # The rows come sorted by week and team (unclustered_query), a team/week ends where the key changes
+    for chunk in stream_query(con, unclustered_query(dialect_of(con)), chunk_size=chunk_size):
+        for row in chunk:
+            row_key = (row["team_id"], row["week_start"], row["week_end"])
+            if row_key != key and rows:
+                yield key, pd.DataFrame(rows)
+                rows = []
+            key = row_key
+            rows.append(row)
+    if rows:
+        yield key, pd.DataFrame(rows)
 
 
 def elbow_best_k(lower_bound, inertias): 
@@ -166,165 +143,176 @@ def filter_and_dedup(keywords, alias_pattern):
     return unique
 
 
+def cluster_week(sbert, enc, cursor, team_id, week_start, group):
+    """
+    Clusters the articles of a team and week into storylines.
+    Args:
+        sbert: The SBERT model.
+        enc: The one-hot encoder of the topics.
+        cursor: A cursor to load the texts with.
+        team_id (int): The team.
+        week_start (date): The Monday of the week.
+        group (pd.DataFrame): The unclustered rows of the team and week.
+    Returns:
+        tuple: The cluster of every row (numpy array) and the texts of the originals loaded to embed them.
+    """
+    # Near-duplicates are clustered once, through their original, and share its cluster
+    unique = group.drop_duplicates("original_id")
+
+    # Check if there are enough articles to cluster
+    n_articles = len(unique)
+    if n_articles < 2: 
+        logger.info("Team %s week %s has <2 articles (n=%d). clustering all as 0.", team_id, week_start, n_articles)
+        return np.zeros(len(group), dtype=int), {}
+
+    # Embed the full text (from the store, classify_topics.py embedded most of them already)
+    # and one-hot encode the topics to create the feature matri
+    X_emb, texts = embed_articles(cursor, sbert, EMBEDDING_MODEL, unique["original_id"].tolist())
+    topic_encoded = enc.fit_transform(unique[["topic_id"]]).toarray()
+    X = np.concatenate((X_emb, topic_encoded), axis=1)
+
+    # Putting a lower and upper bound on k
+    lower_bound = 2
+    upper_bound = max(lower_bound, n_articles // 2)
+    k = range(lower_bound, upper_bound + 1)
+
+    # Perform KMeans and GMM clustering
+    inertias = []
+    for n_clusters in k: 
+        km = KMeans(n_clusters=n_clusters, random_state=42)
+        km.fit(X)
+        inertias.append(km.inertia_)
+
+    # Calculate the optimal k for KMeans and fit the model
+    optimal_k = elbow_best_k(lower_bound, inertias)
+    logger.info("Team %s week %s: n=%d optimal_k=%d", team_id, week_start, n_articles, optimal_k)   
+    km = KMeans(n_clusters=optimal_k, random_state=42)
+    km_labels = km.fit_predict(X)
+    labels = dict(zip(unique["original_id"], km_labels))
+    return group["original_id"].map(labels).to_numpy(), texts
+
+
+def extract_keywords(nlp, kw_model, team_id, full_text):
+    """
+    Extracts the keywords of a storyline, without the team's own names.
+    Args:
+        nlp: The spaCy pipeline.
+        kw_model: The KeyBERT model.
+        team_id (int): The team.
+        full_text (str): The texts of the storyline's articles, joined.
+    Returns:
+        list: The (keyword, score) pairs.
+    """
+    # Eliminate numbers
+    doc = nlp(full_text)
+    tokens = [token.lemma_ for token in doc if not token.is_digit]
+    cleaned_text = " ".join(tokens)
+    doc = nlp(cleaned_text)
+
+    # Extract named entities of type PERSON to extract key people
+    people = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+    people = list(set(people))  
+    cleaned_people = []
+    for person in people: 
+        cleaned_people.append(person.lower())
+
+    # Extract general keywords using KeyBERT
+    general_kws = kw_model.extract_keywords(
+        cleaned_text,
+        keyphrase_ngram_range=(1, 2), 
+        stop_words='english',
+        top_n=10
+    )
+
+    # Extract keywords related to key people using KeyBERT
+    people_kws = kw_model.extract_keywords(
+        cleaned_text, 
+        keyphrase_ngram_range=(1, 3), 
+        candidates=cleaned_people, 
+        top_n=10
+    )
+
+    # Get the precompiled regex pattern for the team's aliases
+    alias_re = TEAM_ALIASES.get(team_id, re.compile(r"$^"))
+    # Filter and deduplicate the keywords
+    merged_kws = general_kws + people_kws
+    return filter_and_dedup(merged_kws, alias_re)
+
+
 def main():   
     # load models
-    logger.info("Loading SBERT model: %s", SBERT_MODEL)
-    sbert = SentenceTransformer(SBERT_MODEL)
+    logger.info("Loading SBERT model: %s (%s)", SBERT_MODEL, ENCODER_BACKEND)
+    # texts cut to the model's window and batched by tokens (app/encoders.py)
+    sbert = EncodingScheduler(SBERT_MODEL)
     nlp = spacy.load(SPACY_MODEL)
     kw_model = KeyBERT(KEYBERT_MODEL)
 
-    # connect to DB
-    con = get_conn()
+    # connect to DB: one connection streams the rows to cluster, the other loads the texts and writes
+    read_con = pooled_conn()
+    con = pooled_conn()
     cursor = con.cursor()
-
-    # fetch the list of rows to classify
-    articles = fetch_unlabeled_articles(cursor)
-    if articles.empty:
-        logger.info("No articles to classify. Exiting.")
-        cursor.close()
-        con.close()
-        return
-
-    logger.info("Found %d articles to classify.", len(articles))
-
-    # ensure correct dtypes and column names
-    # expected columns: team_id, article_id, week_start, week_end, full_text, topic_id
-    for col in ["team_id","article_id","week_start","week_end","full_text","topic_id"]:
-        if col not in articles.columns:
-            logger.error("Missing column %s in fetched data", col)
-            return
+    dialect = dialect_of(con)
+    enc = OneHotEncoder(handle_unknown='ignore')
+    n_weeks = n_clusters = n_keywords = n_topics = 0
 
     # ------------------------
     # FULL CLUSTERING PIPELINE
     # ------------------------
 
-    articles["cluster_id"] = np.nan
-
-    cluster_rows = []
-    keyword_rows = []
-    topic_rows = []
-
-    enc = OneHotEncoder(handle_unknown='ignore')
-    for (team_id, week_start, week_end), group in articles.groupby(["team_id", "week_start", "week_end"]):
-        # Check if there are enough articles to cluster
-        n_articles = group["article_id"].nunique()
-        if n_articles < 2: 
-            logger.info("Team %s week %s has <2 articles (n=%d). clustering all as 0.", team_id, week_start, n_articles)
-            articles.loc[group.index, "cluster_id"] = [0 for _ in range(len(group))]
-            continue
-
-        # Embed the full text and one-hot encode the topics to create the feature matri
-        X_emb = sbert.encode(group["full_text"].tolist())
-        topic_encoded = enc.fit_transform(group[["topic_id"]]).toarray()
-        X = np.concatenate((X_emb, topic_encoded), axis=1)
-
-        # Putting a lower and upper bound on k
-        lower_bound = 2
-        upper_bound = max(lower_bound, n_articles // 2)
-        k = range(lower_bound, upper_bound + 1)
-
-        # Perform KMeans and GMM clustering
-        inertias = []
-        for n_clusters in k: 
-            km = KMeans(n_clusters=n_clusters, random_state=42)
-            km.fit(X)
-            inertias.append(km.inertia_)
-
-        # Calculate the optimal k for KMeans and fit the model
-        optimal_k = elbow_best_k(lower_bound, inertias)
-        logger.info("Team %s week %s: n=%d optimal_k=%d", team_id, week_start, n_articles, optimal_k)   
-        km = KMeans(n_clusters=optimal_k, random_state=42)
-        km_labels = km.fit_predict(X)
-        articles.loc[group.index, "cluster_id"] = km_labels
-
-
-    for (team_id, week_start, week_end, cluster_id), group in articles.groupby(["team_id", "week_start", "week_end", "cluster_id"]):
-        
-        # build the rows to upsert in cluster
-        team_id = int(team_id) 
-        cluster_id = int(cluster_id)
-        size = int(len(group))
-
-        cluster_rows.append(
-            (team_id, week_start, week_end, cluster_id, size)
-        )
-
-
-        # --------
-        # KEYWORDS
-        # --------
-
-        # Join all the texts in the group and eliminate numbers
-        full_text = " ".join(group["full_text"].tolist())
-        doc = nlp(full_text)
-        tokens = [token.lemma_ for token in doc if not token.is_digit]
-        cleaned_text = " ".join(tokens)
-        doc = nlp(cleaned_text)
-
-        # Extract named entities of type PERSON to extract key people
-        people = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
-        people = list(set(people))  
-        cleaned_people = []
-        for person in people: 
-            cleaned_people.append(person.lower())
-
-        # Extract general keywords using KeyBERT
-        general_kws = kw_model.extract_keywords(
-            cleaned_text,
-            keyphrase_ngram_range=(1, 2), 
-            stop_words='english',
-            top_n=10
-        )
-
-        # Extract keywords related to key people using KeyBERT
-        people_kws = kw_model.extract_keywords(
-            cleaned_text, 
-            keyphrase_ngram_range=(1, 3), 
-            candidates=cleaned_people, 
-            top_n=10
-        )
-
-        # Compile a regex pattern for the team's aliases
-        alias_re = re.compile(TEAM_ALIASES.get(team_id, r"$^"), flags=re.IGNORECASE)
-        # Filter and deduplicate the keywords
-        merged_kws = general_kws + people_kws
-        final_kws = filter_and_dedup(merged_kws, alias_re)
-
-        # build the rows to upsert in keywords
-        for kw, score in final_kws: 
-            keyword_rows.append(
-                (team_id, week_start, week_end, cluster_id, kw, score)
-            )
-
-        logger.info("Team %s week %s: n_keywords=%d", team_id, week_start, len(final_kws))
-
-
-    # build the rows to upsert in topic
-    for i, row in enumerate(articles.itertuples(index=False)):
-        article_id = int(row.article_id)
-        team_id = int(row.team_id) 
-        week_start = row.week_start   
-        week_end = row.week_end
-        cluster_id = int(row.cluster_id)
-
-        topic_rows.append(
-            (team_id, week_start, week_end, article_id, cluster_id) 
-        )
-
-
-    # Write to DB in a transaction
+    # Stream the rows one team/week at a time: cluster it, extract the keywords of its clusters
+    # and send its rows, so memory holds a single team/week whatever the backlog
     try:
-        logger.info("Upserting %d clusters, %d keywords, %d topic rows",
-                    len(cluster_rows), len(keyword_rows), len(topic_rows))
-        cursor.execute("START TRANSACTION;")
-        if cluster_rows:
-            cursor.executemany(UPSERT_WEEKLY_CLUSTERS, cluster_rows)
-        if keyword_rows:
-            cursor.executemany(UPSERT_WEEKLY_KEYWORDS, keyword_rows)
-        if topic_rows:
-            cursor.executemany(UPSERT_WEEKLY_TOPICS, topic_rows)
+        for (team_id, week_start, week_end), group in iter_unlabeled_weeks(read_con):
+            team_id = int(team_id)
+            group["cluster_id"], texts = cluster_week(sbert, enc, cursor, team_id, week_start, group)
+
+            cluster_rows = []
+            keyword_rows = []
+            for cluster_id, cluster in group.groupby("cluster_id"):
+
+                # build the rows to upsert in cluster
+                cluster_id = int(cluster_id)
+                cluster_rows.append(
+                    (team_id, week_start, week_end, cluster_id, int(len(cluster)))
+                )
+
+                # --------
+                # KEYWORDS
+                # --------
+
+                # Join all the texts in the group (near-duplicates only once)
+                originals = [int(i) for i in cluster["original_id"].unique()]
+                texts.update(load_bodies(cursor, [i for i in originals if i not in texts]))
+                final_kws = extract_keywords(nlp, kw_model, team_id, " ".join(texts.get(i, "") for i in originals))
+
+                # build the rows to upsert in keywords
+                for kw, score in final_kws: 
+                    keyword_rows.append(
+                        (team_id, week_start, week_end, cluster_id, kw, score)
+                    )
+
+                logger.info("Team %s week %s: n_keywords=%d", team_id, week_start, len(final_kws))
+
+            # build the rows to upsert in topic
+            topic_rows = [(team_id, week_start, week_end, int(row.article_id), int(row.cluster_id))
+                          for row in group.itertuples(index=False)]
+
+            # The connection is not in autocommit mode, the upserts run in one transaction until the commit
+            cursor.executemany(upsert_weekly_clusters(dialect), cluster_rows)
+            if keyword_rows:
+                cursor.executemany(upsert_weekly_keywords(dialect), keyword_rows)
+            cursor.executemany(upsert_weekly_topics(dialect), topic_rows)
+            n_weeks += 1
+            n_clusters += len(cluster_rows)
+            n_keywords += len(keyword_rows)
+            n_topics += len(topic_rows)
+
+        if n_weeks == 0:
+            logger.info("No articles to classify. Exiting.")
+            return
         con.commit()
-        logger.info("DB commit successful.")
+        logger.info("Upserted %d clusters, %d keywords, %d topic rows over %d team/weeks. DB commit successful.",
+                    n_clusters, n_keywords, n_topics, n_weeks)
     except Exception as e:
         con.rollback()
         logger.exception("DB write error, rolled back: %s", e)
@@ -332,6 +320,8 @@ def main():
     finally:
         cursor.close()
         con.close()
+        read_con.close()
+        sbert.close()
 
 
 
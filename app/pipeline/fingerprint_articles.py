@@ -0,0 +1,109 @@
+# Purpose:
+#  - Compute the MinHash signature of the articles that have a text but no signature (stored before
+#    fingerprinting, or re-parsed).
+#  - Index them in the article_lsh band table.
+#  - Link every near-duplicate to its original article (articles.duplicate_of), so the
+#    embedding, classification and clustering stages can reuse the original's results.
+# New articles are fingerprinted by the scraper's loader; this script is the backfill.
+
+import logging
+import sys
+from pathlib import Path
+project_root = Path(__file__).resolve().parents[2]
+sys.path.append(str(project_root))
+from app.bodies import load_bodies
+from app.db import pooled_conn
+from app.dialects import dialect_of
+from app.embeddings import EMPTY_HASH
+from app.fingerprint import LSHIndex, assign_duplicates, band_keys, from_bytes, minhash, to_bytes
+
+# Logging setup (helps debugging)
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Articles fingerprinted and committed at once
+BATCH_SIZE = 500
+
+
+def load_candidates(cursor, signatures) -> LSHIndex:
+    """
+    Builds the in-memory LSH index of the fingerprinted articles sharing a bucket with a batch,
+    in one query on the article_lsh band table (the other articles cannot be its near-duplicates).
+    Args:
+        cursor: A database cursor.
+        signatures (dict): Article ID -> signature (or None) of the batch.
+    Returns:
+        LSHIndex: The stored articles that may be duplicated by the batch.
+    """
+    index = LSHIndex()
+    pairs = sorted({(band, bucket) for signature in signatures.values() if signature is not None
+                    for band, bucket in enumerate(band_keys(signature))})
+    if not pairs:
+        return index
+    cursor.execute("SELECT DISTINCT a.id, a.minhash, a.duplicate_of FROM article_lsh l "
+                   "JOIN articles a ON a.id = l.article_id "
+                   f"WHERE {dialect_of(cursor).tuple_in(['l.band', 'l.bucket'], len(pairs))}",
+                   [value for pair in pairs for value in pair])
+    for row in cursor.fetchall():
+        if row["id"] not in signatures and row["minhash"] is not None:
+            index.add(row["id"], from_bytes(row["minhash"]), row["duplicate_of"])
+    return index
+
+
+def write_batch(cursor, rows, signatures, duplicate_of):
+    """Stores the signatures, band keys and originals of a batch of articles."""
+    ids = [row["id"] for row in rows]
+    # The rows exist, so on MySQL this multi-row insert only updates the two columns
+    cursor.executemany(
+        dialect_of(cursor).bulk_update("articles", "id", ["minhash", "duplicate_of"], required=["link"]),
+        [{"id": row["id"], "link": row["link"],
+          "minhash": to_bytes(signatures[row["id"]]) if signatures[row["id"]] is not None else None,
+          "duplicate_of": duplicate_of[row["id"]]} for row in rows])
+    cursor.execute(f"DELETE FROM article_lsh WHERE article_id IN ({', '.join(['%s'] * len(ids))})", ids)
+    band_rows = [(band, bucket, article_id) for article_id, signature in signatures.items() if signature is not None
+                 for band, bucket in enumerate(band_keys(signature))]
+    if band_rows:
+        cursor.executemany("INSERT INTO article_lsh (band, bucket, article_id) VALUES (%s, %s, %s)", band_rows)
+
+
+def main():
+    con = pooled_conn()
+    cursor = con.cursor()
+    try:
+        # Articles without a text keep a NULL fingerprint: they are left out, or every run would select them again
+        cursor.execute("""
+            SELECT a.id FROM articles a
+            JOIN article_bodies b ON b.article_id = a.id
+            WHERE a.minhash IS NULL AND b.text_hash <> %s
+            ORDER BY a.id
+        """, (EMPTY_HASH,))
+        pending = [row["id"] for row in cursor.fetchall()]
+        logger.info("Found %d articles to fingerprint.", len(pending))
+        if not pending:
+            return
+
+        n_duplicates = 0
+        for i in range(0, len(pending), BATCH_SIZE):
+            ids = pending[i:i + BATCH_SIZE]
+            cursor.execute(f"SELECT id, link FROM articles WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+            rows = cursor.fetchall()
+            texts = load_bodies(cursor, ids)
+            signatures = {row["id"]: minhash(texts.get(row["id"])) for row in rows}
+            # Only the stored articles sharing a bucket with the batch are read (the batches committed before included)
+            duplicate_of = assign_duplicates(load_candidates(cursor, signatures), list(signatures.items()))
+            write_batch(cursor, rows, signatures, duplicate_of)
+            con.commit()
+            n_duplicates += sum(original is not None for original in duplicate_of.values())
+
+        logger.info("Fingerprinted %d articles, %d near-duplicates.", len(pending), n_duplicates)
+    except Exception as e:
+        con.rollback()
+        logger.exception("DB write error, rolled back: %s", e)
+        raise
+    finally:
+        cursor.close()
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 from pathlib import Path
-import mysql.connector
 import pandas as pd
 import logging
 import os
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.db import get_conn
+from app.dialects import dialect_of
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,28 +21,23 @@ DB_CONFIG = {
     "port": int(os.getenv("DB_PORT", 3306)),
     "user": os.getenv("DB_USER", "appuser"),
     "password": os.getenv("DB_PASSWORD", "appuserpass"),
-    "database": os.getenv("DB_NAME", "footy_narratives"),
+    "db": os.getenv("DB_NAME", "footy_narratives"),
 }
 
-UPSERT_SQL = """
-INSERT INTO weekly_topic
-  (team_id, week_start, week_end, article_id, topic_id, topic_probability)
-VALUES (%s, %s, %s, %s, %s, %s)
-ON DUPLICATE KEY UPDATE
-  topic_id = VALUES(topic_id),
-  topic_probability = VALUES(topic_probability)
-"""
+def upsert_sql(dialect):
+    return dialect.upsert("weekly_topic",
+                          ["team_id", "week_start", "week_end", "article_id", "topic_id", "topic_probability"],
+                          keys=["team_id", "week_start", "week_end", "article_id"],
+                          update=["topic_id", "topic_probability"])
 
 def load_article_team_rows(cursor) -> pd.DataFrame:
-    query = """
+    dialect = dialect_of(cursor)
+    query = f"""
     SELECT 
         at.article_id,
         at.team_id,
-        DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY) AS week_start,
-        DATE_ADD(
-            DATE_SUB(DATE(a.publication_date), INTERVAL WEEKDAY(a.publication_date) DAY),
-            INTERVAL 6 DAY
-        ) AS week_end
+        a.week_start,
+        {dialect.add_days("a.week_start", 6)} AS week_end
     FROM article_teams at
     JOIN articles a ON a.id = at.article_id
     """
@@ -79,8 +77,8 @@ def prepare_labeled(csv_path: Path) -> pd.DataFrame:
     return df[["article_id", "team_id", "topic"]].dropna(subset=["team_id"])
 
 def main(dry_run=True):
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cursor = conn.cursor(buffered=True)
+    conn = get_conn(DB_CONFIG, ssl=False)
+    cursor = conn.cursor()
 
     try:
         article_team_df = load_article_team_rows(cursor)
@@ -123,7 +121,7 @@ def main(dry_run=True):
             logger.info("Dry run enabled. Not writing to DB.")
             return
 
-        cursor.executemany(UPSERT_SQL, upsert_rows)
+        cursor.executemany(upsert_sql(dialect_of(conn)), upsert_rows)
         conn.commit()
         logger.info("Upserted %d rows into weekly_topic", len(upsert_rows))
 
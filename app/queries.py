@@ -0,0 +1,112 @@
+# Read queries of the Streamlit app and the weekly pipelines, shared with the benchmarks
+# so they can be run on any backend. The app queries take the team name, and the week ones
+# the ISO dates of the week as well.
+
+# Articles of a team and week, with their storyline (cluster) and topic
+WEEK_DATA_QUERY = """
+SELECT wt.cluster_id, wt.topic_id, a.link, a.title, a.publication_date, o.name AS outlet_name
+FROM weekly_topic AS wt
+JOIN teams AS t ON wt.team_id = t.id
+JOIN articles AS a ON wt.article_id = a.id
+JOIN outlets AS o ON a.outlet_id = o.id
+WHERE t.name = %s
+AND wt.week_start = %s
+AND wt.week_end = %s
+"""
+
+# Number of articles per week and topic of a team
+TRENDS_QUERY = """
+SELECT wt.week_start, wt.topic_id, COUNT(*) AS cnt
+FROM weekly_topic wt
+JOIN teams t ON wt.team_id = t.id
+WHERE t.name = %s
+GROUP BY wt.week_start, wt.topic_id
+ORDER BY wt.week_start ASC;
+"""
+
+
+def cluster_keywords_query(dialect) -> str:
+    """
+    Keywords of every storyline of a team and week, as "keyword:score,keyword2:score2,..." per cluster_id,
+    the strongest first.
+    Args:
+        dialect: The SQL dialect of the backend (app/dialects.py).
+    """
+    keywords = dialect.group_concat(dialect.concat("wk.keyword", "':'", "wk.score"), order_by="ABS(wk.score) DESC")
+    return f"""
+    SELECT wk.cluster_id,
+        {keywords} AS keywords
+    FROM weekly_clusters AS wc
+    JOIN weekly_keywords AS wk ON 
+        wc.cluster_id = wk.cluster_id AND
+        wc.week_start = wk.week_start AND 
+        wc.week_end = wk.week_end AND 
+        wc.team_id = wk.team_id
+    JOIN teams AS t ON wk.team_id = t.id
+    WHERE t.name = %s
+      AND wc.week_start = %s
+      AND wc.week_end = %s
+    GROUP BY wk.cluster_id;
+    """
+
+
+def unlabeled_topics_query(dialect) -> str:
+    """
+    Article/team pairs without a topic in weekly_topic (no row, or a NULL topic_id), with the
+    (team_id, article_id, original_id, week_start, week_end) the topic classifier needs.
+    original_id is the article a near-duplicate copies, or the article itself: its text is loaded
+    afterwards from article_bodies (app/bodies.py).
+    The week comes from the stored articles.week_start, so weekly_topic is probed by its primary key.
+    Args:
+        dialect: The SQL dialect of the backend (app/dialects.py).
+    """
+    week_end = dialect.add_days("a.week_start", 6)
+    return f"""
+    SELECT
+        at.team_id,
+        a.id AS article_id,
+        COALESCE(a.duplicate_of, a.id) AS original_id,
+        a.week_start,
+        {week_end} AS week_end
+    FROM article_teams at
+    JOIN articles a ON a.id = at.article_id
+    LEFT JOIN weekly_topic wt
+        ON wt.team_id = at.team_id
+        AND wt.week_start = a.week_start
+        AND wt.week_end = {week_end}
+        AND wt.article_id = a.id
+    WHERE wt.topic_id IS NULL;
+    """
+
+
+def unclustered_query(dialect) -> str:
+    """
+    Article/team pairs of the finished weeks without a storyline in weekly_topic (no row, or a NULL
+    cluster_id), with the (team_id, article_id, original_id, week_start, week_end, topic_id) the
+    clustering needs (the texts are loaded afterwards, from article_bodies). A week is finished once
+    its Sunday is in the past, i.e. it started before the Monday of the current week: a range on
+    the articles.week_start index. The rows come sorted by week and team, so the rows of a team and
+    week are consecutive and the pipeline streams them one team/week at a time.
+    Args:
+        dialect: The SQL dialect of the backend (app/dialects.py).
+    """
+    week_end = dialect.add_days("a.week_start", 6)
+    return f"""
+    SELECT
+        at.team_id,
+        a.id AS article_id,
+        COALESCE(a.duplicate_of, a.id) AS original_id,
+        a.week_start,
+        {week_end} AS week_end,
+        wt.topic_id
+    FROM articles a
+    JOIN article_teams at ON at.article_id = a.id
+    LEFT JOIN weekly_topic wt
+        ON wt.team_id = at.team_id
+        AND wt.week_start = a.week_start
+        AND wt.week_end = {week_end}
+        AND wt.article_id = a.id
+    WHERE wt.cluster_id IS NULL
+        AND a.week_start < {dialect.week_start(dialect.current_date())}
+    ORDER BY a.week_start, at.team_id;
+    """
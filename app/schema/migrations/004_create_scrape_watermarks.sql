@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS `scrape_watermarks`(
+    `outlet_id` INTEGER PRIMARY KEY,
+    `last_published` DATETIME NOT NULL,
+    `updated_at` DATETIME NOT NULL,
+    FOREIGN KEY (`outlet_id`) REFERENCES `outlets`(`id`)
+);
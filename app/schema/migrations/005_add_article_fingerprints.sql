@@ -0,0 +1,13 @@
+ALTER TABLE `articles`
+    ADD COLUMN `minhash` VARBINARY(256) NULL,
+    ADD COLUMN `duplicate_of` INTEGER NULL,
+    ADD FOREIGN KEY (`duplicate_of`) REFERENCES `articles`(`id`) ON DELETE SET NULL;
+
+CREATE TABLE IF NOT EXISTS `article_lsh`(
+    `band` TINYINT UNSIGNED NOT NULL,
+    `bucket` INT UNSIGNED NOT NULL,
+    `article_id` INTEGER NOT NULL,
+    PRIMARY KEY (`band`, `bucket`, `article_id`),
+    KEY (`article_id`),
+    FOREIGN KEY (`article_id`) REFERENCES `articles`(`id`) ON DELETE CASCADE
+);
@@ -0,0 +1,5 @@
+ALTER TABLE `articles`
+    ADD COLUMN `week_start` DATE AS (DATE_SUB(DATE(`publication_date`), INTERVAL WEEKDAY(`publication_date`) DAY)) STORED,
+    ADD KEY `articles_week_start` (`week_start`);
+
+CREATE INDEX `weekly_topic_team_week_topic` ON `weekly_topic` (`team_id`, `week_start`, `topic_id`);
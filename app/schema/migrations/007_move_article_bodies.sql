@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS `article_bodies`(
+    `article_id` INTEGER PRIMARY KEY,
+    `body` LONGBLOB NOT NULL,
+    FOREIGN KEY (`article_id`) REFERENCES `articles`(`id`) ON DELETE CASCADE
+);
+
+INSERT INTO `article_bodies` (`article_id`, `body`)
+SELECT `id`, COMPRESS(`full_text`) FROM `articles` WHERE `full_text` IS NOT NULL;
+
+ALTER TABLE `articles` DROP COLUMN `full_text`;
@@ -0,0 +1,13 @@
+ALTER TABLE `article_bodies` ADD COLUMN `text_hash` BINARY(20) NULL;
+
+UPDATE `article_bodies` SET `text_hash` = UNHEX(SHA1(UNCOMPRESS(`body`)));
+
+CREATE TABLE IF NOT EXISTS `article_embeddings`(
+    `article_id` INTEGER NOT NULL,
+    `model` VARCHAR(100) NOT NULL,
+    `text_hash` BINARY(20) NOT NULL,
+    `dtype` VARCHAR(8) NOT NULL,
+    `vector` BLOB NOT NULL,
+    PRIMARY KEY (`article_id`, `model`),
+    FOREIGN KEY (`article_id`) REFERENCES `articles`(`id`) ON DELETE CASCADE
+);
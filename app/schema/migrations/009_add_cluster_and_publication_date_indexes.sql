@@ -0,0 +1,3 @@
+CREATE INDEX `weekly_topic_cluster` ON `weekly_topic` (`cluster_id`);
+
+CREATE INDEX `articles_publication_date` ON `articles` (`publication_date`);
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 # app/schema/run_migrations.py
 import os
+import sys
 from pathlib import Path
-import mysql.connector
 from datetime import datetime
 import logging
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from app.db import DB_BACKEND, get_conn
+from app.sqlite_backend import SCHEMA_PATH as SQLITE_SCHEMA_PATH
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,7 +18,7 @@ DB_CONFIG = {
     "port": int(os.getenv("DB_PORT", 3306)),
     "user": os.getenv("DB_USER", "appuser"),
     "password": os.getenv("DB_PASSWORD", "appuserpass"),
-    "database": os.getenv("DB_NAME", "footy_narratives"),
+    "db": os.getenv("DB_NAME", "footy_narratives"),
 }
 
 MIGRATIONS_DIR = Path(__file__).resolve().parents[0] / "migrations"
@@ -35,7 +38,7 @@ def ensure_schema_migrations(cursor):
 
 def applied_files(cursor):
     cursor.execute("SELECT filename FROM schema_migrations")
-    return {r[0] for r in cursor.fetchall()}
+    return {r["filename"] for r in cursor.fetchall()}
 
 def apply_migration(cursor, sql_text, filename):
     # Remove comments and split on semicolon
@@ -49,7 +52,13 @@ def apply_migration(cursor, sql_text, filename):
     print(f"Applied migration: {filename}")
 
 def main():
-    conn = mysql.connector.connect(**DB_CONFIG)
+    # The SQLite backend has no migrations, its schema file is created when the database is opened
+    if DB_BACKEND == "sqlite":
+        get_conn().close()
+        logger.info("SQLite schema up to date (%s).", SQLITE_SCHEMA_PATH.name)
+        return
+
+    conn = get_conn(DB_CONFIG, ssl=False)
     cursor = conn.cursor()
     ensure_schema_migrations(cursor)
     conn.commit()
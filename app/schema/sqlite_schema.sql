@@ -0,0 +1,118 @@
+-- Schema of the embedded SQLite backend (app/sqlite_backend.py): base_schema.sql with every
+-- migration applied, in SQLite syntax. Keep it in step with the migrations.
+-- It is only applied to new databases: delete a local database file to re-create it after a change.
+
+CREATE TABLE IF NOT EXISTS outlets (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE CHECK (name IN ('SkySports', 'BBC', 'TheGuardian'))
+);
+
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE CHECK (name IN ('Manchester United', 'Manchester City', 'Liverpool', 'Chelsea', 'Tottenham Hotspur', 'Arsenal'))
+);
+
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    link VARCHAR(512) NOT NULL UNIQUE,
+    title TEXT,
+    summary TEXT,
+    publication_date DATETIME,
+    outlet_id INTEGER REFERENCES outlets (id),
+    author_id INTEGER NULL REFERENCES authors (id) ON DELETE SET NULL,
+    -- 005_add_article_fingerprints.sql
+    minhash BLOB NULL,
+    duplicate_of INTEGER NULL REFERENCES articles (id) ON DELETE SET NULL,
+    -- 006_add_article_week_start.sql: Monday of the publication week
+    week_start DATE GENERATED ALWAYS AS (date(publication_date, 'weekday 0', '-6 days')) STORED
+);
+
+CREATE TABLE IF NOT EXISTS article_teams (
+    article_id INTEGER REFERENCES articles (id),
+    team_id INTEGER REFERENCES teams (id),
+    PRIMARY KEY (article_id, team_id)
+);
+
+-- 001_create_weekly_topics.sql
+CREATE TABLE IF NOT EXISTS weekly_topic (
+    team_id INTEGER NOT NULL,
+    week_start DATE NOT NULL,
+    week_end DATE NOT NULL,
+    article_id INTEGER NOT NULL,
+    cluster_id INTEGER,
+    topic_id INTEGER,
+    topic_probability FLOAT,
+    PRIMARY KEY (team_id, week_start, week_end, article_id),
+    FOREIGN KEY (article_id, team_id) REFERENCES article_teams (article_id, team_id)
+);
+
+-- 002_create_weekly_clusters.sql
+CREATE TABLE IF NOT EXISTS weekly_clusters (
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    week_start DATE NOT NULL,
+    week_end DATE NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    size INTEGER DEFAULT 0,
+    PRIMARY KEY (team_id, week_start, week_end, cluster_id)
+);
+
+-- 003_create_weekly_keywords.sql
+CREATE TABLE IF NOT EXISTS weekly_keywords (
+    team_id INTEGER NOT NULL,
+    week_start DATE NOT NULL,
+    week_end DATE NOT NULL,
+    cluster_id INTEGER NOT NULL,
+    keyword VARCHAR(255) NOT NULL,
+    score FLOAT NOT NULL,
+    PRIMARY KEY (team_id, week_start, week_end, cluster_id, keyword),
+    FOREIGN KEY (team_id, week_start, week_end, cluster_id)
+        REFERENCES weekly_clusters (team_id, week_start, week_end, cluster_id)
+        ON DELETE CASCADE
+);
+
+-- 004_create_scrape_watermarks.sql
+CREATE TABLE IF NOT EXISTS scrape_watermarks (
+    outlet_id INTEGER PRIMARY KEY REFERENCES outlets (id),
+    last_published DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+);
+
+-- 005_add_article_fingerprints.sql
+CREATE TABLE IF NOT EXISTS article_lsh (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, article_id)
+);
+CREATE INDEX IF NOT EXISTS article_lsh_article_id ON article_lsh (article_id);
+
+-- 006_add_article_week_start.sql
+CREATE INDEX IF NOT EXISTS articles_week_start ON articles (week_start);
+CREATE INDEX IF NOT EXISTS weekly_topic_team_week_topic ON weekly_topic (team_id, week_start, topic_id);
+
+-- 007_move_article_bodies.sql: zlib-compressed article texts (app/bodies.py)
+CREATE TABLE IF NOT EXISTS article_bodies (
+    article_id INTEGER PRIMARY KEY REFERENCES articles (id) ON DELETE CASCADE,
+    body BLOB NOT NULL,
+    -- 008: SHA-1 of the text
+    text_hash BLOB
+);
+
+-- 008_create_article_embeddings.sql: the embedding store (app/embeddings.py)
+CREATE TABLE IF NOT EXISTS article_embeddings (
+    article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+    model VARCHAR(100) NOT NULL,
+    text_hash BLOB NOT NULL,
+    dtype VARCHAR(8) NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (article_id, model)
+);
+
+-- 009_add_cluster_and_publication_date_indexes.sql
+CREATE INDEX IF NOT EXISTS weekly_topic_cluster ON weekly_topic (cluster_id);
+CREATE INDEX IF NOT EXISTS articles_publication_date ON articles (publication_date);
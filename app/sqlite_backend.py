@@ -0,0 +1,178 @@
+# Embedded SQLite backend, for local runs and benchmarks without a database server.
+# Connections behave like the PyMySQL connections of app/db.py: dict rows, pyformat
+# placeholders (%s and %(name)s), cursor(), commit(), rollback(), ping() and close().
+# The schema (app/schema/sqlite_schema.sql) is created the first time a database is opened.
+
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from app.dialects import SQLITE
+
+SCHEMA_PATH = Path(__file__).resolve().parent / "schema" / "sqlite_schema.sql"
+# Bit PyMySQL reports in server_status while a transaction is open (the pool rolls such connections back)
+SERVER_STATUS_IN_TRANS = 1
+
+# Placeholders as PyMySQL reads them: %s, %(name)s and %% (a literal percent sign)
+_PARAM_RE = re.compile(r"%\((\w+)\)s|%s|%%")
+
+# Dates are stored as ISO text, and read back as date/datetime from DATE/DATETIME columns
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _to_qmark(query) -> str:
+    def replace(match):
+        if match.group(1):
+            return ":" + match.group(1)
+        return "?" if match.group(0) == "%s" else "%"
+    return _PARAM_RE.sub(replace, query)
+
+
+def _dict_row(cursor, row) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class _GroupConcatOrdered:
+    """group_concat(value, sort_key, descending, separator) with a defined order (native from SQLite 3.44)."""
+
+    def __init__(self):
+        self.items = []
+        self.descending = False
+        self.separator = ","
+
+    def step(self, value, key, descending, separator):
+        if value is not None:
+            self.items.append((key, value))
+        self.descending = bool(descending)
+        self.separator = separator
+
+    def finalize(self):
+        if not self.items:
+            return None
+        self.items.sort(key=lambda item: item[0], reverse=self.descending)
+        return self.separator.join(str(value) for _, value in self.items)
+
+
+class SQLiteCursor:
+    """Cursor with the PyMySQL calling conventions over a sqlite3 cursor."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._conn.cursor()
+
+    def execute(self, query, args=None):
+        # Like PyMySQL, placeholders are only interpreted when arguments are given
+        if args is None:
+            return self._cursor.execute(query)
+        return self._cursor.execute(_to_qmark(query), args)
+
+    def executemany(self, query, rows):
+        return self._cursor.executemany(_to_qmark(query), rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection with the interface of a PyMySQL connection with a DictCursor."""
+    dialect = SQLITE
+
+    def __init__(self, path):
+        self.path = str(path)
+        # Shared between the threads of the pool, like a PyMySQL connection (one user at a time)
+        self._conn = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        self._conn.row_factory = _dict_row
+        self._conn.create_aggregate("group_concat_ordered", 4, _GroupConcatOrdered)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            # Readers (the app) do not block the writer (the scraper)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+
+    @property
+    def open(self) -> bool:
+        return self._conn is not None
+
+    @property
+    def server_status(self) -> int:
+        return SERVER_STATUS_IN_TRANS if self._conn.in_transaction else 0
+
+    def cursor(self) -> SQLiteCursor:
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        # Nothing can drop an embedded database
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("connection closed")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sqlite_connect(path) -> SQLiteConnection:
+    """
+    Opens a SQLite database, creating its schema the first time it is opened in the process.
+    Args:
+        path (str | Path): The database file, or ":memory:".
+    Returns:
+        SQLiteConnection: A connection with dict rows and pyformat placeholders.
+    """
+    if path != ":memory:":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = SQLiteConnection(path)
+    with _init_lock:
+        # Every :memory: connection is a new database
+        if path == ":memory:" or str(path) not in _initialized:
+            conn._conn.executescript(SCHEMA_PATH.read_text(encoding="utf-8"))
+            _initialized.add(str(path))
+    return conn
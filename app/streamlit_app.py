@@ -3,7 +3,8 @@ from pathlib import Path
 import pandas as pd
 import datetime
 import altair as alt
-from db import get_conn
+from db import get_dialect, pooled_conn
+from queries import TRENDS_QUERY, WEEK_DATA_QUERY, cluster_keywords_query
 
 # ---- CONFIG ----
 st.set_page_config(page_title="⚽ Footy Narratives", layout="wide", initial_sidebar_state="expanded")
@@ -98,10 +99,11 @@ st.divider()
 # ---- DB: connection and query helper ----
 def fetch_df(query: str, params: tuple = None) -> pd.DataFrame:
     """
-    Execute a read-only query and return a DataFrame. Always closes connection/cursor.
+    Execute a read-only query and return a DataFrame. The connection is borrowed
+    from the process-wide pool (shared by every session), so a page load does not
+    pay a new TLS handshake per query; it goes back to the pool when done.
     """
-    conn = get_conn()
-    try:
+    with pooled_conn() as conn:
         cur = conn.cursor()
         cur.execute(query, params or ())
         rows = cur.fetchall()
@@ -109,28 +111,13 @@ def fetch_df(query: str, params: tuple = None) -> pd.DataFrame:
         df = pd.DataFrame(rows, columns=columns)
         cur.close()
         return df
-    finally:
-        try:
-            conn.close()
-        except Exception:
-            pass
 
 
 # ---- QUERY: articles + cluster keywords + trends ----
 @st.cache_data(show_spinner=False)  # cache data for performance
 def load_week_data(team_name: str, week_start_iso: str, week_end_iso: str):
-    query = """
-    SELECT wt.cluster_id, wt.topic_id, a.link, a.title, a.publication_date, o.name AS outlet_name
-    FROM weekly_topic AS wt
-    JOIN teams AS t ON wt.team_id = t.id
-    JOIN articles AS a ON wt.article_id = a.id
-    JOIN outlets AS o ON a.outlet_id = o.id
-    WHERE t.name = %s
-    AND wt.week_start = %s
-    AND wt.week_end = %s
-    """
     params = (team_name, week_start_iso, week_end_iso)
-    df = fetch_df(query, params)
+    df = fetch_df(WEEK_DATA_QUERY, params)
     # ensure datetimes
     if not df.empty:
         df["publication_date"] = pd.to_datetime(df["publication_date"]).dt.date
@@ -140,21 +127,7 @@ def load_week_data(team_name: str, week_start_iso: str, week_end_iso: str):
 @st.cache_data(show_spinner=False)  # cache keywords loading
 def load_cluster_keywords(team_name: str, week_start_iso: str, week_end_iso: str):
     # The query returns keywords as "keyword:score,keyword2:score2,..." per cluster_id
-    q = """
-    SELECT wk.cluster_id,
-        GROUP_CONCAT(CONCAT(wk.keyword, ':', wk.score) ORDER BY ABS(wk.score) DESC SEPARATOR ',') AS keywords
-    FROM weekly_clusters AS wc
-    JOIN weekly_keywords AS wk ON 
-        wc.cluster_id = wk.cluster_id AND
-        wc.week_start = wk.week_start AND 
-        wc.week_end = wk.week_end AND 
-        wc.team_id = wk.team_id
-    JOIN teams AS t ON wk.team_id = t.id
-    WHERE t.name = %s
-      AND wc.week_start = %s
-      AND wc.week_end = %s
-    GROUP BY wk.cluster_id;
-    """
+    q = cluster_keywords_query(get_dialect())
     params = (team_name, week_start_iso, week_end_iso)
     try:
         df = fetch_df(q, params)
@@ -165,16 +138,8 @@ def load_cluster_keywords(team_name: str, week_start_iso: str, week_end_iso: str
 
 @st.cache_data(show_spinner=False)
 def load_trends(team_name: str):
-    q = """
-    SELECT wt.week_start, wt.topic_id, COUNT(*) AS cnt
-    FROM weekly_topic wt
-    JOIN teams t ON wt.team_id = t.id
-    WHERE t.name = %s
-    GROUP BY wt.week_start, wt.topic_id
-    ORDER BY wt.week_start ASC;
-    """
     params = (team_name,)
-    df_tr = fetch_df(q, params)
+    df_tr = fetch_df(TRENDS_QUERY, params)
 
     if df_tr.empty:
         return df_tr
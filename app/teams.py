@@ -0,0 +1,127 @@
+# Team registry shared by the scrapers, the ML pipelines and the notebooks.
+#  - TEAM_IDS: database ID of every tracked team.
+#  - HEADLINE_ALIASES: names used to tag feed entries (title + summary) with teams.
+#  - FULL_TEXT_ALIASES: wider alias set (stadiums, managers, short names) used to count mentions in article bodies.
+#  - TeamMatcher: finds every team and its mention count in a single scan of the text.
+
+import re
+
+# Database IDs of the tracked teams
+TEAM_IDS = {"Arsenal": 1,
+            "Chelsea": 2,
+            "Liverpool": 3,
+            "Manchester City": 4,
+            "Manchester United": 5,
+            "Tottenham Hotspur": 6}
+TEAM_NAMES = {team_id: team for team, team_id in TEAM_IDS.items()}
+
+# Aliases matched in the feed titles and summaries (the order is the order teams are reported in)
+HEADLINE_ALIASES = {"Arsenal": ["Arsenal", "Gunners"],
+                    "Chelsea": ["Chelsea", "Blues"],
+                    "Manchester United": ["Manchester United", "Man Utd", "Red Devils", "Man United"],
+                    "Liverpool": ["Liverpool", "Reds"],
+                    "Manchester City": ["Manchester City", "Man City"],
+                    "Tottenham Hotspur": ["Tottenham Hotspur", "Spurs", "Tottenham"]}
+
+# Aliases counted in the full article text
+FULL_TEXT_ALIASES = {"Arsenal": ["Arsenal", "Gunners", "Emirates"],
+                     "Chelsea": ["Chelsea", "Blues", "Stamford Bridge"],
+                     "Manchester United": ["Manchester United", "Man Utd", "Red Devils", "Man United", "Old Trafford", "United"],
+                     "Liverpool": ["Liverpool", "Reds", "Anfield"],
+                     "Manchester City": ["Manchester City", "Man City", "Citizens", "Etihad", "Guardiola", "City"],
+                     "Tottenham Hotspur": ["Tottenham Hotspur", "Spurs", "Tottenham", "White Hart Lane"]}
+
+
+def _trie_regex(words) -> str:
+    """
+    Builds a regex alternation of the words factored as a prefix trie,
+    so the regex engine tests each position of the text once instead of once per alias.
+    Args:
+        words (iterable): The lowercase words to match.
+    Returns:
+        str: The regex pattern (without word boundaries).
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ends here: the rest of the branch is optional (greedy, so the longest alias wins)
+        if "" in node:
+            pattern = "(?:" + pattern + ")?" if len(branches) == 1 else pattern + "?"
+        return pattern
+
+    return build(trie)
+
+
+class TeamMatcher:
+    """
+    Precompiled matcher that finds every team mentioned in a text in a single scan.
+    All the aliases of all the teams are combined into one trie regex, run over the
+    lowercased text (faster than a case-insensitive regex), so adding teams or aliases
+    does not add scans of the text.
+    """
+
+    def __init__(self, aliases):
+        """
+        Args:
+            aliases (dict): Team name -> list of aliases. The dict order is the order teams are reported in.
+        """
+        self.teams = list(aliases)
+        self._order = {team: i for i, team in enumerate(self.teams)}
+        self._alias_to_team = {}
+        for team, team_aliases in aliases.items():
+            for alias in team_aliases:
+                self._alias_to_team[alias.lower()] = team
+        self.pattern = re.compile(r"\b" + _trie_regex(self._alias_to_team) + r"\b")
+
+    def count_mentions(self, text) -> dict:
+        """
+        Counts the mentions of every team in the text.
+        Args:
+            text (str): The text to scan.
+        Returns:
+            dict: Team name -> number of mentions, for the teams mentioned at least once.
+        """
+        counts = {}
+        for match in self.pattern.findall(text.lower()):
+            team = self._alias_to_team[match]
+            counts[team] = counts.get(team, 0) + 1
+        return counts
+
+    def find_teams(self, text) -> list:
+        """
+        Returns the teams mentioned in the text, in registry order.
+        Args:
+            text (str): The text to scan.
+        Returns:
+            list: The names of the teams mentioned at least once.
+        """
+        found = {self._alias_to_team[match] for match in self.pattern.findall(text.lower())}
+        return sorted(found, key=self._order.get)
+
+    def alias_pattern(self, team) -> re.Pattern:
+        """
+        Returns a compiled pattern matching any alias of a single team.
+        Args:
+            team (str): The team name.
+        Returns:
+            re.Pattern: Case-insensitive pattern with word boundaries.
+        """
+        team_aliases = [alias for alias, name in self._alias_to_team.items() if name == team]
+        # Unknown teams get a pattern that never matches
+        if not team_aliases:
+            return re.compile(r"$^")
+        return re.compile(r"\b" + _trie_regex(team_aliases) + r"\b", re.IGNORECASE)
+
+
+# Shared matchers, compiled once per process
+HEADLINE_MATCHER = TeamMatcher(HEADLINE_ALIASES)
+FULL_TEXT_MATCHER = TeamMatcher(FULL_TEXT_ALIASES)
@@ -0,0 +1,190 @@
+# Benchmark: storage and query latency with the article texts inline in articles (before
+# migration 007) and compressed in the article_bodies side table (after).
+# Builds the same synthetic articles twice on the embedded SQLite backend, with one weekly_topic row
+# each, and reports the bytes of every table and the median latency of:
+#  - app week: the articles of a team and week (load_week_data of the Streamlit app)
+#  - classify fetch: the pipeline query walking every article/team pair (app/queries.py)
+#  - body batch: the texts of BATCH articles, as a pipeline batch needs them (app/bodies.load_bodies)
+# A small page cache (--cache-mb) stands in for a buffer pool smaller than the table.
+# The synthetic texts draw from a small vocabulary, so they compress better than real prose:
+# the compression ratio of real articles is printed when recorded fixtures are given (--fixtures).
+#
+# Usage: python benchmarks/bench_article_bodies.py [--articles 50000] [--cache-mb 8] [--fixtures DIR]
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from app.bodies import COMPRESSION_LEVEL, body_row, body_upsert_sql, compress_body, load_bodies
+from app.dialects import SQLITE
+from app.queries import WEEK_DATA_QUERY, unlabeled_topics_query
+from app.sqlite_backend import SCHEMA_PATH, SQLiteConnection
+from app.teams import TEAM_IDS
+from synthetic import _sentence
+
+# Weeks of articles in the synthetic database
+WEEKS = 150
+# Paragraphs of a synthetic article (about 4.5 KB, the length of a long match report)
+PARAGRAPHS = 40
+# Texts loaded per pipeline batch (the BATCH_SIZE of classify_topics.py)
+BATCH = 256
+TEAM = "Arsenal"
+
+
+def inline_schema() -> str:
+    """The SQLite schema with the text inline in articles, at the place of full_text before migration 007."""
+    schema = SCHEMA_PATH.read_text(encoding="utf-8")
+    return schema.replace("    author_id INTEGER NULL REFERENCES authors (id) ON DELETE SET NULL,\n",
+                          "    author_id INTEGER NULL REFERENCES authors (id) ON DELETE SET NULL,\n    full_text TEXT,\n")
+
+
+def build(path, texts, inline):
+    """Fills a new database with one article per text, about one team each, all of them classified."""
+    conn = SQLiteConnection(path)
+    conn._conn.executescript(inline_schema() if inline else SCHEMA_PATH.read_text(encoding="utf-8"))
+    cur = conn.cursor()
+    now = datetime(2025, 8, 1)
+    span = timedelta(weeks=WEEKS)
+    team_ids = sorted(TEAM_IDS.values())
+    cur.executemany("INSERT INTO outlets (id, name) VALUES (%s, %s)", [(1, "BBC"), (2, "TheGuardian"), (3, "SkySports")])
+    cur.executemany("INSERT INTO teams (id, name) VALUES (%s, %s)", [(team_id, team) for team, team_id in TEAM_IDS.items()])
+    n = len(texts)
+    rows = [(i, f"https://bench.invalid/article/{i}", f"Article {i}", f"Summary of article {i}",
+             now - span * (i / n), 1 + i % 3) for i in range(1, n + 1)]
+    if inline:
+        cur.executemany("INSERT INTO articles (id, link, title, summary, publication_date, outlet_id, full_text) "
+                        "VALUES (%s, %s, %s, %s, %s, %s, %s)", [row + (text,) for row, text in zip(rows, texts)])
+    else:
+        cur.executemany("INSERT INTO articles (id, link, title, summary, publication_date, outlet_id) "
+                        "VALUES (%s, %s, %s, %s, %s, %s)", rows)
+        cur.executemany(body_upsert_sql(SQLITE), [body_row(i, text) for i, text in enumerate(texts, 1)])
+    cur.executemany("INSERT INTO article_teams (article_id, team_id) VALUES (%s, %s)",
+                    [(i, team_ids[i % 6]) for i in range(1, n + 1)])
+    cur.execute("""
+    INSERT INTO weekly_topic (team_id, week_start, week_end, article_id, cluster_id, topic_id, topic_probability)
+    SELECT at.team_id, a.week_start, date(a.week_start, '+6 days'), a.id, 0, a.id % 6, 0.5
+    FROM article_teams at JOIN articles a ON a.id = at.article_id
+    """)
+    conn.commit()
+    cur.execute("VACUUM")
+    cur.close()
+    return conn
+
+
+def table_bytes(conn) -> dict:
+    cur = conn.cursor()
+    cur.execute("SELECT name, SUM(pgsize) AS bytes FROM dbstat GROUP BY name")
+    sizes = {row["name"]: row["bytes"] for row in cur.fetchall()}
+    cur.close()
+    return sizes
+
+
+def timed(conn, run, repeat) -> float:
+    """Median seconds of run(cursor), each time with an empty page cache (a new connection)."""
+    times = []
+    for _ in range(repeat):
+        fresh = SQLiteConnection(conn.path)
+        cur = fresh.cursor()
+        cur.execute(f"PRAGMA cache_size = -{conn.cache_kb}")
+        start = time.perf_counter()
+        run(cur)
+        times.append(time.perf_counter() - start)
+        fresh.close()
+    return statistics.median(times)
+
+
+def fixture_ratio(directory):
+    """zlib ratio of the texts of recorded article pages (plain text of their <p> elements)."""
+    paragraphs = re.compile(r"<p[^>]*>(.*?)</p>", re.S)
+    tags = re.compile(r"<[^>]+>")
+    texts = []
+    for page in Path(directory).rglob("*.html"):
+        html = page.read_text(encoding="utf-8", errors="ignore")
+        text = "\n".join(tags.sub("", p) for p in paragraphs.findall(html))
+        if len(text) > 500:
+            texts.append(text.encode("utf-8"))
+    if not texts:
+        return None
+    return sum(map(len, texts)) / sum(len(zlib.compress(t, COMPRESSION_LEVEL)) for t in texts), len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=50_000)
+    parser.add_argument("--cache-mb", type=int, default=8, help="SQLite page cache, standing in for the buffer pool")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fixtures", help="directory of recorded article pages (benchmarks/fixtures)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = ["\n".join(_sentence(rng) for _ in range(PARAGRAPHS)) for _ in range(args.articles)]
+    raw = sum(len(t.encode("utf-8")) for t in texts)
+
+    start = time.perf_counter()
+    compressed = [compress_body(t) for t in texts[:5000]]
+    compress_s = (time.perf_counter() - start) / len(compressed)
+    print(f"texts: {raw / len(texts):.0f} B average, compress {compress_s * 1e6:.0f} us/article, "
+          f"ratio {sum(len(t.encode('utf-8')) for t in texts[:5000]) / sum(map(len, compressed)):.1f}x (synthetic)")
+    if args.fixtures:
+        result = fixture_ratio(args.fixtures)
+        print(f"recorded pages: ratio {result[0]:.1f}x over {result[1]} texts" if result else "no recorded texts found")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for layout in ("inline", "side"):
+            conn = build(Path(directory) / f"{layout}.sqlite3", texts, layout == "inline")
+            conn.cache_kb = args.cache_mb * 1024
+            sizes = table_bytes(conn)
+            cur = conn.cursor()
+            cur.execute("SELECT week_start, date(week_start, '+6 days') AS week_end FROM weekly_topic "
+                        "GROUP BY week_start ORDER BY COUNT(*) DESC LIMIT 1")
+            week = cur.fetchone()
+            cur.close()
+            params = (TEAM, week["week_start"].isoformat(), week["week_end"])
+            ids = random.Random(1).sample(range(1, args.articles + 1), BATCH)
+
+            def week_data(c):
+                c.execute(WEEK_DATA_QUERY, params)
+                c.fetchall()
+
+            def classify_fetch(c):
+                # Every pair is classified, the query walks them all and returns nothing
+                c.execute(unlabeled_topics_query(SQLITE))
+                c.fetchall()
+
+            def body_batch(c):
+                if layout == "inline":
+                    c.execute(f"SELECT id, full_text FROM articles WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+                    c.fetchall()
+                else:
+                    load_bodies(c, ids)
+
+            results[layout] = {
+                "articles MB": sizes["articles"] / 1e6,
+                "bodies MB": sizes.get("article_bodies", 0) / 1e6,
+                "app week ms": timed(conn, week_data, args.repeat) * 1000,
+                "classify fetch ms": timed(conn, classify_fetch, args.repeat) * 1000,
+                "body batch ms": timed(conn, body_batch, args.repeat) * 1000,
+            }
+            conn.close()
+
+    print(f"\n{'':<18} {'inline':>9} {'side':>9}")
+    for name in results["inline"]:
+        print(f"{name:<18} {results['inline'][name]:>9.1f} {results['side'][name]:>9.1f}")
+    total = {layout: r["articles MB"] + r["bodies MB"] for layout, r in results.items()}
+    print(f"{'total MB':<18} {total['inline']:>9.1f} {total['side']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
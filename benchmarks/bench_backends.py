@@ -0,0 +1,171 @@
+# Benchmark: the database work of a day, on the MySQL and the embedded SQLite backends.
+# Runs every statement family that differs between the dialects (app/dialects.py) on the same
+# synthetic articles: the BulkLoader (upserts, insert-or-ignore, LSH lookups, duplicate links),
+# the watermarks, the week arithmetic and upserts of the labelling pipelines, and the three
+# queries of the Streamlit app. Everything runs in one transaction that is rolled back, so the
+# MySQL database is left untouched; SQLite runs on a temporary file.
+# MySQL is the local one of docker-compose (docker compose up db).
+#
+# Usage: python benchmarks/bench_backends.py [--backends sqlite mysql] [--articles 2000]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from bench_loader import make_records
+from loader import OUTLET_IDS, BulkLoader
+from watermarks import load_watermarks, save_watermark
+sys.path.append(str(BASE_DIR))
+from app.db import get_conn
+from app.dialects import dialect_of
+from app.queries import TRENDS_QUERY, WEEK_DATA_QUERY, cluster_keywords_query
+from app.sqlite_backend import sqlite_connect
+from app.teams import TEAM_IDS
+
+# Storylines and keywords written per team and week
+CLUSTERS = 4
+KEYWORDS = 8
+
+
+def connect(backend, directory):
+    if backend == "sqlite":
+        return sqlite_connect(Path(directory) / "bench.sqlite3")
+    return get_conn({
+        "host": os.getenv("DB_HOST", "127.0.0.1"),
+        "port": int(os.getenv("DB_PORT", 3306)),
+        "user": os.getenv("DB_USER", "appuser"),
+        "password": os.getenv("DB_PASSWORD", "appuserpass"),
+        "db": os.getenv("DB_NAME", "footy_narratives"),
+    }, ssl=False)
+
+
+def label(cur, rng) -> tuple:
+    """
+    Writes a topic, a storyline and keywords for every article/team pair, like the labelling pipelines.
+    Returns:
+        tuple: Rows written to weekly_topic, and the (week_start, week_end) with most of them.
+    """
+    dialect = dialect_of(cur)
+    cur.execute(f"""
+    SELECT at.team_id, a.id AS article_id,
+        a.week_start,
+        {dialect.add_days("a.week_start", 6)} AS week_end
+    FROM article_teams at
+    JOIN articles a ON a.id = at.article_id
+    """)
+    pairs = cur.fetchall()
+    topics = [(p["team_id"], p["week_start"], p["week_end"], p["article_id"], rng.randrange(6), rng.random())
+              for p in pairs]
+    cur.executemany(dialect.upsert("weekly_topic",
+                                   ["team_id", "week_start", "week_end", "article_id", "topic_id", "topic_probability"],
+                                   keys=["team_id", "week_start", "week_end", "article_id"],
+                                   update=["topic_id", "topic_probability"]), topics)
+    cur.executemany(dialect.upsert("weekly_topic", ["team_id", "week_start", "week_end", "article_id", "cluster_id"],
+                                   keys=["team_id", "week_start", "week_end", "article_id"], update=["cluster_id"]),
+                    [(p["team_id"], p["week_start"], p["week_end"], p["article_id"], rng.randrange(CLUSTERS))
+                     for p in pairs])
+
+    weeks = {(p["team_id"], p["week_start"], p["week_end"]) for p in pairs}
+    cur.executemany(dialect.upsert("weekly_clusters", ["team_id", "week_start", "week_end", "cluster_id", "size"],
+                                   keys=["team_id", "week_start", "week_end", "cluster_id"], update=["size"]),
+                    [week + (cluster, 0) for week in sorted(weeks) for cluster in range(CLUSTERS)])
+    cur.executemany(dialect.upsert("weekly_keywords",
+                                   ["team_id", "week_start", "week_end", "cluster_id", "keyword", "score"],
+                                   keys=["team_id", "week_start", "week_end", "cluster_id", "keyword"], update=["score"]),
+                    [week + (cluster, f"keyword{k}", round(rng.uniform(-1, 1), 3))
+                     for week in sorted(weeks) for cluster in range(CLUSTERS) for k in range(KEYWORDS)])
+
+    counts = {}
+    for p in pairs:
+        counts[(p["week_start"], p["week_end"])] = counts.get((p["week_start"], p["week_end"]), 0) + 1
+    return len(topics), max(counts, key=counts.get)
+
+
+def iso(value) -> str:
+    # MySQL returns dates, SQLite the ISO text of the date() function
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def run(backend, records, team) -> dict:
+    """Runs the stages on one backend. Returns the seconds of every stage and the rows they produced."""
+    timings, rows = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        conn = connect(backend, directory)
+        cur = conn.cursor()
+        try:
+            start = time.perf_counter()
+            loader = BulkLoader(conn, OUTLET_IDS, TEAM_IDS)
+            for record in records:
+                loader.add(record)
+            loader.close()
+            timings["load"] = time.perf_counter() - start
+            cur.execute("SELECT COUNT(*) AS n FROM articles WHERE duplicate_of IS NOT NULL")
+            rows["load"] = f"{loader.loaded} articles, {cur.fetchone()['n']} duplicates"
+
+            start = time.perf_counter()
+            newest = max(r.date for r in records)
+            for outlet_id in OUTLET_IDS.values():
+                save_watermark(cur, outlet_id, newest)
+                # An older date must not move the watermark back
+                save_watermark(cur, outlet_id, datetime(2000, 1, 1))
+            watermarks = load_watermarks(cur)
+            timings["watermarks"] = time.perf_counter() - start
+            assert all(value == newest for value in watermarks.values()), watermarks
+            rows["watermarks"] = f"{len(watermarks)} outlets"
+
+            start = time.perf_counter()
+            labelled, week = label(cur, random.Random(0))
+            timings["label"] = time.perf_counter() - start
+            rows["label"] = f"{labelled} pairs"
+
+            start = time.perf_counter()
+            week = (iso(week[0]), iso(week[1]))
+            results = []
+            for query, params in ((WEEK_DATA_QUERY, (team,) + week),
+                                  (cluster_keywords_query(dialect_of(conn)), (team,) + week),
+                                  (TRENDS_QUERY, (team,))):
+                cur.execute(query, params)
+                results.append(cur.fetchall())
+            timings["app"] = time.perf_counter() - start
+            keywords = results[1][0]["keywords"].split(",") if results[1] else []
+            scores = [abs(float(keyword.rsplit(":", 1)[1])) for keyword in keywords]
+            assert scores == sorted(scores, reverse=True), keywords
+            rows["app"] = f"{len(results[0])} articles, {len(results[1])} storylines, {len(results[2])} trend rows"
+        finally:
+            conn.rollback()
+            cur.close()
+            conn.close()
+    return {"timings": timings, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "mysql"], choices=["sqlite", "mysql"])
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--team", default="Arsenal")
+    args = parser.parse_args()
+
+    records = make_records(args.articles)
+    # Republished copies of some articles under a new link, for the duplicate links
+    copies = [replace(r, link=r.link + "/copy") for r in records[::20]]
+    records = records + copies
+
+    print(f"{'backend':<7} {'stage':<11} {'s':>7}  rows")
+    for backend in args.backends:
+        result = run(backend, records, args.team)
+        for stage, seconds in result["timings"].items():
+            print(f"{backend:<7} {stage:<11} {seconds:>7.3f}  {result['rows'][stage]}")
+
+
+if __name__ == "__main__":
+    main()
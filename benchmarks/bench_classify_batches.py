@@ -0,0 +1,145 @@
+# Benchmark: throughput of the topic classification loop of classify_topics.py, in rows/s.
+#  - legacy: the loop before the batched rewrite, every pending row fetched at once, the upsert rows of
+#    every batch built by walking the whole frame (quadratic), predict and predict_proba both called,
+#    one executemany and one commit at the end.
+#  - batched: classify_pending of classify_topics.py, the rows streamed by batch, one predict_proba per
+#    batch, upsert and commit per batch (with the embeddings it stores).
+# Builds a synthetic corpus on the embedded SQLite backend (benchmarks/bench_stream_memory.py), none
+# of it classified. SBERT is replaced by random embeddings of its size and the classifier by a linear
+# softmax over them, so the numbers are the pipeline's own overhead: the real encoder adds the same
+# time per original article to both loops.
+# After the timings, a classify_pending run is interrupted halfway by its encoder and rerun, to check
+# that the rerun only classifies the rows the first run did not commit.
+#
+# Usage: python benchmarks/bench_classify_batches.py [--sizes 2500,5000,10000] [--batch 256]
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from app.bodies import load_bodies
+from app.dialects import SQLITE
+from app.pipeline.classify_topics import classify_pending, upsert_sql
+from app.queries import unlabeled_topics_query
+from app.sqlite_backend import SQLiteConnection, sqlite_connect
+from bench_stream_memory import LinearClassifier, RandomEncoder, grow, reset
+
+
+class InterruptedEncoder(RandomEncoder):
+    """RandomEncoder that fails on its call number fail_at, as a crash halfway through a run."""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.calls = 0
+        self.fail_at = fail_at
+
+    def encode(self, texts, show_progress_bar=False):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise RuntimeError("interrupted")
+        return super().encode(texts)
+
+
+def embed(cursor, batch, sbert):
+    """The embeddings of a batch, once per original article."""
+    unique = batch.drop_duplicates("original_id")
+    texts = load_bodies(cursor, unique["original_id"].tolist())
+    unique_emb = sbert.encode([texts.get(int(i), "") for i in unique["original_id"]])
+    positions = {original_id: i for i, original_id in enumerate(unique["original_id"])}
+    return unique_emb[batch["original_id"].map(positions).to_numpy()]
+
+
+def legacy(path, clf, sbert, batch_size) -> int:
+    """
+    The loop before the rewrite. It walked the whole frame for every batch and raised IndexError past
+    the batch's rows once there were more rows than a batch: the walk is kept, the rows past the batch skipped.
+    """
+    con = SQLiteConnection(path)
+    cursor = con.cursor()
+    cursor.execute(unlabeled_topics_query(SQLITE))
+    articles = pd.DataFrame(cursor.fetchall())
+    upsert_rows = []
+    for start in range(0, len(articles), batch_size):
+        batch = articles.iloc[start:start + batch_size]
+        emb = embed(cursor, batch, sbert)
+        topic_preds = clf.predict(emb)
+        topic_probs = clf.predict_proba(emb)
+        for i, row in enumerate(articles.itertuples(index=False)):
+            if i < len(batch):
+                upsert_rows.append((int(row.team_id), row.week_start, row.week_end, int(row.article_id),
+                                    int(topic_preds[i]), float(np.max(topic_probs[i,]))))
+    cursor.executemany(upsert_sql(SQLITE), upsert_rows)
+    con.commit()
+    con.close()
+    return len(upsert_rows)
+
+
+def batched(path, clf, sbert, batch_size) -> int:
+    """The loop of classify_topics.py."""
+    read_con = SQLiteConnection(path)
+    con = SQLiteConnection(path)
+    n = classify_pending(clf, sbert, read_con, con, batch_size)
+    con.close()
+    read_con.close()
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="2500,5000,10000", help="corpus sizes, in articles")
+    parser.add_argument("--batch", type=int, default=256, help="rows per batch (BATCH_SIZE of classify_topics.py)")
+    args = parser.parse_args()
+    # The pipeline logs every committed batch, and the interruption
+    logging.disable(logging.CRITICAL)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    clf = LinearClassifier()
+
+    print(f"{'articles':>8} {'rows':>6} {'legacy rows/s':>14} {'batched rows/s':>15} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.sqlite3"
+        conn = sqlite_connect(path)
+        built = 0
+        for size in sizes:
+            grow(conn, built, size)
+            built = size
+            results = {}
+            for name, run in (("legacy", legacy), ("batched", batched)):
+                reset(path)
+                start = time.perf_counter()
+                rows = run(path, clf, RandomEncoder(), args.batch)
+                results[name] = rows / (time.perf_counter() - start)
+            print(f"{size:>8} {rows:>6} {results['legacy']:>14.0f} {results['batched']:>15.0f} "
+                  f"{results['batched'] / results['legacy']:>7.1f}x")
+
+        # A run stopped halfway keeps its committed batches, the rerun does the rest
+        reset(path)
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM article_teams")
+        total = cur.fetchone()["n"]
+        half = total // args.batch // 2
+        try:
+            batched(path, clf, InterruptedEncoder(fail_at=half + 1), args.batch)
+        except RuntimeError:
+            pass
+        cur.execute("SELECT COUNT(*) AS n FROM weekly_topic")
+        first = cur.fetchone()["n"]
+        second = batched(path, clf, RandomEncoder(), args.batch)
+        cur.execute("SELECT COUNT(*) AS n FROM weekly_topic")
+        print(f"\ninterrupted halfway: {first} rows committed, rerun classified {second}, "
+              f"{cur.fetchone()['n']} of {total} rows done")
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# Benchmark: data load latency of a Streamlit page, with and without the connection pool.
+# A page load runs the three queries of app/streamlit_app.py (week articles, cluster keywords,
+# topic trends). "fresh" opens and closes a connection per query, as fetch_df used to;
+# "pooled" borrows them from app.db.ConnectionPool. Needs the local MySQL of docker-compose
+# (docker compose up db). Connections use TLS like production (--no-ssl to disable).
+# Reports p50/p95 per page load and connections opened; the remote estimate adds the given
+# round-trip time per query and HANDSHAKE_RTTS per new connection (TCP, TLS, authentication).
+# With --sessions N, N threads load pages at the same time, like concurrent app users.
+#
+# Usage: python benchmarks/bench_db_pool.py [--pages 100] [--sessions 1 4] [--rtt-ms 25]
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+import pymysql
+from app.db import ConnectionPool
+from app.dialects import MYSQL
+from app.queries import TRENDS_QUERY, WEEK_DATA_QUERY, cluster_keywords_query
+
+# Round trips to open a connection: TCP, TLS handshake (2 with TLS 1.2), greeting and authentication
+HANDSHAKE_RTTS = 4
+TEAM = "Arsenal"
+
+
+def make_connect(ssl):
+    def connect():
+        return pymysql.connect(
+            host=os.getenv("DB_HOST", "127.0.0.1"),
+            port=int(os.getenv("DB_PORT", 3306)),
+            user=os.getenv("DB_USER", "appuser"),
+            password=os.getenv("DB_PASSWORD", "appuserpass"),
+            db=os.getenv("DB_NAME", "footy_narratives"),
+            charset="utf8mb4",
+            cursorclass=pymysql.cursors.DictCursor,
+            ssl={"ssl": {}} if ssl else None,
+        )
+    return connect
+
+
+def latest_week(connect) -> tuple:
+    """Returns the most recent (week_start, week_end) in weekly_topic, or a fixed week if it is empty."""
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT week_start, week_end FROM weekly_topic ORDER BY week_start DESC LIMIT 1")
+            row = cur.fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return ("2025-08-11", "2025-08-17")
+    return (row["week_start"].isoformat(), row["week_end"].isoformat())
+
+
+def page_queries(week) -> list:
+    # The queries of a page load, as sent by app/streamlit_app.py
+    return [(WEEK_DATA_QUERY, (TEAM,) + week), (cluster_keywords_query(MYSQL), (TEAM,) + week), (TRENDS_QUERY, (TEAM,))]
+
+
+def run_query(conn, query, params):
+    cur = conn.cursor()
+    cur.execute(query, params)
+    cur.fetchall()
+    cur.close()
+
+
+def load_page_fresh(connect, queries):
+    for query, params in queries:
+        conn = connect()
+        try:
+            run_query(conn, query, params)
+        finally:
+            conn.close()
+
+
+def load_page_pooled(pool, queries):
+    for query, params in queries:
+        with pool.acquire() as conn:
+            run_query(conn, query, params)
+
+
+def run(mode, connect, queries, pages, sessions) -> dict:
+    """Loads the page `pages` times in each of `sessions` threads. Returns the latencies and connections opened."""
+    pool = ConnectionPool(connect=connect, max_size=max(5, sessions))
+    latencies = []
+    lock = threading.Lock()
+
+    def session():
+        for _ in range(pages):
+            start = time.perf_counter()
+            if mode == "fresh":
+                load_page_fresh(connect, queries)
+            else:
+                load_page_pooled(pool, queries)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    pool.close()
+
+    # Without the pool every query opens its own connection
+    opened = len(latencies) * len(queries) if mode == "fresh" else pool.opened
+    latencies.sort()
+    return {"p50": statistics.median(latencies), "p95": latencies[int(0.95 * (len(latencies) - 1))],
+            "pages_per_s": len(latencies) / elapsed, "opened": opened, "pages": len(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100, help="page loads per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--rtt-ms", type=float, default=25, help="round trip to the hosted database, for the estimate")
+    parser.add_argument("--no-ssl", action="store_true", help="connect without TLS")
+    args = parser.parse_args()
+
+    connect = make_connect(not args.no_ssl)
+    queries = page_queries(latest_week(connect))
+    rtt = args.rtt_ms / 1000
+
+    print(f"{'sessions':>8} {'mode':<7} {'p50 ms':>7} {'p95 ms':>7} {'pages/s':>8} {'connects':>8} {'remote est ms':>13}")
+    for sessions in args.sessions:
+        for mode in ("fresh", "pooled"):
+            result = run(mode, connect, queries, args.pages, sessions)
+            # Round trips of an average page load on the hosted database
+            connects_per_page = result["opened"] / result["pages"]
+            remote = result["p50"] + (len(queries) + connects_per_page * HANDSHAKE_RTTS) * rtt
+            print(f"{sessions:>8} {mode:<7} {result['p50'] * 1000:>7.2f} {result['p95'] * 1000:>7.2f} "
+                  f"{result['pages_per_s']:>8.1f} {result['opened']:>8} {remote * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Benchmark: near-duplicate lookup as the corpus grows.
+# Indexes N article signatures (default up to 500k) in the LSH band index and compares the
+# lookup time of a new article with a brute-force scan comparing it to every stored signature.
+# Corpus signatures are drawn at random (unrelated texts share almost no MinHash values);
+# near-duplicates are planted by copying a stored signature and replacing a share of its values,
+# which is how a text edit shows in a signature. Also reports the fingerprinting throughput
+# on synthetic article texts.
+#
+# Usage: python benchmarks/bench_dedup.py [--corpus 10000 100000 500000] [--queries 500]
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import numpy as np
+from app.fingerprint import NUM_PERM, SIMILARITY_THRESHOLD, LSHIndex, minhash
+from synthetic import _sentence
+
+
+def planted(rng, signature, sim) -> np.ndarray:
+    """Returns a copy of the signature with a (1 - sim) share of its values replaced."""
+    copy = signature.copy()
+    changed = rng.choice(NUM_PERM, size=round((1 - sim) * NUM_PERM), replace=False)
+    copy[changed] = rng.integers(0, 2**32, size=len(changed), dtype=np.uint32)
+    return copy
+
+
+def brute_force(corpus, signature) -> np.ndarray:
+    similarities = (corpus == signature).mean(axis=1)
+    return np.flatnonzero(similarities >= SIMILARITY_THRESHOLD)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", type=int, nargs="+", default=[10_000, 50_000, 100_000, 250_000, 500_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    # Fingerprinting cost, paid once per article at ingest
+    text_rng = random.Random(0)
+    texts = ["\n".join(_sentence(text_rng) for _ in range(25)) for _ in range(200)]
+    start = time.perf_counter()
+    for text in texts:
+        minhash(text)
+    print(f"minhash: {len(texts) / (time.perf_counter() - start):.0f} articles/s\n")
+
+    rng = np.random.default_rng(0)
+    print(f"{'corpus':>8} {'index us':>9} {'scan us':>9} {'speedup':>8} "
+          f"{'recall@0.9':>10} {'recall@0.8':>10} {'recall@0.7':>10} {'false +':>8}")
+    for n in args.corpus:
+        corpus = rng.integers(0, 2**32, size=(n, NUM_PERM), dtype=np.uint32)
+        index = LSHIndex()
+        for key in range(n):
+            index.add(key, corpus[key])
+
+        # Every near-duplicate query (of a stored article) is paired with an unrelated one
+        targets = rng.integers(0, n, size=args.queries)
+        sims = rng.choice([0.9, 0.8, 0.7], size=args.queries)
+        queries = [planted(rng, corpus[t], s) for t, s in zip(targets, sims)]
+        unrelated = rng.integers(0, 2**32, size=(args.queries, NUM_PERM), dtype=np.uint32)
+
+        start = time.perf_counter()
+        results = [index.query(q) for q in queries]
+        false_positives = sum(len(index.query(q)) for q in unrelated)
+        index_us = (time.perf_counter() - start) / (2 * args.queries) * 1e6
+
+        scan_queries = queries[:50]
+        start = time.perf_counter()
+        for q in scan_queries:
+            brute_force(corpus, q)
+        scan_us = (time.perf_counter() - start) / len(scan_queries) * 1e6
+
+        recall = {}
+        for sim in (0.9, 0.8, 0.7):
+            hits = [int(t) in {k for k, _ in r} for t, s, r in zip(targets, sims, results) if s == sim]
+            recall[sim] = sum(hits) / max(1, len(hits))
+        print(f"{n:>8} {index_us:>9.1f} {scan_us:>9.1f} {scan_us / index_us:>7.0f}x "
+              f"{recall[0.9]:>10.2f} {recall[0.8]:>10.2f} {recall[0.7]:>10.2f} {false_positives:>8}")
+
+
+if __name__ == "__main__":
+    main()
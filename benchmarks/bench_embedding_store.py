@@ -0,0 +1,129 @@
+# Benchmark: texts encoded by a weekly run of classify_topics.py and cluster_and_keywords.py without
+# and with the embedding store (app/embeddings.py).
+# Builds a synthetic corpus on the embedded SQLite backend (benchmarks/bench_stream_memory.py), a third
+# of the articles about two teams and a tenth of them near-duplicates, and runs the two stages the way
+# they embed: classify by batch of pending rows, cluster by team and week.
+#  - without: every batch encodes its originals, and every team/week encodes them again
+#  - with: both stages go through embed_articles, which only encodes what the store does not hold
+# The encoder is replaced by random vectors of the size of all-MiniLM-L6-v2 that count the texts; the
+# time they would take is estimated at --encode-ms per text (SBERT on a CPU, texts cut at 256 tokens).
+# Then prints the time of a store read per batch and the size of the table in float32 and float16.
+#
+# Usage: python benchmarks/bench_embedding_store.py [--articles 20000] [--batch 256] [--encode-ms 5]
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from app.dialects import SQLITE
+from app.embeddings import embed_articles, load_embeddings
+from app.queries import unlabeled_topics_query
+from app.sqlite_backend import SQLiteConnection, sqlite_connect
+from bench_stream_memory import EMBEDDING_DIM, grow
+
+MODEL = "all-MiniLM-L6-v2"
+
+
+class CountingEncoder:
+    """Stand-in for SentenceTransformer that counts the texts it encodes."""
+
+    def __init__(self):
+        self.texts = 0
+        self._rng = np.random.default_rng(0)
+
+    def encode(self, texts, show_progress_bar=False):
+        self.texts += len(texts)
+        return self._rng.standard_normal((len(texts), EMBEDDING_DIM), dtype=np.float32)
+
+
+def run(conn, batch_size, dtype, store) -> int:
+    """
+    A classify run and a cluster run over the whole corpus, without writing their rows (every run
+    finds the whole corpus pending). Returns the number of texts encoded.
+    """
+    encoder = CountingEncoder()
+    cur = conn.cursor()
+    cur.execute(unlabeled_topics_query(SQLITE))
+    rows = pd.DataFrame(cur.fetchall())
+    for start in range(0, len(rows), batch_size):
+        batch = rows.iloc[start:start + batch_size]
+        if store:
+            embed_articles(cur, encoder, MODEL, batch["original_id"].tolist(), dtype=dtype)
+        else:
+            encoder.encode(batch["original_id"].unique())
+    for _, group in rows.groupby(["team_id", "week_start"]):
+        unique = group["original_id"].unique()
+        if len(unique) < 2:
+            continue
+        if store:
+            embed_articles(cur, encoder, MODEL, unique.tolist(), dtype=dtype)
+        else:
+            encoder.encode(unique)
+    cur.close()
+    return encoder.texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=256, help="rows per batch (BATCH_SIZE of classify_topics.py)")
+    parser.add_argument("--encode-ms", type=float, default=5.0, help="estimated SBERT time per text")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.sqlite3"
+        conn = sqlite_connect(path)
+        grow(conn, 0, args.articles)
+        cur = conn.cursor()
+        cur.execute("UPDATE articles SET duplicate_of = id - 1 WHERE id % 10 = 0")
+        conn.commit()
+        cur.execute("SELECT COUNT(DISTINCT COALESCE(duplicate_of, id)) AS n FROM articles")
+        originals = cur.fetchone()["n"]
+        print(f"{args.articles} articles, {originals} originals\n")
+
+        print(f"{'':<22} {'texts encoded':>14} {'est. encode s':>14}")
+        results = {"without store": run(conn, args.batch, "float32", False),
+                   "with store, 1st run": run(conn, args.batch, "float32", True)}
+        conn.commit()
+        results["with store, 2nd run"] = run(conn, args.batch, "float32", True)
+        for name, texts in results.items():
+            print(f"{name:<22} {texts:>14} {texts * args.encode_ms / 1000:>14.1f}")
+
+        # A store read per classify batch, from a cold page cache
+        ids = list(range(1, args.articles + 1))
+        times = []
+        for start in range(0, min(len(ids), 20 * args.batch), args.batch):
+            fresh = SQLiteConnection(path)
+            fresh_cur = fresh.cursor()
+            begin = time.perf_counter()
+            load_embeddings(fresh_cur, MODEL, ids[start:start + args.batch])
+            times.append(time.perf_counter() - begin)
+            fresh.close()
+        print(f"\nstore read: {statistics.median(times) * 1000:.1f} ms per batch of {args.batch}")
+
+        sizes = {}
+        for dtype in ("float32", "float16"):
+            cur.execute("DELETE FROM article_embeddings")
+            conn.commit()
+            run(conn, args.batch, dtype, True)
+            conn.commit()
+            cur.execute("VACUUM")
+            cur.execute("SELECT SUM(pgsize) AS bytes FROM dbstat WHERE name LIKE '%article_embeddings%'")
+            sizes[dtype] = cur.fetchone()["bytes"] / 1e6
+        print("store size: " + ", ".join(f"{dtype} {mb:.1f} MB" for dtype, mb in sizes.items()))
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
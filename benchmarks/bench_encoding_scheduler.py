@@ -0,0 +1,124 @@
+# Benchmark: tokens/s of the SBERT encoder called as the pipelines called it before
+# (SentenceTransformer.encode, fixed batches of 32) and through the EncodingScheduler of app/encoders.py
+# (token-budget batches of similar lengths, optionally over a process pool, optionally chunking the
+# long texts instead of truncating them).
+# The corpus is the latest article bodies of the database (--db), or synthetic articles of 1 to 40
+# sentences (--synthetic) when there is no database at hand.
+# Prints the token lengths of the corpus and the share of its tokens past the model's window (what
+# truncation drops), then per run: the tokens the model read (padding excluded) per second, the texts
+# per second and the share of padding in the batches.
+#
+# Usage: python benchmarks/bench_encoding_scheduler.py [--db 2000 | --synthetic 2000]
+#            [--budgets 2048,4096,8192] [--processes 2] [--chunk] [--backend torch] [--repeat 3]
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from app.bodies import decompress_body
+from app.db import get_conn
+from app.encoders import EncodingScheduler
+from app.pipeline.classify_topics import SBERT_MODEL
+from synthetic import _sentence
+
+# Batch size of SentenceTransformer.encode
+ENCODE_BATCH = 32
+
+
+def db_texts(n) -> list:
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT body FROM article_bodies ORDER BY article_id DESC LIMIT %s", (n,))
+    texts = [decompress_body(row["body"]) for row in cur.fetchall()]
+    cur.close()
+    conn.close()
+    return texts
+
+
+def synthetic_texts(n) -> list:
+    rng = random.Random(0)
+    return ["\n".join(_sentence(rng) for _ in range(rng.randint(1, 40))) for _ in range(n)]
+
+
+def legacy_padding(scheduler, texts) -> tuple:
+    """(tokens read, padded tokens) of SentenceTransformer.encode: texts sorted by characters, batches of 32."""
+    lengths = [len(ids) + 2 for _, ids in scheduler.split(texts)]
+    order = np.argsort([-len(text) for text in texts], kind="stable")
+    padded = sum(max(lengths[i] for i in order[start:start + ENCODE_BATCH]) * len(order[start:start + ENCODE_BATCH])
+                 for start in range(0, len(order), ENCODE_BATCH))
+    return sum(lengths), padded
+
+
+def scheduled_padding(scheduler, texts) -> tuple:
+    """(tokens read, padded tokens) of the scheduler's batches."""
+    batches = scheduler.plan(scheduler.split(texts))
+    read = sum(len(ids) + 2 for batch in batches for _, ids in batch)
+    padded = sum((max(len(ids) for _, ids in batch) + 2) * len(batch) for batch in batches)
+    return read, padded
+
+
+def timed(run, repeat) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    corpus = parser.add_mutually_exclusive_group()
+    corpus.add_argument("--db", type=int, help="the latest N article bodies of the database")
+    corpus.add_argument("--synthetic", type=int, default=1000, help="N synthetic articles (default)")
+    parser.add_argument("--budgets", default="2048,4096,8192", help="token budgets of the scheduler")
+    parser.add_argument("--processes", type=int, default=0, help="also run the scheduler over a process pool")
+    parser.add_argument("--chunk", action="store_true", help="also run the scheduler chunking the long texts")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = db_texts(args.db) if args.db else synthetic_texts(args.synthetic)
+
+    budgets = [int(b) for b in args.budgets.split(",")]
+    scheduler = EncodingScheduler(SBERT_MODEL, args.backend, token_budget=budgets[0])
+    full = [len(ids) for ids in scheduler.tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]]
+    print(f"{len(texts)} texts, {sum(full)} tokens: median {statistics.median(full):.0f}, "
+          f"p90 {np.percentile(full, 90):.0f}, max {max(full)} per text")
+    print(f"window {scheduler.window} tokens: {np.mean([n > scheduler.window for n in full]):.1%} of the texts "
+          f"and {sum(max(0, n - scheduler.window) for n in full) / sum(full):.1%} of the tokens are past it\n")
+
+    scheduler.encoder.encode(texts[:ENCODE_BATCH], show_progress_bar=False)
+    print(f"{'':<26} {'tokens/s':>9} {'texts/s':>8} {'padding':>8}")
+
+    def report(name, padding, run):
+        read, padded = padding
+        seconds = timed(run, args.repeat)
+        print(f"{name:<26} {read / seconds:>9.0f} {len(texts) / seconds:>8.1f} {1 - read / padded:>8.1%}")
+
+    report("encode, batches of 32", legacy_padding(scheduler, texts),
+           lambda: scheduler.encoder.encode(texts, batch_size=ENCODE_BATCH, show_progress_bar=False))
+    for budget in budgets:
+        scheduler.token_budget = budget
+        report(f"scheduler, {budget} tokens", scheduled_padding(scheduler, texts), lambda: scheduler.encode(texts))
+    if args.chunk:
+        scheduler.long_texts = "chunk"
+        report("scheduler, chunked", scheduled_padding(scheduler, texts), lambda: scheduler.encode(texts))
+    if args.processes:
+        pooled = EncodingScheduler(SBERT_MODEL, args.backend, token_budget=budgets[-1], processes=args.processes)
+        pooled.encode(texts[:ENCODE_BATCH])
+        report(f"scheduler, {args.processes} processes", scheduled_padding(pooled, texts), lambda: pooled.encode(texts))
+        pooled.close()
+
+
+if __name__ == "__main__":
+    main()
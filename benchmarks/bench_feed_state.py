@@ -0,0 +1,109 @@
+# Benchmark: repeated feed polls with and without the persisted feed state.
+# Serves one synthetic feed per outlet from the local HTTP stand-in (which answers
+# conditional requests with 304) and polls them several times, as a frequent
+# scraping schedule would. Reports requests, 304s, bytes downloaded and entries
+# handed to the per-entry loop.
+# Then runs sky_scraper twice with the feed state, one article page failing on the
+# first run. After a transient failure (503) the second run must download the feed again
+# and fetch that page; a page that is gone (404) is marked as seen and the second run gets a 304.
+#
+# Usage: python benchmarks/bench_feed_state.py [--polls 24] [--entries 100]
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from bench_scrapers import OUTLETS as SCRAPERS, serve_outlet
+from feed_state import FeedState, read_feed
+from fetch import Fetcher
+from http_stand_in import StandInServer
+from synthetic import feed_entries, feed_xml
+
+OUTLETS = ["bbc", "sky", "theguardian"]
+
+
+def run(server, urls, polls, use_state) -> tuple:
+    entries = 0
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp, Fetcher(rate_limit=None) as fetcher:
+        for _ in range(polls):
+            # A new state object per poll mimics separate runs sharing the state file
+            feed_state = FeedState(Path(tmp) / "feed_state.json") if use_state else None
+            for url in urls:
+                posts = read_feed(url, fetcher, feed_state)
+                entries += len(posts)
+                if feed_state is not None:
+                    for post in posts:
+                        feed_state.mark_seen(url, post)
+                    feed_state.complete(url)
+            if feed_state is not None:
+                feed_state.save()
+    return entries, time.perf_counter() - start
+
+
+def retry_failed_page(status, outlet="sky") -> list:
+    """
+    Scrapes an outlet twice with the feed state, one of its article pages answering status on the first run.
+    Returns the articles, requests and 304s of each run, and whether the failed page was scraped by it.
+    """
+    scraper = SCRAPERS[outlet]
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        server, feed_url = serve_outlet(stack, outlet, 0.0)
+        # A page the scraper downloads (the others are filtered out by the feed entry)
+        with Fetcher(rate_limit=None) as fetcher:
+            link = next(scraper(datetime.min, datetime.max, fetcher, feed_url=feed_url)).link
+        page = link[len(server.base_url):]
+        server.statuses[page] = status
+
+        runs = []
+        for _ in range(2):
+            requests, not_modified = server.requests, server.not_modified
+            feed_state = FeedState(Path(tmp) / "feed_state.json")
+            # No backoff: the stand-in measures the feed state, not the retry delays
+            with Fetcher(rate_limit=None, backoff=0) as fetcher:
+                records = list(scraper(datetime.min, datetime.max, fetcher, feed_state, feed_url=feed_url))
+            feed_state.save()
+            runs.append((len(records), server.requests - requests, server.not_modified - not_modified,
+                         any(record.link == link for record in records)))
+            server.statuses.pop(page, None)
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=24)
+    parser.add_argument("--entries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    routes = {
+        f"/{outlet}/rss": (feed_xml(feed_entries(rng, args.entries, f"https://{outlet}.example")).encode(), "application/rss+xml")
+        for outlet in OUTLETS
+    }
+    print(f"{'mode':<12} {'requests':>8} {'304s':>6} {'KiB':>8} {'entries':>8} {'seconds':>8}")
+    for use_state in (False, True):
+        with StandInServer(routes) as server:
+            urls = [server.url(path) for path in routes]
+            entries, elapsed = run(server, urls, args.polls, use_state)
+            mode = "feed state" if use_state else "always"
+            print(f"{mode:<12} {server.requests:>8} {server.not_modified:>6} "
+                  f"{server.bytes_sent / 1024:>8.1f} {entries:>8} {elapsed:>8.2f}")
+
+    print(f"\n{'failed page':<12} {'articles':>8} {'requests':>8} {'304s':>6} {'page scraped':>13}")
+    for status in (503, 404):
+        for number, (articles, requests, not_modified, scraped) in enumerate(retry_failed_page(status), start=1):
+            print(f"{f'{status}, run {number}':<12} {articles:>8} {requests:>8} {not_modified:>6} "
+                  f"{'yes' if scraped else 'no':>13}")
+
+
+if __name__ == "__main__":
+    main()
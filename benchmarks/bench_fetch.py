@@ -0,0 +1,82 @@
+# Benchmark: article fetching throughput at several concurrency levels.
+# Serves article pages from a local HTTP stand-in with a fixed per-request latency
+# (to mimic a remote site) and downloads + parses all of them with each outlet's
+# get_details_from_url, comparing serial bare requests.get against the pooled Fetcher.
+#
+# Usage: python benchmarks/bench_fetch.py [--pages 60] [--latency 0.05]
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import requests
+import bbc_scraper
+import sky_scraper
+import theguardian_scraper
+from fetch import Fetcher
+from http_stand_in import StandInServer
+from synthetic import pages
+
+OUTLETS = {"bbc": bbc_scraper, "sky": sky_scraper, "theguardian": theguardian_scraper}
+FIXTURES_DIR = BASE_DIR / "benchmarks" / "fixtures"
+
+
+def load_pages(outlet, n_pages) -> list:
+    """Uses recorded fixture pages when available, synthetic pages otherwise."""
+    recorded = sorted((FIXTURES_DIR / outlet / "pages").glob("*.html"))
+    if recorded:
+        return [p.read_bytes() for p in recorded]
+    return [page.encode("utf-8") for page in pages(outlet, n_pages)]
+
+
+class BareRequestsFetcher:
+    """Mimics the old behaviour: one bare requests.get per page, no session, no concurrency."""
+
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    def parse(self, url, parser, circuit=None):
+        return parser(self.get(url).content)
+
+
+def run(module, urls, fetcher) -> float:
+    start = time.perf_counter()
+    if isinstance(fetcher, BareRequestsFetcher):
+        results = [module.get_details_from_url(url, fetcher) for url in urls]
+    else:
+        results = list(fetcher.map(lambda url: module.get_details_from_url(url, fetcher), urls))
+    elapsed = time.perf_counter() - start
+    assert all(r[0] for r in results), "every page should produce article text"
+    return len(urls) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    print(f"{'outlet':<12} {'mode':<18} {'articles/s':>10}")
+    for outlet, module in OUTLETS.items():
+        outlet_pages = load_pages(outlet, args.pages)
+        routes = {f"/{outlet}/{i}": (page, "text/html") for i, page in enumerate(outlet_pages)}
+        with StandInServer(routes, latency=args.latency) as server:
+            urls = [server.url(path) for path in routes]
+
+            rate = run(module, urls, BareRequestsFetcher())
+            print(f"{outlet:<12} {'serial requests':<18} {rate:>10.1f}")
+            for workers in args.concurrency:
+                # No rate limit: the stand-in measures the fetch engine, not the politeness delay
+                with Fetcher(max_workers=workers, rate_limit=None) as fetcher:
+                    rate = run(module, urls, fetcher)
+                print(f"{outlet:<12} {f'fetcher x{workers}':<18} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Benchmark: writing the scraped articles to MySQL.
+# Compares the old per-article statements of daily_scrape.py (outlet, author and team
+# upserts, SELECT id, article upsert, SELECT id, one article_teams insert per team)
+# with the BulkLoader. Needs the local MySQL of docker-compose (docker compose up db).
+# Statements are counted on the server (session Questions counter), and every run is
+# rolled back so the local database is left untouched. The remote estimate adds the
+# given round-trip time per statement, as seen from the runner to the hosted database.
+#
+# Usage: python benchmarks/bench_loader.py [--articles 100 500 2000] [--rtt-ms 25]
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import pymysql
+from loader import BulkLoader
+from records import ArticleRecord
+from synthetic import _sentence
+sys.path.append(str(BASE_DIR))
+from app.bodies import body_row
+from app.teams import TEAM_IDS
+
+OUTLET_IDS = {"BBC": 1, "TheGuardian": 2, "SkySports": 3}
+AUTHORS = [f"Author {i}" for i in range(40)] + [""]
+
+
+def connect():
+    return pymysql.connect(
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        port=int(os.getenv("DB_PORT", 3306)),
+        user=os.getenv("DB_USER", "appuser"),
+        password=os.getenv("DB_PASSWORD", "appuserpass"),
+        db=os.getenv("DB_NAME", "footy_narratives"),
+        charset="utf8mb4",
+        cursorclass=pymysql.cursors.DictCursor,
+    )
+
+
+def make_records(n, seed=0) -> list:
+    rng = random.Random(seed)
+    now = datetime(2025, 8, 1)
+    records = []
+    for i in range(n):
+        records.append(ArticleRecord(
+            title=_sentence(rng, 10),
+            summary=_sentence(rng, 20),
+            link=f"https://bench.invalid/{seed}/article/{i}",
+            date=now - timedelta(minutes=i),
+            author=rng.choice(AUTHORS),
+            teams=rng.sample(list(TEAM_IDS), rng.randint(1, 3)),
+            article="\n".join(_sentence(rng) for _ in range(25)),
+            outlet=rng.choice(list(OUTLET_IDS)),
+        ))
+    return records
+
+
+def legacy_load(conn, records):
+    """The per-article statements daily_scrape.py used to send."""
+    cur = conn.cursor()
+    for article in records:
+        author = article.author or None
+        outlet_id = OUTLET_IDS[article.outlet]
+        cur.execute("INSERT INTO outlets (id, name) VALUES (%s, %s) ON DUPLICATE KEY UPDATE name = name", (outlet_id, article.outlet))
+        if author:
+            cur.execute("INSERT INTO authors (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = name", (author,))
+            cur.execute("SELECT id FROM authors WHERE name = %s", (author,))
+            author_id = cur.fetchone()["id"]
+        else:
+            author_id = None
+        team_ids = []
+        for team in article.teams:
+            cur.execute("INSERT INTO teams (id, name) VALUES (%s, %s) ON DUPLICATE KEY UPDATE name = name", (TEAM_IDS[team], team))
+            team_ids.append(TEAM_IDS[team])
+        cur.execute("INSERT INTO articles (link, title, summary, publication_date, outlet_id, author_id) "
+                    "VALUES (%s, %s, %s, %s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE title = VALUES(title), summary = VALUES(summary)",
+                    (article.link, article.title, article.summary, article.date, outlet_id, author_id))
+        cur.execute("SELECT id FROM articles WHERE link = %s", (article.link,))
+        article_id = cur.fetchone()["id"]
+        # The text was a column of articles before migration 007
+        cur.execute("INSERT INTO article_bodies (article_id, body, text_hash) VALUES (%s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE body = VALUES(body), text_hash = VALUES(text_hash)",
+                    body_row(article_id, article.article))
+        for team_id in team_ids:
+            cur.execute("INSERT IGNORE INTO article_teams (article_id, team_id) VALUES (%s, %s)", (article_id, team_id))
+    cur.close()
+
+
+def bulk_load(conn, records):
+    loader = BulkLoader(conn, OUTLET_IDS, TEAM_IDS)
+    for record in records:
+        loader.add(record)
+    loader.close()
+
+
+def questions(conn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SHOW SESSION STATUS LIKE 'Questions'")
+        return int(cur.fetchone()["Value"])
+
+
+def run(load, records) -> tuple:
+    conn = connect()
+    try:
+        before = questions(conn)
+        start = time.perf_counter()
+        load(conn, records)
+        elapsed = time.perf_counter() - start
+        # The SHOW STATUS of the second reading counts itself
+        statements = questions(conn) - before - 1
+        conn.rollback()
+    finally:
+        conn.close()
+    return statements, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--rtt-ms", type=float, default=25, help="round trip to the hosted database, for the estimate")
+    args = parser.parse_args()
+
+    print(f"{'articles':>8} {'mode':<8} {'statements':>10} {'local s':>8} {'remote est s':>12}")
+    for n in args.articles:
+        records = make_records(n)
+        for name, load in (("legacy", legacy_load), ("bulk", bulk_load)):
+            statements, elapsed = run(load, records)
+            remote = elapsed + statements * args.rtt_ms / 1000
+            print(f"{n:>8} {name:<8} {statements:>10} {elapsed:>8.2f} {remote:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# Benchmark: the onnx-int8 encoder backend (app/encoders.py) against the PyTorch encoder.
+# Accuracy, on the held-out split of the labeled articles (the 30% test split of
+# notebooks/topic_classification.ipynb), or on the latest article bodies of the database (--db):
+#  - cosine drift: cosine similarity of the two embeddings of every text (mean, 5th percentile, min)
+#  - classifier agreement: share of texts the topic classifier of classify_topics.py labels the same
+#    from both embeddings, and its accuracy with each when the texts are labeled
+# The saved classifier was fitted on every labeled article, test split included: its accuracy here
+# is optimistic, the agreement and the drift are not.
+# Throughput: texts encoded per second by each backend with 1, 2, 4... threads, on the same texts.
+# Needs the ML requirements and the ONNX extra (requirements_ml_pipeline.txt); the first run
+# exports the quantized model to app/models/onnx.
+#
+# Usage: python benchmarks/bench_onnx_encoder.py [--csv data/articles_labeled.csv | --db 1000]
+#                                                [--threads 1,2,4,8] [--texts 512]
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from joblib import load
+from sklearn.model_selection import train_test_split
+from app.bodies import decompress_body
+from app.db import get_conn
+from app.encoders import QUANTIZATION_CONFIG, load_encoder
+from app.pipeline.classify_topics import MODEL_DIR, MODEL_NAME, SBERT_MODEL
+
+# Texts per encode call (the default batch size of SentenceTransformer.encode)
+ENCODE_BATCH = 32
+
+
+def labeled_test_split(path) -> tuple:
+    """The test texts and topics of the notebook's stratified 70/30 split."""
+    articles = pd.read_csv(path, sep=";", encoding="utf-16", engine="python")
+    _, texts, _, topics = train_test_split(articles["Full_text"].tolist(), articles["Topic"].tolist(),
+                                           test_size=0.3, random_state=42, stratify=articles["Topic"].tolist())
+    return texts, np.asarray(topics)
+
+
+def latest_bodies(n) -> list:
+    """The texts of the n latest articles of the database."""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT body FROM article_bodies ORDER BY article_id DESC LIMIT %s", (n,))
+    texts = [decompress_body(row["body"]) for row in cur.fetchall()]
+    cur.close()
+    conn.close()
+    return texts
+
+
+def throughput(backend, threads, texts) -> float:
+    """Texts per second of a backend with some threads, after a warm-up call."""
+    encoder = load_encoder(SBERT_MODEL, backend, threads)
+    encoder.encode(texts[:ENCODE_BATCH], batch_size=ENCODE_BATCH, show_progress_bar=False)
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=ENCODE_BATCH, show_progress_bar=False)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=str(BASE_DIR / "data" / "articles_labeled.csv"), help="labeled articles")
+    parser.add_argument("--db", type=int, help="use the latest N article bodies of the database instead")
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--texts", type=int, default=512, help="texts encoded per throughput run")
+    args = parser.parse_args()
+
+    if args.db:
+        texts, topics = latest_bodies(args.db), None
+    else:
+        texts, topics = labeled_test_split(args.csv)
+    print(f"{len(texts)} texts, ONNX quantization {QUANTIZATION_CONFIG}, {os.cpu_count()} CPUs\n")
+
+    torch_emb = load_encoder(SBERT_MODEL, "torch").encode(texts, batch_size=ENCODE_BATCH, show_progress_bar=False)
+    onnx_emb = load_encoder(SBERT_MODEL, "onnx-int8").encode(texts, batch_size=ENCODE_BATCH, show_progress_bar=False)
+    cosine = np.sum(torch_emb * onnx_emb, axis=1) / (np.linalg.norm(torch_emb, axis=1) * np.linalg.norm(onnx_emb, axis=1))
+    print(f"cosine torch/onnx-int8: mean {cosine.mean():.4f}, p5 {np.percentile(cosine, 5):.4f}, min {cosine.min():.4f}")
+
+    clf = load(MODEL_DIR / MODEL_NAME)
+    torch_topics = clf.predict(torch_emb)
+    onnx_topics = clf.predict(onnx_emb)
+    print(f"classifier agreement: {np.mean(torch_topics == onnx_topics):.2%} "
+          f"({np.sum(torch_topics != onnx_topics)} of {len(texts)} texts change topic)")
+    if topics is not None:
+        print(f"classifier accuracy: torch {np.mean(torch_topics == topics):.2%}, "
+              f"onnx-int8 {np.mean(onnx_topics == topics):.2%}")
+
+    sample = (texts * (args.texts // len(texts) + 1))[:args.texts]
+    print(f"\n{'threads':>7} {'torch texts/s':>14} {'onnx-int8 texts/s':>18} {'speedup':>8}")
+    for threads in (int(t) for t in args.threads.split(",")):
+        torch_rate = throughput("torch", threads, sample)
+        onnx_rate = throughput("onnx-int8", threads, sample)
+        print(f"{threads:>7} {torch_rate:>14.1f} {onnx_rate:>18.1f} {onnx_rate / torch_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
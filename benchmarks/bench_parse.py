@@ -0,0 +1,67 @@
+# Benchmark: per-outlet parse time of the article extractors.
+# Runs each outlet's parse_article on the saved fixture pages (benchmarks/fixtures/<outlet>/pages,
+# synthetic pages if none were recorded) with the previous full html.parser parse and with the
+# targeted parse (outlet strainer + fastest parser), and checks both give identical output.
+#
+# Usage: python benchmarks/bench_parse.py [--pages 50] [--repeat 3]
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from bs4 import BeautifulSoup
+import bbc_scraper
+import parsing
+import sky_scraper
+import theguardian_scraper
+from synthetic import pages
+
+OUTLETS = {"bbc": bbc_scraper, "sky": sky_scraper, "theguardian": theguardian_scraper}
+FIXTURES_DIR = BASE_DIR / "benchmarks" / "fixtures"
+
+
+def load_pages(outlet, n_pages) -> list:
+    recorded = sorted((FIXTURES_DIR / outlet / "pages").glob("*.html"))
+    if recorded:
+        return [p.read_bytes() for p in recorded]
+    return [page.encode("utf-8") for page in pages(outlet, n_pages)]
+
+
+def full_parse(content, strainer):
+    """The previous behaviour: the whole page parsed with html.parser."""
+    return BeautifulSoup(content, "html.parser")
+
+
+def run(module, outlet_pages, parse, repeat) -> tuple:
+    module.parse_page = parse
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [module.parse_article(page) for page in outlet_pages]
+        best = min(best, time.perf_counter() - start)
+    return results, best * 1000 / len(outlet_pages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"parser backend: {parsing.PARSER}")
+    print(f"{'outlet':<12} {'pages':>5} {'full ms/page':>13} {'targeted ms/page':>17} {'speedup':>8}")
+    for outlet, module in OUTLETS.items():
+        outlet_pages = load_pages(outlet, args.pages)
+        old, old_ms = run(module, outlet_pages, full_parse, args.repeat)
+        new, new_ms = run(module, outlet_pages, parsing.parse_page, args.repeat)
+        assert old == new, f"{outlet}: the targeted parse changed the extracted output"
+        print(f"{outlet:<12} {len(outlet_pages):>5} {old_ms:>13.2f} {new_ms:>17.2f} {old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Microbenchmark: accumulating scraped posts.
+# Compares the old pattern (pd.concat of a one-row DataFrame per post, then one more
+# concat across outlets) with streaming ArticleRecord objects and building the
+# DataFrame once at the end. Reports wall time and peak traced memory.
+#
+# Usage: python benchmarks/bench_records.py [--entries 1000 3000 5000]
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import pandas as pd
+from records import ArticleRecord, records_to_frame
+from synthetic import feed_entries, pages
+
+OUTLETS = ["SkySports", "BBC", "TheGuardian"]
+NEWS_FORMAT = "%a, %d %b %Y %H:%M:%S"
+
+
+def concat_pattern(entries, article) -> pd.DataFrame:
+    frames = []
+    for outlet in OUTLETS:
+        new_data = pd.DataFrame(columns=["Title", "Summary", "Link", "Date", "Author", "Teams", "Article", "Outlet"])
+        for entry in entries:
+            post = {
+                "Title": entry["title"],
+                "Summary": entry["summary"],
+                "Link": entry["link"],
+                "Date": entry["published"].strftime(NEWS_FORMAT),
+                "Author": "Author",
+                "Teams": ["Arsenal"],
+                "Article": article + entry["link"],
+                "Outlet": outlet,
+            }
+            new_data = pd.concat([new_data, pd.DataFrame([post])], ignore_index=True)
+        frames.append(new_data)
+    return pd.concat(frames, ignore_index=True)
+
+
+def scraper(entries, article, outlet):
+    for entry in entries:
+        yield ArticleRecord(
+            title=entry["title"],
+            summary=entry["summary"],
+            link=entry["link"],
+            date=entry["published"],
+            author="Author",
+            teams=["Arsenal"],
+            article=article + entry["link"],
+            outlet=outlet,
+        )
+
+
+def records_pattern(entries, article) -> pd.DataFrame:
+    records = (record for outlet in OUTLETS for record in scraper(entries, article, outlet))
+    return records_to_frame(records)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, nargs="+", default=[500, 1000, 2000],
+                        help="synthetic feed entries per outlet")
+    args = parser.parse_args()
+
+    # Every post carries a distinct copy of a realistic article body
+    article = pages("sky", 1)[0][-4000:]
+    print(f"{'entries':>8} {'pattern':<10} {'seconds':>9} {'peak MiB':>9}")
+    for n_entries in args.entries:
+        entries = feed_entries(random.Random(0), n_entries, "https://example.com")
+        old, old_time, old_peak = measure(concat_pattern, entries, article)
+        new, new_time, new_peak = measure(records_pattern, entries, article)
+        assert len(old) == len(new) == n_entries * len(OUTLETS)
+        print(f"{n_entries:>8} {'concat':<10} {old_time:>9.2f} {old_peak:>9.1f}")
+        print(f"{n_entries:>8} {'records':<10} {new_time:>9.2f} {new_peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
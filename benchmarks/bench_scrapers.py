@@ -0,0 +1,148 @@
+# End-to-end scraper benchmark, fully offline.
+# Replays the fixture corpus (recorded with benchmarks/record_fixtures.py, synthetic otherwise)
+# from a local HTTP stand-in and runs sky_scraper, bbc_scraper and theguardian_scraper on it.
+# Reports per outlet: articles, throughput, page-fetch latency percentiles, bytes transferred
+# and peak traced memory (measured in a second pass, outside the timings). Use --latency to emulate
+# a remote site.
+# Then runs the three outlets together, one after another and concurrently through
+# pipeline.scrape_concurrently (one stand-in per outlet, as each outlet is its own host).
+#
+# Usage: python benchmarks/bench_scrapers.py [--workers 8] [--latency 0.05]
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import bbc_scraper
+import fixtures
+import sky_scraper
+import theguardian_scraper
+from fetch import Fetcher
+from http_stand_in import StandInServer
+from pipeline import OutletDone, scrape_concurrently
+
+OUTLETS = {"sky": sky_scraper.sky_scraper,
+           "bbc": bbc_scraper.bbc_scraper,
+           "theguardian": theguardian_scraper.theguardian_scraper}
+
+
+class TimedFetcher(Fetcher):
+    """Fetcher recording the latency of every request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self._latencies_lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        start = time.perf_counter()
+        response = super().get(url, **kwargs)
+        with self._latencies_lock:
+            self.latencies.append(time.perf_counter() - start)
+        return response
+
+
+def percentile(values, pct) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def serve_outlet(stack, outlet, latency) -> tuple:
+    """Starts a stand-in serving the outlet's fixture feed and pages. Returns the server and the feed URL."""
+    feed, pages = fixtures.load(outlet)
+    routes = {}
+    url_map = {}
+    for i, (url, content) in enumerate(pages.items()):
+        routes[f"/{outlet}/pages/{i}"] = (content, "text/html")
+        url_map[url] = f"/{outlet}/pages/{i}"
+
+    server = stack.enter_context(StandInServer(routes, latency=latency))
+    url_map = {url: server.url(path) for url, path in url_map.items()}
+    routes[f"/{outlet}/rss"] = (fixtures.rewrite_feed(feed, url_map), "application/rss+xml")
+    return server, server.url(f"/{outlet}/rss")
+
+
+def run_outlet(outlet, scraper, workers, latency) -> dict:
+    """
+    Scrapes an outlet twice: a timed pass, then a pass under tracemalloc for the peak memory
+    (tracing slows every allocation down, so it would inflate the times and the latencies).
+    """
+    with ExitStack() as stack:
+        server, feed_url = serve_outlet(stack, outlet, latency)
+
+        start = time.perf_counter()
+        # No rate limit: the stand-in measures the pipeline, not the politeness delay
+        with TimedFetcher(max_workers=workers, rate_limit=None) as fetcher:
+            # The window covers every recorded entry, however old the recording is
+            records = list(scraper(datetime.min, datetime.max, fetcher, feed_url=feed_url))
+        elapsed = time.perf_counter() - start
+        requests, bytes_sent = server.requests, server.bytes_sent
+
+        tracemalloc.start()
+        with Fetcher(max_workers=workers, rate_limit=None) as memory_fetcher:
+            for _ in scraper(datetime.min, datetime.max, memory_fetcher, feed_url=feed_url):
+                pass
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    latencies = fetcher.latencies
+    return {
+        "articles": len(records),
+        "requests": requests,
+        "seconds": elapsed,
+        "articles_per_s": len(records) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "kib": bytes_sent / 1024,
+        "peak_mib": peak / 2**20,
+    }
+
+
+def run_all(workers, latency, concurrent) -> tuple:
+    """Runs every outlet, one after another or concurrently. Returns the number of articles and the seconds taken."""
+    with ExitStack() as stack:
+        feed_urls = {outlet: serve_outlet(stack, outlet, latency)[1] for outlet in OUTLETS}
+        start = time.perf_counter()
+        with Fetcher(max_workers=workers, rate_limit=None) as fetcher:
+            jobs = {outlet: (lambda s=scraper, url=feed_urls[outlet]: s(datetime.min, datetime.max, fetcher, feed_url=url))
+                    for outlet, scraper in OUTLETS.items()}
+            if concurrent:
+                articles = sum(1 for item in scrape_concurrently(jobs) if not isinstance(item, OutletDone))
+            else:
+                articles = sum(1 for job in jobs.values() for _ in job())
+        return articles, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    print(f"{'outlet':<12} {'articles':>8} {'requests':>8} {'art/s':>7} {'p50 ms':>7} {'p90 ms':>7} "
+          f"{'p99 ms':>7} {'KiB':>8} {'peak MiB':>9}")
+    for outlet, scraper in OUTLETS.items():
+        r = run_outlet(outlet, scraper, args.workers, args.latency)
+        print(f"{outlet:<12} {r['articles']:>8} {r['requests']:>8} {r['articles_per_s']:>7.1f} {r['p50_ms']:>7.1f} "
+              f"{r['p90_ms']:>7.1f} {r['p99_ms']:>7.1f} {r['kib']:>8.1f} {r['peak_mib']:>9.1f}")
+
+    print(f"\n{'all outlets':<12} {'articles':>8} {'seconds':>8}")
+    for name, concurrent in (("sequential", False), ("concurrent", True)):
+        articles, seconds = run_all(args.workers, args.latency, concurrent)
+        print(f"{name:<12} {articles:>8} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
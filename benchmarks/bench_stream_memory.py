@@ -0,0 +1,175 @@
+# Benchmark: peak memory of the classify pipeline reading its pending rows all at once (fetchall into
+# one DataFrame, every upsert row kept until a single executemany) and streamed (classify_pending of
+# classify_topics.py: chunk by chunk, each chunk encoded and upserted before the next one is read).
+# Builds a synthetic corpus on the embedded SQLite backend, none of it classified yet, and grows it
+# through --sizes: the buffered peak grows with the corpus, the streamed one stays flat.
+# Both run the pipeline's classify_batch. The model is replaced by random embeddings of its size
+# (all-MiniLM-L6-v2, 384 float32) and the classifier by a linear softmax over them; the texts are
+# loaded per batch from article_bodies as the pipeline does. The classified rows and the embeddings
+# are deleted after every run, so the next one finds the whole corpus pending.
+# tracemalloc sees the Python objects and the numpy/pandas buffers; the page cache of SQLite (or the
+# socket buffers of PyMySQL) are outside it and bounded anyway.
+#
+# Usage: python benchmarks/bench_stream_memory.py [--sizes 50000,100000,200000] [--chunk 256]
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+from app.bodies import body_row, body_upsert_sql
+from app.dialects import SQLITE
+from app.pipeline.classify_topics import classify_batch, classify_pending, upsert_sql
+from app.queries import unlabeled_topics_query
+from app.sqlite_backend import SQLiteConnection, sqlite_connect
+from app.teams import TEAM_IDS
+from synthetic import _sentence
+
+# Weeks of articles in the synthetic database
+WEEKS = 150
+# Paragraphs of a synthetic article
+PARAGRAPHS = 12
+# Size of an all-MiniLM-L6-v2 embedding
+EMBEDDING_DIM = 384
+# Topics of the classifier
+TOPICS = 6
+# Articles inserted per transaction while building
+BUILD_BATCH = 10_000
+
+
+def grow(conn, start, end):
+    """Adds the articles start+1..end, a third of them about two teams, with their bodies."""
+    rng = random.Random(start)
+    now = datetime(2025, 8, 1)
+    span = timedelta(weeks=WEEKS)
+    team_ids = sorted(TEAM_IDS.values())
+    cur = conn.cursor()
+    if start == 0:
+        cur.executemany("INSERT INTO outlets (id, name) VALUES (%s, %s)", [(1, "BBC"), (2, "TheGuardian"), (3, "SkySports")])
+        cur.executemany("INSERT INTO teams (id, name) VALUES (%s, %s)", [(team_id, team) for team, team_id in TEAM_IDS.items()])
+    for first in range(start + 1, end + 1, BUILD_BATCH):
+        ids = range(first, min(first + BUILD_BATCH, end + 1))
+        cur.executemany("INSERT INTO articles (id, link, title, publication_date, outlet_id) VALUES (%s, %s, %s, %s, %s)",
+                        [(i, f"https://bench.invalid/article/{i}", f"Article {i}",
+                          now - span * rng.random(), 1 + i % 3) for i in ids])
+        cur.executemany(body_upsert_sql(SQLITE),
+                        [body_row(i, "\n".join(_sentence(rng) for _ in range(PARAGRAPHS))) for i in ids])
+        cur.executemany("INSERT INTO article_teams (article_id, team_id) VALUES (%s, %s)",
+                        [(i, team_ids[i % 6]) for i in ids] + [(i, team_ids[(i + 1) % 6]) for i in ids if i % 3 == 0])
+        conn.commit()
+    cur.close()
+
+
+class RandomEncoder:
+    """Stand-in for SentenceTransformer: random vectors of its size."""
+
+    def __init__(self, seed=0):
+        self._rng = np.random.default_rng(seed)
+
+    def encode(self, texts, show_progress_bar=False):
+        return self._rng.standard_normal((len(texts), EMBEDDING_DIM), dtype=np.float32)
+
+
+class LinearClassifier:
+    """Stand-in for the sklearn pipeline: softmax of a random linear map of the embedding."""
+
+    def __init__(self, seed=0):
+        self.classes_ = np.arange(TOPICS)
+        self._weights = np.random.default_rng(seed).standard_normal((EMBEDDING_DIM, TOPICS)).astype(np.float32)
+
+    def predict_proba(self, X):
+        scores = X @ self._weights
+        scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def buffered(path, chunk) -> int:
+    """Before: fetchall into a DataFrame, batches of it, one executemany at the end."""
+    con = SQLiteConnection(path)
+    cursor = con.cursor()
+    cursor.execute(unlabeled_topics_query(SQLITE))
+    rows = cursor.fetchall()
+    articles = pd.DataFrame(rows)
+    clf, sbert = LinearClassifier(), RandomEncoder()
+    upsert_rows = []
+    for start in range(0, len(articles), chunk):
+        upsert_rows += classify_batch(clf, sbert, cursor, articles.iloc[start:start + chunk])
+    cursor.executemany(upsert_sql(SQLITE), upsert_rows)
+    con.commit()
+    con.close()
+    return len(upsert_rows)
+
+
+def streamed(path, chunk) -> int:
+    """After: classify_pending, chunks streamed on one connection, texts and upserts on another."""
+    read_con = SQLiteConnection(path)
+    con = SQLiteConnection(path)
+    n = classify_pending(LinearClassifier(), RandomEncoder(), read_con, con, chunk)
+    con.close()
+    read_con.close()
+    return n
+
+
+def reset(path):
+    """Deletes the classified rows and the embeddings, so the next run finds the whole corpus pending."""
+    con = SQLiteConnection(path)
+    cur = con.cursor()
+    cur.execute("DELETE FROM weekly_topic")
+    cur.execute("DELETE FROM article_embeddings")
+    con.commit()
+    con.close()
+
+
+def measure(run, path, chunk) -> tuple:
+    """(peak MB, seconds, rows) of a run."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = run(path, chunk)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    reset(path)
+    return peak / 1e6, seconds, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="50000,100000,200000", help="corpus sizes, in articles")
+    parser.add_argument("--chunk", type=int, default=256, help="rows per batch (BATCH_SIZE of classify_topics.py)")
+    args = parser.parse_args()
+    # The pipeline logs every committed batch
+    logging.disable(logging.INFO)
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    print(f"{'articles':>8} {'rows':>7} {'buffered MB':>12} {'streamed MB':>12} {'buffered s':>11} {'streamed s':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "bench.sqlite3"
+        conn = sqlite_connect(path)
+        built = 0
+        for size in sizes:
+            grow(conn, built, size)
+            built = size
+            before_mb, before_s, rows = measure(buffered, path, args.chunk)
+            after_mb, after_s, rows_after = measure(streamed, path, args.chunk)
+            assert rows == rows_after, (rows, rows_after)
+            print(f"{size:>8} {rows:>7} {before_mb:>12.1f} {after_mb:>12.1f} {before_s:>11.1f} {after_s:>11.1f}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Benchmark: team matching on the article corpus.
+# Compares the previous get_team_name (one regex built and run per team on every call)
+# with the registry's single-pass TeamMatcher, checks both return the same teams, and
+# shows how each scales from the Big Six to all 20 league clubs with hundreds of aliases.
+#
+# The corpus is data/articles.csv (written by notebooks/retrieve_articles.py) when present,
+# synthetic article bodies otherwise.
+#
+# Usage: python benchmarks/bench_team_matcher.py [--articles 2000]
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import pandas as pd
+from app.teams import FULL_TEXT_ALIASES, HEADLINE_ALIASES, TeamMatcher
+from synthetic import pages
+
+CORPUS_PATH = BASE_DIR / "data" / "articles.csv"
+
+# The rest of the league, to check how matching scales with the number of clubs
+OTHER_CLUBS = {"Aston Villa": ["Aston Villa", "Villa", "Villans", "Villa Park"],
+               "Bournemouth": ["Bournemouth", "Cherries", "Vitality Stadium"],
+               "Brentford": ["Brentford", "Bees", "Gtech Community Stadium"],
+               "Brighton": ["Brighton", "Brighton & Hove Albion", "Seagulls", "Amex"],
+               "Burnley": ["Burnley", "Clarets", "Turf Moor"],
+               "Crystal Palace": ["Crystal Palace", "Palace", "Eagles", "Selhurst Park"],
+               "Everton": ["Everton", "Toffees", "Goodison Park"],
+               "Fulham": ["Fulham", "Cottagers", "Craven Cottage"],
+               "Leeds United": ["Leeds United", "Leeds", "Elland Road"],
+               "Newcastle United": ["Newcastle United", "Newcastle", "Magpies", "St James' Park"],
+               "Nottingham Forest": ["Nottingham Forest", "Forest", "City Ground"],
+               "Sunderland": ["Sunderland", "Black Cats", "Stadium of Light"],
+               "West Ham United": ["West Ham United", "West Ham", "Hammers", "London Stadium"],
+               "Wolverhampton Wanderers": ["Wolverhampton Wanderers", "Wolves", "Molineux"]}
+
+
+def legacy_get_team_name(text, teams) -> list:
+    """The previous implementation: one regex compiled and searched per team."""
+    named_teams = []
+    for team in teams:
+        pattern = r"\b(" + "|".join(teams[team]) + r")\b"
+        if re.search(pattern, text, re.IGNORECASE):
+            named_teams.append(team)
+    return named_teams
+
+
+def with_extra_aliases(aliases, per_team) -> dict:
+    """Adds per_team synthetic aliases (e.g. player names) to every team."""
+    return {team: names + [f"{team.split()[0]} Player{i}" for i in range(per_team)]
+            for team, names in aliases.items()}
+
+
+def load_corpus(n_articles) -> list:
+    if CORPUS_PATH.exists():
+        return pd.read_csv(CORPUS_PATH)["Full_text"].dropna().astype(str).tolist()
+    return [page[page.index("<article") if "<article" in page else 0:]
+            for page in pages("bbc", n_articles)]
+
+
+def timed(func, texts) -> tuple:
+    start = time.perf_counter()
+    results = [func(text) for text in texts]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=2000, help="synthetic articles if there is no corpus")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.articles)
+    print(f"corpus: {len(texts)} articles, {sum(map(len, texts)) / 2**20:.1f} MiB of text")
+
+    # Same teams as before: check the results are identical, on headline-sized
+    # snippets (what get_team_name sees) and on full article bodies
+    matcher = TeamMatcher(HEADLINE_ALIASES)
+    for label, inputs in (("headlines", [text[:300] for text in texts]), ("full text", texts)):
+        old, old_time = timed(lambda text: legacy_get_team_name(text, HEADLINE_ALIASES), inputs)
+        new, new_time = timed(matcher.find_teams, inputs)
+        assert old == new, "the matcher must find exactly the same teams"
+        print(f"{label}: legacy {old_time:.2f}s, matcher {new_time:.2f}s ({old_time / new_time:.1f}x)")
+
+    print(f"{'clubs':>5} {'aliases':>8} {'legacy s':>9} {'matcher s':>10}")
+    for clubs in (FULL_TEXT_ALIASES, dict(FULL_TEXT_ALIASES, **OTHER_CLUBS)):
+        for per_team in (0, 10, 25):
+            aliases = with_extra_aliases(clubs, per_team)
+            n_aliases = sum(map(len, aliases.values()))
+            matcher = TeamMatcher(aliases)
+            _, old_time = timed(lambda text: legacy_get_team_name(text, aliases), texts)
+            _, new_time = timed(matcher.find_teams, texts)
+            print(f"{len(aliases):>5} {n_aliases:>8} {old_time:>9.2f} {new_time:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# Benchmark: the week queries of the pipelines and the app, before and after the stored
+# articles.week_start column and its indexes (migrations 006_add_article_week_start.sql and
+# 009_add_cluster_and_publication_date_indexes.sql).
+# Builds a synthetic database on the embedded SQLite backend: N articles spread over WEEKS weeks,
+# a third of them about two teams, every pair classified except the current week and clustered
+# except the last two weeks (the state the weekly pipeline finds), storylines and keywords.
+# "before" drops those indexes and runs the queries as they were written before (week
+# computed from publication_date in the SELECT, the join and the WHERE); "after" creates the
+# indexes (the time the migration takes) and runs the queries of app/queries.py.
+# Prints the query plans (EXPLAIN QUERY PLAN) and the median time of every query.
+#
+# Usage: python benchmarks/bench_week_queries.py [--articles 1000000] [--repeat 3]
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR))
+
+from app.dialects import SQLITE
+from app.queries import (TRENDS_QUERY, WEEK_DATA_QUERY, cluster_keywords_query, unclustered_query,
+                         unlabeled_topics_query)
+from app.sqlite_backend import sqlite_connect
+from app.teams import TEAM_IDS
+
+# Weeks of articles in the synthetic database
+WEEKS = 150
+# Storylines and keywords per team and week
+CLUSTERS = 8
+KEYWORDS = 8
+TEAM = "Arsenal"
+# Indexes added by migrations 006 and 009 (app/schema/sqlite_schema.sql)
+INDEXES = {
+    "articles_week_start": "CREATE INDEX articles_week_start ON articles (week_start)",
+    "weekly_topic_team_week_topic": "CREATE INDEX weekly_topic_team_week_topic ON weekly_topic (team_id, week_start, topic_id)",
+    "weekly_topic_cluster": "CREATE INDEX weekly_topic_cluster ON weekly_topic (cluster_id)",
+    "articles_publication_date": "CREATE INDEX articles_publication_date ON articles (publication_date)",
+}
+
+
+def legacy_unlabeled_topics_query(dialect) -> str:
+    """The query of classify_topics.py before migration 006 (without the text, moved out by 007)."""
+    week_start = dialect.week_start("a.publication_date")
+    week_end = dialect.week_end("a.publication_date")
+    return f"""
+    SELECT at.team_id, a.id AS article_id, COALESCE(a.duplicate_of, a.id) AS original_id,
+        {week_start} AS week_start, {week_end} AS week_end
+    FROM article_teams at
+    JOIN articles a ON a.id = at.article_id
+    LEFT JOIN weekly_topic wt
+        ON wt.article_id = a.id AND wt.team_id = at.team_id
+        AND wt.week_start = {week_start} AND wt.week_end = {week_end}
+    WHERE wt.topic_id IS NULL;
+    """
+
+
+def legacy_unclustered_query(dialect) -> str:
+    """The query of cluster_and_keywords.py before migration 006 (without the text, moved out by 007)."""
+    week_start = dialect.week_start("a.publication_date")
+    week_end = dialect.week_end("a.publication_date")
+    return f"""
+    SELECT at.team_id, a.id AS article_id, COALESCE(a.duplicate_of, a.id) AS original_id,
+        {week_start} AS week_start, {week_end} AS week_end, wt.topic_id
+    FROM article_teams at
+    JOIN articles a ON a.id = at.article_id
+    LEFT JOIN weekly_topic wt
+        ON wt.article_id = a.id AND wt.team_id = at.team_id
+        AND wt.week_start = {week_start} AND wt.week_end = {week_end}
+    WHERE wt.cluster_id IS NULL
+        AND {week_end} < {dialect.current_date()}
+    """
+
+
+def build(path, n) -> tuple:
+    """
+    Fills a new database with n synthetic articles and their weekly rows.
+    Returns:
+        tuple: The open connection, and the (week_start, week_end) ISO dates of the last clustered week.
+    """
+    conn = sqlite_connect(path)
+    cur = conn.cursor()
+    rng = random.Random(0)
+    now = datetime.now()
+    span = timedelta(weeks=WEEKS)
+    team_ids = sorted(TEAM_IDS.values())
+    cur.executemany("INSERT INTO outlets (id, name) VALUES (%s, %s)", [(1, "BBC"), (2, "TheGuardian"), (3, "SkySports")])
+    cur.executemany("INSERT INTO teams (id, name) VALUES (%s, %s)", [(team_id, team) for team, team_id in TEAM_IDS.items()])
+    cur.executemany("INSERT INTO articles (id, link, title, publication_date, outlet_id) VALUES (%s, %s, %s, %s, %s)",
+                    ((i, f"https://bench.invalid/article/{i}", f"Article {i}", now - span * (i / n),
+                      rng.randint(1, 3)) for i in range(1, n + 1)))
+    cur.executemany("INSERT INTO article_teams (article_id, team_id) VALUES (%s, %s)",
+                    ((i, team_ids[i % 6]) for i in range(1, n + 1)))
+    cur.executemany("INSERT INTO article_teams (article_id, team_id) VALUES (%s, %s)",
+                    ((i, team_ids[(i + 1) % 6]) for i in range(3, n + 1, 3)))
+
+    # Classified up to the last week, clustered up to the week before
+    current = SQLITE.week_start(SQLITE.current_date())
+    cur.execute(f"""
+    INSERT INTO weekly_topic (team_id, week_start, week_end, article_id, cluster_id, topic_id, topic_probability)
+    SELECT at.team_id, a.week_start, date(a.week_start, '+6 days'), a.id,
+        CASE WHEN a.week_start < date({current}, '-7 days') THEN a.id % {CLUSTERS} END, a.id % 6, 0.5
+    FROM article_teams at JOIN articles a ON a.id = at.article_id
+    WHERE a.week_start < {current}
+    """)
+    cur.execute("""
+    INSERT INTO weekly_clusters (team_id, week_start, week_end, cluster_id, size)
+    SELECT team_id, week_start, week_end, cluster_id, COUNT(*) FROM weekly_topic
+    WHERE cluster_id IS NOT NULL GROUP BY team_id, week_start, week_end, cluster_id
+    """)
+    cur.executemany("""
+    INSERT INTO weekly_keywords (team_id, week_start, week_end, cluster_id, keyword, score)
+    SELECT team_id, week_start, week_end, cluster_id, %s, %s FROM weekly_clusters
+    """, [(f"keyword{k}", round(rng.uniform(-1, 1), 3)) for k in range(KEYWORDS)])
+    conn.commit()
+
+    cur.execute(f"SELECT date({current}, '-14 days') AS week_start, date({current}, '-8 days') AS week_end")
+    week = cur.fetchone()
+    cur.close()
+    return conn, (week["week_start"], week["week_end"])
+
+
+def queries(week, legacy) -> dict:
+    """The queries of a weekly pipeline run and an app page load, by name: (query, params)."""
+    return {
+        "classify": (legacy_unlabeled_topics_query(SQLITE) if legacy else unlabeled_topics_query(SQLITE), None),
+        "cluster": (legacy_unclustered_query(SQLITE) if legacy else unclustered_query(SQLITE), None),
+        "app week": (WEEK_DATA_QUERY, (TEAM,) + week),
+        "app keywords": (cluster_keywords_query(SQLITE), (TEAM,) + week),
+        "app trends": (TRENDS_QUERY, (TEAM,)),
+    }
+
+
+def measure(conn, week, legacy, repeat) -> dict:
+    """Prints the plan of every query and returns its (median seconds, rows)."""
+    results = {}
+    cur = conn.cursor()
+    for name, (query, params) in queries(week, legacy).items():
+        cur.execute("EXPLAIN QUERY PLAN " + query, params)
+        print(f"  {name}:")
+        for row in cur.fetchall():
+            print(f"    {row['detail']}")
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cur.execute(query, params)
+            rows = len(cur.fetchall())
+            times.append(time.perf_counter() - start)
+        results[name] = (statistics.median(times), rows)
+    cur.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        conn, week = build(Path(directory) / "bench.sqlite3", args.articles)
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM weekly_topic")
+        print(f"built {args.articles} articles, {cur.fetchone()['n']} weekly_topic rows "
+              f"in {time.perf_counter() - start:.1f} s\n")
+
+        print("before:")
+        for name in INDEXES:
+            cur.execute(f"DROP INDEX {name}")
+        before = measure(conn, week, True, args.repeat)
+
+        start = time.perf_counter()
+        for statement in INDEXES.values():
+            cur.execute(statement)
+        conn.commit()
+        print(f"\nafter (indexes created in {time.perf_counter() - start:.1f} s):")
+        after = measure(conn, week, False, args.repeat)
+        cur.close()
+        conn.close()
+
+    print(f"\n{'query':<13} {'rows':>6} {'before s':>9} {'after s':>8} {'speedup':>8}")
+    for name, (seconds, rows) in before.items():
+        seconds_after, rows_after = after[name]
+        assert rows == rows_after, (name, rows, rows_after)
+        print(f"{name:<13} {rows:>6} {seconds:>9.3f} {seconds_after:>8.3f} {seconds / seconds_after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
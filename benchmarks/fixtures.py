@@ -0,0 +1,74 @@
+# Fixture corpus for the offline scraper benchmarks.
+# Layout, one directory per outlet:
+#   benchmarks/fixtures/<outlet>/feed.xml      the recorded RSS feed
+#   benchmarks/fixtures/<outlet>/pages/*.html  the recorded article pages
+#   benchmarks/fixtures/<outlet>/index.json    article URL -> page file name
+# When nothing was recorded, an equivalent synthetic corpus is generated in memory.
+
+import hashlib
+import json
+import random
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import synthetic
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Outlet directory -> base URL of the synthetic article links
+OUTLET_SITES = {"bbc": "https://www.bbc.co.uk/sport/football/articles",
+                "sky": "https://www.skysports.com/football/news",
+                "theguardian": "https://www.theguardian.com/football"}
+
+
+def page_name(url) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".html"
+
+
+def save(outlet, feed, pages, root=FIXTURES_DIR):
+    """
+    Writes a recorded feed and its article pages.
+    Args:
+        outlet (str): The outlet directory name.
+        feed (bytes): The RSS feed content.
+        pages (dict): Article URL -> page content (bytes).
+    """
+    outlet_dir = Path(root) / outlet
+    (outlet_dir / "pages").mkdir(parents=True, exist_ok=True)
+    (outlet_dir / "feed.xml").write_bytes(feed)
+    index = {}
+    for url, content in pages.items():
+        index[url] = page_name(url)
+        (outlet_dir / "pages" / index[url]).write_bytes(content)
+    (outlet_dir / "index.json").write_text(json.dumps(index, indent=2), encoding="utf-8")
+
+
+def load(outlet, root=FIXTURES_DIR, n_synthetic=60):
+    """
+    Loads the recorded corpus of an outlet, or builds a synthetic one.
+    Returns:
+        Tuple[bytes, dict]: The feed content and article URL -> page content.
+    """
+    outlet_dir = Path(root) / outlet
+    if (outlet_dir / "index.json").exists():
+        index = json.loads((outlet_dir / "index.json").read_text(encoding="utf-8"))
+        pages = {url: (outlet_dir / "pages" / name).read_bytes() for url, name in index.items()}
+        return (outlet_dir / "feed.xml").read_bytes(), pages
+
+    rng = random.Random(0)
+    entries = synthetic.feed_entries(rng, n_synthetic, OUTLET_SITES[outlet])
+    # Every fifth BBC page is a women's football article
+    builder = synthetic.PAGE_BUILDERS[outlet]
+    pages = {}
+    for i, entry in enumerate(entries):
+        page = builder(rng, womens=(i % 5 == 0)) if outlet == "bbc" else builder(rng)
+        pages[entry["link"]] = page.encode("utf-8")
+    return synthetic.feed_xml(entries).encode("utf-8"), pages
+
+
+def rewrite_feed(feed, url_map) -> bytes:
+    """Points the article links of a recorded feed to other URLs (e.g. the local stand-in)."""
+    for old, new in url_map.items():
+        feed = feed.replace(old.encode("utf-8"), new.encode("utf-8"))
+        feed = feed.replace(escape(old).encode("utf-8"), escape(new).encode("utf-8"))
+    return feed
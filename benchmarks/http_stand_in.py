@@ -0,0 +1,98 @@
+# Local HTTP stand-in for the outlet websites.
+# Serves recorded (or synthetic) pages from memory with an optional artificial latency,
+# gzip-compresses responses when the client asks for it, answers conditional requests
+# with 304 Not Modified and counts the bytes sent. Paths listed in statuses get that status code instead.
+
+import gzip
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInServer:
+    """
+    Serves a dict of path -> (body bytes, content type) on 127.0.0.1.
+    Use it as a context manager; base_url is available once started.
+    """
+
+    def __init__(self, routes, latency=0.0):
+        self.routes = routes
+        self.latency = latency
+        # Path -> status code answered instead of the route, to emulate failing pages
+        self.statuses = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes on a keep-alive connection: without TCP_NODELAY,
+            # Nagle's algorithm and the client's delayed ACK stall every response by ~40 ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                # The counters are updated before responding, so the client never reads them behind
+                status = stand_in.statuses.get(self.path)
+                if status is not None:
+                    with stand_in._lock:
+                        stand_in.requests += 1
+                    self.send_response(status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                route = stand_in.routes.get(self.path)
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, content_type = route
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with stand_in._lock:
+                        stand_in.requests += 1
+                        stand_in.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("ETag", etag)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=5)
+                    self.send_header("Content-Encoding", "gzip")
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    stand_in.bytes_sent += len(body)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def url(self, path) -> str:
+        return self.base_url + path
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,71 @@
+# Records the RSS feeds and article pages of every outlet into the fixture corpus
+# (see benchmarks/fixtures.py), so the scraper benchmarks can replay them offline.
+#
+# Usage:
+#   python benchmarks/record_fixtures.py                 fetch the live feeds and pages once
+#   python benchmarks/record_fixtures.py --from-archive  rebuild fixtures from the raw HTML archive
+
+import argparse
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "scraper"))
+sys.path.append(str(BASE_DIR / "benchmarks"))
+
+import feedparser
+import bbc_scraper
+import fixtures
+import sky_scraper
+import theguardian_scraper
+from archive import PageArchive
+from fetch import Fetcher
+
+OUTLETS = {"bbc": bbc_scraper, "sky": sky_scraper, "theguardian": theguardian_scraper}
+
+
+def record_live(outlet, module, fetcher, max_pages):
+    feed = fetcher.get(module.FEED_URL).content
+    links = [post.link for post in feedparser.parse(feed).entries][:max_pages]
+    pages = {}
+    for link, response in zip(links, fetcher.map(fetcher.get, links)):
+        if response.status_code == 200:
+            pages[link] = response.content
+    return feed, pages
+
+
+def record_from_archive(module, archive):
+    latest = archive.latest()
+    feed_entry = latest.get(module.FEED_URL)
+    if feed_entry is None:
+        return None, {}
+    feed = archive.load(feed_entry["sha256"])
+    pages = {}
+    for post in feedparser.parse(feed).entries:
+        entry = latest.get(post.link)
+        if entry is not None:
+            pages[post.link] = archive.load(entry["sha256"])
+    return feed, pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--from-archive", action="store_true", help="use the raw HTML archive instead of the network")
+    parser.add_argument("--max-pages", type=int, default=100, help="pages recorded per outlet")
+    args = parser.parse_args()
+
+    with Fetcher() as fetcher:
+        for outlet, module in OUTLETS.items():
+            if args.from_archive:
+                feed, pages = record_from_archive(module, PageArchive())
+            else:
+                feed, pages = record_live(outlet, module, fetcher, args.max_pages)
+            if feed is None:
+                print(f"{outlet}: no archived feed, skipped")
+                continue
+            fixtures.save(outlet, feed, pages)
+            print(f"{outlet}: recorded the feed and {len(pages)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Synthetic outlet pages and RSS feeds for the benchmarks.
+# The markup mirrors the selectors used by each outlet's get_details_from_url,
+# and every page is padded with navigation/script boilerplate to a realistic size.
+
+import random
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+TEAMS = ["Arsenal", "Chelsea", "Liverpool", "Man City", "Man Utd", "Spurs", "Everton", "Brighton"]
+WORDS = ("the manager said his side deserved more from a game they controlled for long spells "
+         "before a late goal changed everything at the stadium on saturday afternoon").split()
+
+
+def _sentence(rng, n_words=18) -> str:
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    words.insert(rng.randrange(len(words)), rng.choice(TEAMS))
+    return " ".join(words).capitalize() + "."
+
+
+def _boilerplate(rng, size=60_000) -> str:
+    # Navigation links and inline scripts dominate real article pages
+    links = "".join(f'<li><a href="/sport/football/{i}">Link {i}</a></li>' for i in range(400))
+    script = "<script>window.__DATA__=" + "x" * max(0, size - len(links)) + "</script>"
+    return f"<nav><ul>{links}</ul></nav>{script}"
+
+
+def bbc_page(rng, n_paragraphs=25, womens=False) -> str:
+    paragraphs = "".join(
+        f'<div data-component="text-block"><p>{_sentence(rng)}</p></div>' for _ in range(n_paragraphs)
+    )
+    womens_link = '<a href="/sport/football/womens">Women\'s Football</a>' if womens else ""
+    return (f"<html><head><title>BBC Sport</title></head><body>{_boilerplate(rng)}{womens_link}"
+            f'<article><div data-component="byline-block">'
+            f'<span class="ssrcss-12jkbjf-Text-TextContributorName e19uhciu6">Phil McNulty</span></div>'
+            f'<div data-component="subheadline-block"><h2>{_sentence(rng, 6)}</h2></div>'
+            f"{paragraphs}</article></body></html>")
+
+
+def sky_page(rng, n_paragraphs=25) -> str:
+    paragraphs = "".join(f"<p>{_sentence(rng)}</p>" for _ in range(n_paragraphs))
+    return (f"<html><head><title>Sky Sports</title></head><body>{_boilerplate(rng)}"
+            f'<span class="sdc-article-author__name">Sky Sports News</span>'
+            f'<div class="sdc-article-body sdc-article-body--lead">{paragraphs}</div></body></html>')
+
+
+def guardian_page(rng, n_paragraphs=25) -> str:
+    paragraphs = "".join(f"<p>{_sentence(rng)}</p>" for _ in range(n_paragraphs))
+    return (f"<html><head><title>The Guardian</title></head><body>{_boilerplate(rng)}"
+            f'<a rel="author" href="/profile/someone">Jacob Steinberg</a>'
+            f'<div data-gu-name="standfirst"><p>{_sentence(rng, 12)}</p></div>'
+            f'<div class="article-body-commercial-selector article-body-viewer-selector dcr-11jq3zt">'
+            f"{paragraphs}<p>Sign up to Football Daily</p></div></body></html>")
+
+
+PAGE_BUILDERS = {"bbc": bbc_page, "sky": sky_page, "theguardian": guardian_page}
+
+
+def feed_entries(rng, n_entries, base_url, now=None) -> list:
+    """
+    Builds n_entries synthetic feed entries published during the last day.
+    Returns a list of dicts with title, summary, link, published and category.
+    """
+    now = now or datetime.now()
+    entries = []
+    for i in range(n_entries):
+        published = now - timedelta(minutes=rng.randrange(24 * 60 - 1))
+        entries.append({
+            "title": _sentence(rng, 8),
+            "summary": _sentence(rng, 14),
+            "link": f"{base_url}/article/{i}",
+            "published": published,
+            "category": "News Story",
+        })
+    return entries
+
+
+def feed_xml(entries) -> str:
+    """Renders feed entries as an RSS 2.0 document."""
+    items = "".join(
+        "<item>"
+        f"<title>{escape(e['title'])}</title>"
+        f"<description>{escape(e['summary'])}</description>"
+        f"<link>{escape(e['link'])}</link>"
+        f"<guid>{escape(e['link'])}</guid>"
+        # The scrapers drop the last token of the date (the timezone name)
+        f"<pubDate>{format_datetime(e['published']).rsplit(' ', 1)[0]} GMT</pubDate>"
+        f"<category>{escape(e['category'])}</category>"
+        "</item>"
+        for e in entries
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Football</title>{items}</channel></rss>'
+
+
+def pages(outlet, n_pages, seed=0) -> list:
+    """Returns n_pages synthetic article pages for the outlet."""
+    rng = random.Random(seed)
+    return [PAGE_BUILDERS[outlet](rng) for _ in range(n_pages)]
@@ -1,14 +1,16 @@
 import pandas as pd
 import re
 import os
+from app.bodies import decompress_body
 from app.db import get_conn  # connection with Aiven DB
+from app.teams import FULL_TEXT_MATCHER, TEAM_NAMES
 
-def get_teams_from_article(row, teams, team_id_map) -> list:
+def get_teams_from_article(row, matcher, team_id_map) -> list:
     """
     Extracts the teams mentioned in the article's full text.
     Args:
         row (pd.Series): A row from the DataFrame containing article data.
-        teams (dict): A dictionary mapping team names to their aliases.
+        matcher (TeamMatcher): The precompiled matcher with the teams and their aliases.
         team_id_map (dict): A dictionary mapping team IDs to their names.
     Returns:
         list: A list of teams mentioned in the article.
@@ -16,13 +18,9 @@ def get_teams_from_article(row, teams, team_id_map) -> list:
     
     teams_article = []
         
-    # Count the occurrences of each team in the article's full text
-    counts = {team: 0 for team in teams}
-    for team in teams:
-        alias = teams[team] 
-        pattern = re.compile(r"\b("+alias+r")\b", re.IGNORECASE)
-        matches = pattern.findall(row.full_text)
-        counts[team] = len(matches)
+    # Count the occurrences of each team in the article's full text (single scan for all the teams)
+    counts = {team: 0 for team in matcher.teams}
+    counts.update(matcher.count_mentions(row.full_text))
 
     # Append the team with the most mentions to the teams_article list
     most_counted_team = max(counts, key=counts.get)
@@ -48,9 +46,10 @@ if __name__ == "__main__":
     mycursor = conn.cursor(buffered=True)
 
     # Query to retrieve all articles from the database
-    query = "SELECT article_id, full_text, team_id, outlet_id, publication_date, title " \
+    query = "SELECT article_teams.article_id, body, team_id, outlet_id, publication_date, title " \
     "FROM article_teams " \
     "INNER JOIN articles ON articles.id=article_teams.article_id " \
+    "INNER JOIN article_bodies ON article_bodies.article_id=articles.id " \
     "ORDER BY publication_date DESC"
     mycursor.execute(query)
 
@@ -58,6 +57,8 @@ if __name__ == "__main__":
     rows = mycursor.fetchall()
     columns = [i[0] for i in mycursor.description]
     articles_raw = pd.DataFrame(rows, columns=columns)
+    # The bodies are stored compressed
+    articles_raw["full_text"] = articles_raw.pop("body").map(decompress_body)
 
     # Group by article_id and aggregate team_ids into a list
     articles = articles_raw.groupby(
@@ -69,25 +70,11 @@ if __name__ == "__main__":
     conn.close()
 
     # Define mappings for team and outlet IDs to names
-    team_id_map = {1: "Arsenal", 
-                2: "Chelsea",
-                3: "Liverpool",
-                4: "Manchester City",
-                5: "Manchester United",
-                6: "Tottenham Hotspur"}
+    team_id_map = TEAM_NAMES
     outlet_id_map = {1: "BBC",
                     2: "TheGuardian",    
                     3: "SkySports"}
     
-    # Define the teams and their aliases
-    # This is a dictionary where the key is the team name and the value is a regex
-    teams = {"Arsenal": "Arsenal|Gunners|Emirates",
-             "Chelsea": "Chelsea|Blues|Stamford Bridge",
-             "Manchester United": "Manchester United|Man Utd|Red Devils|Man United|Old Trafford|United",
-             "Liverpool": "Liverpool|Reds|Anfield",
-             "Manchester City": "Manchester City|Man City|Citizens|Etihad|Guardiola|City",
-             "Tottenham Hotspur": "Tottenham Hotspur|Spurs|Tottenham|White Hart Lane"}
-    
     # Create a list to hold all rows of the sentences DataFrame
     all_rows = []
     # Iterate through each article and split the full text into paragraphs
@@ -101,7 +88,7 @@ if __name__ == "__main__":
             continue
 
         # Get the teams mentioned in the article
-        teams_article = get_teams_from_article(row, teams, team_id_map)
+        teams_article = get_teams_from_article(row, FULL_TEXT_MATCHER, team_id_map)
             
         # Now we create a row for the combination of paragraph and team
         for team in teams_article: 
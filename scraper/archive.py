@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+# Where the fetched pages are archived
+BASE_DIR = Path(__file__).resolve().parents[1]
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", BASE_DIR / "data" / "archive"))
+# Fetches are kept this many days before being deleted (the daily workflow caches the archive,
+# and the cache is limited in size)
+ARCHIVE_RETENTION_DAYS = 90
+
+
+class PageArchive:
+    """
+    Compressed, content-addressed archive of every fetched page.
+    Page contents are stored once, gzip-compressed, under their SHA-256 in objects/,
+    and index.jsonl records which URL was fetched at which time with which content.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest) -> Path:
+        return self.objects_dir / digest[:2] / (digest + ".gz")
+
+    def store(self, url, content, fetched_at=None) -> str:
+        """
+        Archives the content of a fetched page.
+        Args:
+            url (str): The URL of the page.
+            content (bytes): The raw content of the page.
+            fetched_at (datetime): When the page was fetched. Defaults to now (UTC).
+        Returns:
+            str: The SHA-256 of the content.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        # Identical contents (e.g. a page fetched again unchanged) are only stored once
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a truncated object
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(gzip.compress(content, compresslevel=6))
+            os.replace(tmp_path, path)
+
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        entry = {"url": url, "fetched_at": fetched_at.isoformat(), "sha256": digest, "size": len(content)}
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return digest
+
+    def load(self, digest) -> bytes:
+        """
+        Returns the content stored under a SHA-256.
+        Args:
+            digest (str): The SHA-256 of the content.
+        Returns:
+            bytes: The raw page content.
+        """
+        return gzip.decompress(self._object_path(digest).read_bytes())
+
+    def entries(self):
+        """Yields every index entry (dicts with url, fetched_at, sha256 and size) in fetch order."""
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def latest(self) -> dict:
+        """
+        Returns the most recent fetch of every archived URL.
+        Returns:
+            dict: URL -> index entry.
+        """
+        latest = {}
+        for entry in self.entries():
+            current = latest.get(entry["url"])
+            if current is None or entry["fetched_at"] >= current["fetched_at"]:
+                latest[entry["url"]] = entry
+        return latest
+
+    def prune(self, retention_days=ARCHIVE_RETENTION_DAYS) -> tuple:
+        """
+        Drops the index entries older than the retention, then the objects no entry refers to anymore.
+        Returns:
+            tuple: (index entries dropped, objects deleted).
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        with self._lock:
+            entries = list(self.entries())
+            kept = []
+            for entry in entries:
+                fetched_at = datetime.fromisoformat(entry["fetched_at"])
+                if fetched_at.tzinfo is None:
+                    fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+                if fetched_at >= cutoff:
+                    kept.append(entry)
+            if len(kept) < len(entries):
+                # Rewritten atomically, a crash leaves the old index
+                fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(entry) + "\n" for entry in kept)
+                os.replace(tmp_path, self.index_path)
+
+        # Objects are shared by identical contents: only those no kept entry refers to are deleted
+        referenced = {entry["sha256"] for entry in kept}
+        deleted = 0
+        for path in self.objects_dir.glob("*/*.gz"):
+            if path.name[:-len(".gz")] not in referenced:
+                path.unlink()
+                deleted += 1
+        return len(entries) - len(kept), deleted
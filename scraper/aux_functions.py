@@ -1,25 +1,15 @@
-import re
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from app.teams import HEADLINE_MATCHER
 
 def get_team_name(text) -> list: 
     """
-    Extracts the team name from the text.
-    This is a placeholder function and should be implemented based on specific requirements.
+    Extracts the team names mentioned in the text.
+    Uses the shared team registry, which finds every team and alias in a single scan.
+    Args:
+        text (str): The text to scan, usually the title and summary of a feed entry.
+    Returns:
+        list: The names of the teams mentioned in the text.
     """
-    named_teams = []
-    # Example implementation: return the first word as the team name
-    teams = {"Arsenal": "Arsenal|Gunners",
-              "Chelsea": "Chelsea|Blues",
-              "Manchester United": "Manchester United|Man Utd|Red Devils|Man United",
-              "Liverpool": "Liverpool|Reds",
-              "Manchester City": "Manchester City|Man City",
-              "Tottenham Hotspur": "Tottenham Hotspur|Spurs|Tottenham"}
-    
-    # Iterate through the teams dictionary to find matches in the text
-    for team in teams:
-        alias = teams[team]
-        # Create a regex pattern to match the team name or its aliases
-        pattern = r"\b(" + alias + r")\b"
-        if re.search(pattern, text, re.IGNORECASE):
-            named_teams.append(team)    
-    
-    return named_teams
\ No newline at end of file
+    return HEADLINE_MATCHER.find_teams(text)
@@ -1,23 +1,34 @@
-import feedparser
-from datetime import datetime
-import pandas as pd
-from aux_functions import get_team_name
-import requests
-from bs4 import BeautifulSoup
-from typing import Tuple
-
-
-def get_details_from_url(url) -> Tuple[str, str]:
+from feed_scraper import scrape_feed
+from fetch import get_fetcher
+from parsing import OutletStrainer, Selector, parse_page
+from records import ArticleRecord
+from typing import Iterator, Tuple
+
+# URL of the BBC RSS feed to parse
+FEED_URL = "https://feeds.bbci.co.uk/sport/football/rss.xml"
+# Outlet name stored with the articles, also the name of its circuit breaker in the fetcher
+OUTLET = "BBC"
+
+# Only the subtrees read by parse_article are parsed: the womens football section link,
+# the byline and the text/subheadline blocks of the article body
+PARSE_ONLY = OutletStrainer([
+    Selector("a", "href", ["/sport/football/womens"]),
+    Selector("div", "data-component", ["byline-block", "text-block", "subheadline-block"]),
+])
+
+
+def parse_article(content) -> Tuple[bool, str, str]:
     """
-    Extracts the article text and authors from a given URL. 
+    Parses a BBC article page in a single pass.
     Args:
-        url (str): The URL of the article to be processed.
+        content (bytes): The HTML content of the article page.
     Returns:
-        Tuple[str, str]: A tuple containing the cleaned article text and the author's name.
+        Tuple[bool, str, str]: Whether the post is related to mens football, the cleaned article text and the author's name.
     """
-    # Send a GET request to the URL
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
+    soup = parse_page(content, PARSE_ONLY)
+
+    # Check if the womens football section is present in the HTML content
+    mens_football = soup.find("a", attrs={"href": "/sport/football/womens"}) is None
 
     # Find the author name in the HTML content
     # If the author is not found, return an empty string
@@ -38,90 +49,70 @@ def get_details_from_url(url) -> Tuple[str, str]:
         for paragraph in html_text: 
             cleaned_text += paragraph.text.strip() + "\n" 
     
+    return (mens_football, cleaned_text, author)
+
+
+def get_page_details(url, fetcher=None) -> Tuple[bool, str, str]:
+    """
+    Downloads and parses a BBC article page. The page is fetched and parsed only
+    once per run, later calls with the same URL reuse the fetcher's cached result.
+    Args:
+        url (str): The URL of the article to be processed.
+        fetcher (Fetcher): The fetch engine used to download the page. Defaults to the shared one.
+    Returns:
+        Tuple[bool, str, str]: Whether the post is related to mens football, the cleaned article text and the author's name.
+    """
+    return (fetcher or get_fetcher()).parse(url, parse_article, circuit=OUTLET)
+
+
+def get_details_from_url(url, fetcher=None) -> Tuple[str, str]:
+    """
+    Extracts the article text and authors from a given URL. 
+    Args:
+        url (str): The URL of the article to be processed.
+        fetcher (Fetcher): The fetch engine used to download the page. Defaults to the shared one.
+    Returns:
+        Tuple[str, str]: A tuple containing the cleaned article text and the author's name.
+    """
+    _, cleaned_text, author = get_page_details(url, fetcher)
     return (cleaned_text, author)
 
 
-def check_mens_football(url) -> bool:
+def check_mens_football(url, fetcher=None) -> bool:
     """
     Checks if the post is related to womens football.
     Args:
         url (str): The URL of the article to be checked.    
+        fetcher (Fetcher): The fetch engine used to download the page. Defaults to the shared one.
     Returns:
         bool: True if the post is related to mens football, False otherwise.
     """
-    # Send a GET request to the URL
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
+    mens_football, _, _ = get_page_details(url, fetcher)
+    return mens_football
 
-    # Check if the womens football section is present in the HTML content
-    womens_football = soup.find("a", attrs={"href": "/sport/football/womens"})
-    if womens_football:
-        return False
-    else: 
-        return True
+
+def extract(post, page):
+    """
+    Returns the article text, the author and the summary of a parsed BBC article page,
+    or "womens_football" if the post is not related to mens football.
+    Args:
+        post: The feed entry of the article.
+        page (Tuple[bool, str, str]): The result of parse_article.
+    """
+    mens_football, article, author = page
+    if not mens_football:
+        return "womens_football"
+    return (article, author, post.summary)
 
 
-def bbc_scraper(lower_time, upper_time) -> pd.DataFrame:
+def bbc_scraper(lower_time, upper_time, fetcher=None, feed_state=None, known_links=None, feed_url=FEED_URL) -> Iterator[ArticleRecord]:
     """
     Scrapes the BBC Sport Football RSS feed for articles related to mens football within a specified time range.
     The articles are filtered based on the presence of specific team names in the title or summary.
-    The scraped articles are stored in a DataFrame.
+    The matching article pages are downloaded concurrently through the fetcher,
+    except for links found in known_links, which are already stored in the database.
+    A single fetch of every page returns the mens football check, the article text and the author.
+    The scraped articles are yielded one by one as ArticleRecord objects.
     """
-
-    # URL of the BBC RSS feed to parse
-    url = "https://feeds.bbci.co.uk/sport/football/rss.xml"
-
-    # Parse the RSS feed and store the results
-    newsfeed = feedparser.parse(url)
-    posts = newsfeed.entries
-
-    # Define the format for the published date in the RSS feed entries
-    news_format = "%a, %d %b %Y %H:%M:%S"
-
-    # Create an empty DataFrame to store the results
-    new_data = pd.DataFrame(columns=["Title", "Summary", "Link", "Date", "Author", "Teams", "Article", "Outlet"])
-
-    # Iterate over each post in the RSS feed
-    for post in posts: 
-        # Convert the published date to a datetime object removing the BST part
-        date_without_bst = " ".join(post.published.split(" ")[:-1])
-        new_comparison_time = datetime.strptime(date_without_bst, news_format)
-
-        # Extract team names from title and summary
-        teams = get_team_name(post.title + " " + post.summary)  
-
-        # Check if the post's published date is within the specified range,
-        # has the desired teams, and is not already in the previous data
-        if new_comparison_time >= lower_time \
-            and new_comparison_time <= upper_time \
-            and teams:
-
-            # Check if the post is related to mens football
-            mens_football = check_mens_football(post.link)
-            # If the post is not related to mens football, skip it
-            if not mens_football:
-                continue
-
-            # Get the article text and author from the URL
-            article, author = get_details_from_url(post.link)
-
-            # Skip if no article text is found
-            if article == "" or "WSL" in article: 
-                continue  
-
-            # Append the post details to the DataFrame
-            post = {
-                "Title": post.title,
-                "Summary": post.summary,
-                "Link": post.link,
-                "Date": new_comparison_time.strftime(news_format),
-                "Author": author,
-                "Teams": teams,
-                "Article": article, 
-                "Outlet": "BBC"
-            }
-            new_data = pd.concat([new_data, pd.DataFrame([post])], ignore_index=True)
-
-    return new_data
-
-    
\ No newline at end of file
+    yield from scrape_feed(OUTLET, feed_url, lower_time, upper_time, get_page_details, extract,
+                           fetcher, feed_state, known_links)
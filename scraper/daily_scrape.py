@@ -1,101 +1,138 @@
+import argparse
+import logging
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import partial
 from bbc_scraper import bbc_scraper
 from sky_scraper import sky_scraper
 from theguardian_scraper import theguardian_scraper
-import pandas as pd
+from fetch import Fetcher
+from archive import PageArchive
+from feed_state import FeedState
+from known_links import load_known_links
+from load_spool import BackgroundLoad
+from metrics import get_metrics
+from pipeline import OutletDone, scrape_concurrently
+from spool import Spool
+from watermarks import load_watermarks, scrape_window
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from app.db import get_conn
+from app.db import pooled_conn
 
+logging.basicConfig(level=logging.INFO)
 
 if __name__ == "__main__":
 
-    # Define the mappings for team and outlet IDs
-    TEAM_ID_MAP = {"Arsenal": 1, 
-                   "Chelsea": 2,
-                   "Liverpool": 3,
-                   "Manchester City": 4,
-                   "Manchester United": 5,
-                   "Tottenham Hotspur": 6}
-    OUTLET_ID_MAP = {"BBC": 1,
-                     "TheGuardian": 2,    
-                     "SkySports": 3}
-
-    # Get the current date and the last date (24 hours ago)
-    # Since the script is run daily, we can use the current date and the last date
-    date_format = "%Y-%m-%d %H:%M:%S.%f"
+    parser = argparse.ArgumentParser(description="Scrape the outlet feeds and store the new articles.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="refetch and update articles whose link is already stored")
+    parser.add_argument("--catch-up", action="store_true",
+                        help="scrape from each outlet's watermark however old it is (the feeds only list their latest entries)")
+    parser.add_argument("--no-load", action="store_true",
+                        help="only fill the spool, the articles are loaded later by scraper/load_spool.py")
+    args = parser.parse_args()
+
+    # Scrapers in the order they run, by outlet
+    SCRAPERS = {"SkySports": sky_scraper,
+                "BBC": bbc_scraper,
+                "TheGuardian": theguardian_scraper}
+
+    # Each outlet is scraped from its watermark (newest publication date stored) up to now,
+    # so a missed run leaves no gap and overlapping runs do not refetch the same window
     current_date = datetime.now()
-    last_date = current_date - timedelta(days=1)
-
-    # Scrape data from each source and combine the results
-    sky_df = sky_scraper(last_date, current_date)
-    bbc_df = bbc_scraper(last_date, current_date)
-    theguardian_df = theguardian_scraper(last_date, current_date)
-    articles = pd.concat([sky_df, bbc_df, theguardian_df], ignore_index=True)
-
-
-    # Connect to the database
-    timeout = 10
-    conn = get_conn()   
-    cur = conn.cursor()
-
-    # Define the date format for parsing the publication date
-    date_format = "%a, %d %b %Y %H:%M:%S"
-
-    # Iterate over each article in the DataFrame
-    for article in articles.itertuples(): 
-        # Extract the relevant fields from the article
-        title = article.Title
-        summary = article.Summary
-        link = article.Link
-        # Parse the publication date from the string to a datetime object
-        date = datetime.strptime(article.Date, date_format)
-        full_text = article.Article
-        raw_author = article.Author
-        # Handle the case where the author is NaN or an empty string
-        author = None if (pd.isna(raw_author) or raw_author=="") else raw_author
-        outlet = article.Outlet
-        # Clean the different team names from the Teams field
-        team_list = article.Teams
-
-        # Insert the outlet into the outlets table, or update it if it already exists
-        outlet_id = OUTLET_ID_MAP[outlet] 
-        cur.execute("INSERT INTO outlets (id, name) VALUES (%s, %s) ON DUPLICATE KEY UPDATE name = name", (outlet_id, outlet))
-        
-        # Insert the author into the authors table, or update it if it already exists
-        if author: 
-            cur.execute("INSERT INTO authors (name) VALUES (%s) ON DUPLICATE KEY UPDATE name = name", (author,))
-            cur.execute("SELECT id FROM authors WHERE name = %s", (author,))
-            # Obtain the author ID for the newly inserted or updated author
-            author_id = cur.fetchone()["id"]
-        else:
-            author_id = None
-
-        if pd.isna(summary): 
-            summary = None
-
-        # Insert the teams into the teams table, or update them if they already exist
-        team_ids = []
-        for team in team_list: 
-            cur.execute("INSERT INTO teams (id, name) VALUES (%s, %s) ON DUPLICATE KEY UPDATE name = name", (TEAM_ID_MAP[team], team))
-            team_ids.append(TEAM_ID_MAP[team])
-
-        # Insert the article into the articles table, or update it if it already exists
-        cur.execute("INSERT INTO articles (link, title, summary, publication_date, outlet_id, author_id, full_text) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s) "
-                    "ON DUPLICATE KEY UPDATE title = VALUES(title), summary = VALUES(summary), full_text = VALUES(full_text)",
-                    (link, title, summary, date, outlet_id, author_id, full_text))
-        # Obtain the article ID for the newly inserted or updated article
-        cur.execute("SELECT id FROM articles WHERE link = %s", (link,))
-        article_id = cur.fetchone()["id"]
-
-        # Insert the article-team relationships into the article_teams table
-        for team_id in team_ids: 
-            cur.execute("INSERT IGNORE INTO article_teams (article_id, team_id) VALUES (%s, %s)", (article_id, team_id))
-
-    # Commit the changes to the databases
-    conn.commit()
-    conn.close()
 
-    
\ No newline at end of file
+    # Stage timers and counters of this run, written as a JSON report and a Prometheus textfile at the end
+    metrics = get_metrics()
+    succeeded = False
+    try:
+        # Segments left open by a crashed run are complete up to their last full line
+        spool = Spool()
+        spool.recover()
+
+        # Read what the database already holds, the same connection then loads the spool while scraping
+        # (with --no-load it goes back to the pool instead)
+        with metrics.timer("db_read"):
+            conn = pooled_conn()
+            cur = conn.cursor()
+            watermarks = {} if args.refresh else load_watermarks(cur)
+            # Links already stored are skipped before any download, unless a refresh is requested
+            # (a refresh also ignores the feed state and the watermarks, so every entry of the last day is fetched again)
+            if args.refresh:
+                feed_state, known_links = None, None
+            else:
+                feed_state, known_links = FeedState(), load_known_links(cur)
+            cur.close()
+            if args.no_load:
+                conn.close()
+
+        # Scrape data from each source into the spool
+        # All the scrapers share the same fetcher, so connections are reused across the run,
+        # and every downloaded page is kept in the raw HTML archive
+        # The feed state lets every scraper skip unchanged feeds and entries processed in earlier runs
+        archive = PageArchive()
+        fetcher = Fetcher(archive=archive)
+        jobs = {}
+        for outlet, scraper in SCRAPERS.items():
+            (lower, upper), clamped = scrape_window(watermarks.get(outlet), current_date, args.catch_up)
+            if clamped:
+                logging.warning("%s was last ingested up to %s, only scraping since %s. Run with --catch-up to fill the gap.",
+                                outlet, watermarks[outlet], lower)
+            logging.info("Scraping %s from %s to %s.", outlet, lower, upper)
+            jobs[outlet] = partial(scraper, lower, upper, fetcher, feed_state, known_links)
+
+        # Every sealed segment is loaded in the background while the scrapers run, starting with the
+        # segments a failed load of an earlier run left behind
+        # If a load fails the articles stay in the spool for the next run (or scraper/load_spool.py)
+        background = None if args.no_load else BackgroundLoad(conn, spool).start()
+        try:
+            # Every outlet is scraped in its own thread, while this thread appends the articles to the spool
+            # The scrape stage is the wall-clock time of the concurrent scrape, the other stages add up across threads
+            with metrics.timer("scrape"):
+                newest = {}
+                n_articles = 0
+                for item in scrape_concurrently(jobs):
+                    if isinstance(item, OutletDone):
+                        # The watermark only moves if the outlet's scraper did not fail half-way
+                        if item.error is None:
+                            spool.outlet_done(item.outlet, newest.get(item.outlet))
+                        else:
+                            metrics.count("outlet_failed", outlet=item.outlet)
+                        # The outlet's last articles are loaded now, not once the slowest outlet finished
+                        spool.seal()
+                        if background is not None:
+                            background.notify()
+                        continue
+                    with metrics.timer("spool_write"):
+                        sealed = spool.append(item)
+                    if sealed and background is not None:
+                        background.notify()
+                    n_articles += 1
+                    newest[item.outlet] = max(newest.get(item.outlet, item.date), item.date)
+                    # Later scrapers of this run can skip the link as well
+                    if known_links is not None:
+                        known_links.add(item.link)
+            spool.close()
+            fetcher.close()
+            logging.info("Spooled %d articles.", n_articles)
+
+            # Fetches past the retention leave the archive, so the cached archive stops growing
+            dropped, deleted = archive.prune()
+            logging.info("Pruned %d archived fetches and %d page objects.", dropped, deleted)
+
+            # The articles are safely on disk, the feed state can record them as processed
+            if feed_state is not None:
+                feed_state.save()
+
+            # The load stage is the time the load still takes once scraping is over
+            if background is not None:
+                with metrics.timer("load"):
+                    background.finish()
+        finally:
+            if background is not None:
+                background.stop()
+                conn.close()
+        succeeded = True
+    finally:
+        # The report is written for failed runs as well, so an alert can fire on them
+        report_path = metrics.write(succeeded)
+        logging.info("Run metrics written to %s.", report_path)
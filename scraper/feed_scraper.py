@@ -0,0 +1,154 @@
+import logging
+from datetime import datetime
+from aux_functions import get_team_name
+from fetch import FetchError, HTTPStatusError, get_fetcher
+from metrics import get_metrics
+from feed_state import read_feed
+from records import ArticleRecord
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Format of the published date in the RSS feed entries, without its timezone (BST/GMT) part
+NEWS_FORMAT = "%a, %d %b %Y %H:%M:%S"
+
+
+def published_date(post) -> datetime:
+    """Converts the published date of a feed entry to a datetime object, removing the timezone part."""
+    date_without_bst = " ".join(post.published.split(" ")[:-1])
+    return datetime.strptime(date_without_bst, NEWS_FORMAT)
+
+
+def scrape_feed(outlet, feed_url, lower_time, upper_time, get_details, extract, fetcher=None, feed_state=None,
+                known_links=None, entry_filter: Optional[Callable] = None) -> Iterator[ArticleRecord]:
+    """
+    Scrapes an outlet's RSS feed for the articles published within a specified time range
+    that mention the teams in their title or summary. Shared by every outlet scraper, which only
+    provides how its article pages are parsed.
+    The matching article pages are downloaded concurrently through the fetcher,
+    except for links found in known_links, which are already stored in the database.
+    Args:
+        outlet (str): Outlet name stored with the articles, also the name of its circuit breaker in the fetcher.
+        feed_url (str): The URL of the outlet's RSS feed.
+        lower_time (datetime): Oldest publication date scraped.
+        upper_time (datetime): Newest publication date scraped.
+        get_details (callable): (url, fetcher) -> the parsed article page.
+        extract (callable): (post, page) -> (article text, author, summary), or the skip reason (str)
+            of a page that is not wanted.
+        fetcher (Fetcher): The fetch engine used to download the feed and the pages. Defaults to the shared one.
+        feed_state (FeedState): If given, only the entries not processed in previous runs are scraped.
+        known_links (set): Links already stored in the database, skipped before any download.
+        entry_filter (callable): post -> the skip reason (str) of an entry of the window that is not wanted, or None.
+    Yields:
+        ArticleRecord: The scraped articles, one by one.
+    """
+    fetcher = fetcher or get_fetcher()
+    metrics = get_metrics()
+
+    # Download and parse the RSS feed and store the results
+    # With a feed state only the entries not processed in previous runs are returned
+    # If the feed cannot be downloaded this outlet is skipped, the others still run
+    try:
+        with metrics.timer("feed", outlet=outlet):
+            posts = read_feed(feed_url, fetcher, feed_state, circuit=outlet)
+    except FetchError as e:
+        logger.error("Could not read the %s feed: %s", outlet, e)
+        return
+    metrics.count("feed_entries", len(posts), outlet=outlet)
+
+    # Select the posts whose article page has to be downloaded
+    candidates = []
+    for post in posts:
+        # Skip the links already stored in the database before downloading anything
+        if known_links is not None and post.link in known_links:
+            metrics.count("skipped", outlet=outlet, reason="known")
+            if feed_state is not None:
+                feed_state.mark_seen(feed_url, post)
+            continue
+
+        date = published_date(post)
+
+        # Extract team names from title and summary
+        with metrics.timer("team_match", outlet=outlet):
+            teams = get_team_name(post.title + " " + post.summary)
+
+        # Check if the post's published date is within the specified range,
+        # has the desired teams and passes the outlet's own filter
+        in_window = lower_time <= date <= upper_time
+        if not in_window:
+            reason = "out_of_window"
+        elif not teams:
+            reason = "no_teams"
+        else:
+            reason = entry_filter(post) if entry_filter is not None else None
+        if reason is None:
+            candidates.append((post, date, teams))
+        else:
+            metrics.count("skipped", outlet=outlet, reason=reason)
+            # Entries of this window that were filtered out need no more work in later runs
+            if feed_state is not None and in_window:
+                feed_state.mark_seen(feed_url, post)
+
+    def fetch(link) -> tuple:
+        # One bad page does not stop the rest, its error tells whether a later run can get it
+        try:
+            return get_details(link, fetcher), None
+        except Exception as e:
+            logger.warning("Skipping %s: %s", link, e)
+            return None, e
+
+    # Download and parse the article pages concurrently, results keep the order of the candidates
+    links = [post.link for post, _, _ in candidates]
+    details = fetcher.map(fetch, links)
+    failed = False
+    for (post, date, teams), (page, error) in zip(candidates, details):
+        if error is not None:
+            # Pages that are gone (404, 410) are marked as seen, retrying them is pointless
+            if isinstance(error, HTTPStatusError) and error.permanent:
+                metrics.count("skipped", outlet=outlet, reason="gone")
+                if feed_state is not None:
+                    feed_state.mark_seen(feed_url, post)
+                continue
+            # Other failed pages are not marked as seen. Only the transient ones (connection errors, timeouts,
+            # throttling and server errors past the retries, an open circuit) keep the feed's validators
+            # from being stored, so the next run downloads the feed again and retries them
+            metrics.count("skipped", outlet=outlet, reason="fetch_failed")
+            if isinstance(error, FetchError) and not isinstance(error, HTTPStatusError):
+                failed = True
+            continue
+
+        # The entry has been processed, later polls of the feed can skip it
+        if feed_state is not None:
+            feed_state.mark_seen(feed_url, post)
+
+        extracted = extract(post, page)
+        if isinstance(extracted, str):
+            metrics.count("skipped", outlet=outlet, reason=extracted)
+            continue
+        article, author, summary = extracted
+
+        # Skip if no article text is found, or if it is about the WSL
+        if article == "":
+            metrics.count("skipped", outlet=outlet, reason="no_body")
+            continue
+        if "WSL" in article:
+            metrics.count("skipped", outlet=outlet, reason="wsl")
+            continue
+
+        # Yield the post details as a compact record
+        metrics.count("scraped", outlet=outlet)
+        yield ArticleRecord(
+            title=post.title,
+            summary=summary,
+            link=post.link,
+            date=date,
+            author=author,
+            teams=teams,
+            article=article,
+            outlet=outlet,
+        )
+
+    # Without transiently failed pages the feed's validators are kept, otherwise the next run downloads
+    # the feed again (a 304 would hide the entries left to retry)
+    if feed_state is not None and not failed:
+        feed_state.complete(feed_url)
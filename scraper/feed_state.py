@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+from pathlib import Path
+import feedparser
+from fetch import HTTPStatusError
+
+
+# Where the feed state is persisted between runs
+BASE_DIR = Path(__file__).resolve().parents[1]
+STATE_PATH = Path(os.getenv("FEED_STATE_PATH", BASE_DIR / "data" / "state" / "feed_state.json"))
+# Number of entry IDs remembered per feed (feeds only list their latest entries)
+MAX_SEEN_IDS = 1000
+
+
+def entry_id(post) -> str:
+    """Returns the stable identifier of a feed entry (its guid, or its link if it has none)."""
+    return post.get("id") or post.link
+
+
+class FeedState:
+    """
+    Small persisted store with the ETag, Last-Modified and last-seen entry IDs of every feed.
+    Changes are kept in memory until save() is called, so a failed run does not
+    mark anything as seen.
+    The validators of a poll are only kept once the scraper calls complete(): if a page of the
+    feed failed to download for a transient reason, the next run downloads the feed again instead of getting a 304.
+    """
+
+    def __init__(self, path=STATE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._feeds = json.loads(self.path.read_text(encoding="utf-8"))
+        else:
+            self._feeds = {}
+        # Validators of the polls whose entries are not all processed yet, by feed URL
+        self._pending = {}
+
+    def _feed(self, url) -> dict:
+        return self._feeds.setdefault(url, {"etag": None, "modified": None, "seen": []})
+
+    def poll(self, url, fetcher, circuit=None) -> list:
+        """
+        Downloads the feed with a conditional request and returns the entries not seen before.
+        Args:
+            url (str): The URL of the RSS feed.
+            fetcher (Fetcher): The fetch engine used to download the feed.
+            circuit (str): Name of the fetcher's circuit breaker to go through, usually the outlet.
+        Returns:
+            list: The new feed entries, empty if the feed did not change since the last poll.
+        Raises:
+            HTTPStatusError: If the server answered with a status other than 200 or 304.
+        """
+        with self._lock:
+            feed = dict(self._feed(url))
+
+        # Ask the server to answer 304 Not Modified if the feed did not change
+        headers = {}
+        if feed["etag"]:
+            headers["If-None-Match"] = feed["etag"]
+        if feed["modified"]:
+            headers["If-Modified-Since"] = feed["modified"]
+        response = fetcher.get(url, circuit=circuit, headers=headers)
+        if response.status_code == 304:
+            return []
+        # An error page is not a feed: nothing is returned and its validators are not kept
+        if response.status_code != 200:
+            raise HTTPStatusError(url, response.status_code)
+
+        newsfeed = feedparser.parse(response.content)
+        seen = set(feed["seen"])
+        posts = [post for post in newsfeed.entries if entry_id(post) not in seen]
+
+        # Remember the validators for the next conditional request, once complete() is called
+        with self._lock:
+            self._pending[url] = {"etag": response.headers.get("ETag"),
+                                  "modified": response.headers.get("Last-Modified")}
+        return posts
+
+    def complete(self, url):
+        """
+        Records that every entry returned by the last poll of a feed was processed, so the next
+        poll can be answered with 304 Not Modified.
+        Args:
+            url (str): The URL of the RSS feed.
+        """
+        with self._lock:
+            validators = self._pending.pop(url, None)
+            if validators is not None:
+                self._feed(url).update(validators)
+
+    def mark_seen(self, url, post):
+        """
+        Records that a feed entry was processed, so later polls skip it.
+        Args:
+            url (str): The URL of the RSS feed.
+            post: The processed feed entry.
+        """
+        with self._lock:
+            seen = self._feed(url)["seen"]
+            seen.append(entry_id(post))
+            # Only keep the most recent IDs
+            del seen[:-MAX_SEEN_IDS]
+
+    def save(self):
+        """Writes the state to disk atomically."""
+        with self._lock:
+            data = json.dumps(self._feeds, indent=2)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+def read_feed(url, fetcher, feed_state=None, circuit=None) -> list:
+    """
+    Downloads and parses an RSS feed.
+    Args:
+        url (str): The URL of the RSS feed.
+        fetcher (Fetcher): The fetch engine used to download the feed.
+        feed_state (FeedState): If given, the feed is polled conditionally and only new entries are returned.
+        circuit (str): Name of the fetcher's circuit breaker to go through, usually the outlet.
+    Returns:
+        list: The feed entries to process.
+    Raises:
+        FetchError: If the feed could not be downloaded or the server did not answer 200.
+    """
+    if feed_state is None:
+        response = fetcher.get(url, circuit=circuit)
+        if response.status_code != 200:
+            raise HTTPStatusError(url, response.status_code)
+        return feedparser.parse(response.content).entries
+    return feed_state.poll(url, fetcher, circuit)
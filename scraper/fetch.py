@@ -0,0 +1,359 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Default number of pages downloaded at the same time
+DEFAULT_WORKERS = 8
+# (connect, read) timeouts in seconds for every request
+DEFAULT_TIMEOUT = (5, 20)
+# Headers sent with every request: identify the scraper and ask for compressed pages
+DEFAULT_HEADERS = {
+    "User-Agent": "footy-narratives/1.0 (+https://github.com/javiermascarena/footy-narratives)",
+    "Accept-Encoding": "gzip, deflate",
+}
+# Requests per second allowed to each host, and how many may be sent in a burst
+DEFAULT_RATE_LIMIT = 5.0
+DEFAULT_BURST = 5
+# Retries of a failed request, and the base delay in seconds of the exponential backoff
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+# Longest Retry-After (in seconds) the fetcher is willing to wait
+MAX_RETRY_AFTER = 30
+# Consecutive failures that open an outlet's circuit, and how long it stays open in seconds
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 120
+# Status codes worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Status codes of pages that are gone for good, later runs need not try them again
+PERMANENT_STATUSES = {404, 410}
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be downloaded."""
+
+
+class HTTPStatusError(FetchError):
+    """Raised when the server answers with a status other than 200 that is not worth retrying."""
+
+    def __init__(self, url, status):
+        super().__init__(f"{url}: HTTP {status}")
+        self.status = status
+
+    @property
+    def permanent(self) -> bool:
+        """Whether the page is gone for good (404 Not Found, 410 Gone)."""
+        return self.status in PERMANENT_STATUSES
+
+
+class CircuitOpenError(FetchError):
+    """Raised, without sending any request, while the circuit of an outlet is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the request rate to one host."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to an outlet after too many consecutive failures.
+    While open, requests fail immediately; after the cooldown they are let through
+    again, and a single new failure reopens the circuit.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def check(self, name):
+        """Raises CircuitOpenError if the circuit is open."""
+        with self._lock:
+            if self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(f"circuit open for {name} after {self.failures} consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class _ParsedPage:
+    """Cache entry holding the parsed result of one page."""
+    __slots__ = ("lock", "done", "value")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = False
+        self.value = None
+
+
+class Fetcher:
+    """
+    Shared HTTP fetch engine for the outlet scrapers.
+    Keeps one keep-alive session per host and downloads pages concurrently
+    with a bounded thread pool. A fetcher lives for one scrape run and caches
+    the parsed pages, so the same URL is never downloaded or parsed twice in a run.
+    Requests are rate limited per host, retried with jittered backoff, and go through
+    a circuit breaker per outlet so a failing site is not hammered for the whole run.
+    If an archive is given, every page downloaded successfully is stored in it.
+    Requests, retries, bytes and the time spent fetching and parsing pages are recorded
+    in the run metrics, labelled with the circuit (the outlet).
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT, headers=None, archive=None,
+                 rate_limit=DEFAULT_RATE_LIMIT, burst=DEFAULT_BURST, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, breaker_threshold=DEFAULT_BREAKER_THRESHOLD,
+                 breaker_cooldown=DEFAULT_BREAKER_COOLDOWN):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.archive = archive
+        # A rate_limit of None disables the limit (e.g. against a local server)
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self._sessions = {}
+        self._buckets = {}
+        self._breakers = {}
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session(self, url) -> requests.Session:
+        """
+        Returns the keep-alive session for the host of the given URL, creating it if needed.
+        Args:
+            url (str): Any URL on the host.
+        Returns:
+            requests.Session: The session shared by every request to that host.
+        """
+        host = self._host(url)
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                # Size the connection pool so every worker can keep its own connection open
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+        return session
+
+    def _bucket(self, host) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_limit, self.burst)
+        return bucket
+
+    def breaker(self, name) -> CircuitBreaker:
+        """Returns the circuit breaker of an outlet (or host), creating it if needed."""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+        return breaker
+
+    def _retry_delay(self, attempt, response) -> float:
+        # Wait as long as the server asks when it throttles us
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(int(retry_after), MAX_RETRY_AFTER)
+        # Full jitter, so the workers that failed together do not retry together
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def get(self, url, circuit=None, **kwargs) -> requests.Response:
+        """
+        Sends a GET request through the host's session with the default timeout.
+        Connection errors, timeouts, throttling and server errors are retried with backoff.
+        Args:
+            url (str): The URL to download.
+            circuit (str): Name of the circuit breaker to go through, usually the outlet. Defaults to the host.
+        Returns:
+            requests.Response: The response of the server.
+        Raises:
+            CircuitOpenError: If the circuit is open (no request is sent).
+            FetchError: If every attempt failed.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        host = self._host(url)
+        circuit = circuit or host
+        breaker = self.breaker(circuit)
+        metrics = get_metrics()
+        try:
+            breaker.check(circuit)
+        except CircuitOpenError:
+            metrics.count("circuit_open", outlet=circuit)
+            raise
+
+        for attempt in range(self.retries + 1):
+            if self.rate_limit:
+                self._bucket(host).acquire()
+            response = None
+            metrics.count("http_requests", outlet=circuit)
+            if attempt:
+                metrics.count("http_retries", outlet=circuit)
+            try:
+                response = self.session(url).get(url, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    break
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt < self.retries:
+                time.sleep(self._retry_delay(attempt, response))
+        else:
+            breaker.record_failure()
+            metrics.count("http_failures", outlet=circuit)
+            raise FetchError(f"{url}: {error} after {self.retries + 1} attempts")
+
+        breaker.record_success()
+        metrics.count("bytes", len(response.content), outlet=circuit)
+        # Keep the raw page, so the extractors can be re-run later without the network
+        if self.archive is not None and response.status_code == 200:
+            self.archive.store(url, response.content)
+        return response
+
+    def parse(self, url, parser, circuit=None):
+        """
+        Downloads the URL and applies the parser to its content, once per run.
+        Later calls with the same URL and parser return the cached result, and
+        concurrent calls wait for the first one instead of downloading again.
+        Args:
+            url (str): The URL to download.
+            parser (callable): Function turning the page content (bytes) into the wanted result.
+            circuit (str): Name of the circuit breaker to go through, usually the outlet.
+        Returns:
+            The result of the parser.
+        Raises:
+            HTTPStatusError: If the server answered with a status other than 200.
+            FetchError: If the page could not be downloaded.
+        """
+        key = (url, parser)
+        with self._lock:
+            entry = self._parsed.get(key)
+            if entry is None:
+                entry = self._parsed[key] = _ParsedPage()
+        with entry.lock:
+            # If a previous attempt failed the entry is still not done and is retried
+            if not entry.done:
+                metrics = get_metrics()
+                with metrics.timer("page_fetch", outlet=circuit):
+                    response = self.get(url, circuit=circuit)
+                if response.status_code != 200:
+                    raise HTTPStatusError(url, response.status_code)
+                with metrics.timer("parse", outlet=circuit):
+                    entry.value = parser(response.content)
+                entry.done = True
+        return entry.value
+
+    def map(self, func, items, skip_errors=False):
+        """
+        Applies func to every item using the thread pool.
+        The results are yielded in the same order as the items. Only a bounded number
+        of items is processed ahead of the consumer, so a slow consumer does not make
+        every result pile up in memory.
+        Args:
+            func (callable): Function called with each item, usually a get_details_from_url.
+            items (iterable): The items to process, usually article URLs.
+            skip_errors (bool): If True, an item whose call raises is logged and yields None,
+                so one bad page does not stop the rest.
+        """
+        if skip_errors:
+            func = _isolated(func)
+        items = list(items)
+        # No need to start threads for a single page
+        if len(items) <= 1 or self.max_workers <= 1:
+            for item in items:
+                yield func(item)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = deque()
+            for item in items:
+                if len(pending) >= 2 * self.max_workers:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(func, item))
+            while pending:
+                yield pending.popleft().result()
+
+    def close(self):
+        """Closes every open session and drops the parsed pages."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._parsed = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _isolated(func):
+    """Wraps func so an exception is logged and turned into None."""
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            logger.warning("Skipping %s: %s", item, e)
+            return None
+    return call
+
+
+# Process-wide fetcher used when a scraper is not given one explicitly
+_default_fetcher = None
+
+
+def get_fetcher() -> Fetcher:
+    """Returns the process-wide Fetcher, creating it on first use."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher()
+    return _default_fetcher
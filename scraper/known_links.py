@@ -0,0 +1,12 @@
+def load_known_links(cursor) -> set:
+    """
+    Loads the links of every article already stored in the database.
+    The scrapers check this index before downloading a page, so articles
+    ingested in earlier runs cost no network or parse time.
+    Args:
+        cursor: A cursor of the database connection.
+    Returns:
+        set: The links in the articles table.
+    """
+    cursor.execute("SELECT link FROM articles")
+    return {row["link"] for row in cursor.fetchall()}
@@ -0,0 +1,156 @@
+# Purpose:
+#  - Load the scraped records waiting in the spool (data/spool/ready) into the database.
+#  - Run by daily_scrape.py while scraping (BackgroundLoad), or on its own to retry the segments a failed load left behind.
+#  - Every segment is committed with the watermarks of the outlets it completes, then moved to data/spool/done.
+#
+# Usage: python scraper/load_spool.py
+
+import logging
+import os
+import sys
+import threading
+from loader import OUTLET_IDS, BulkLoader
+from metrics import get_metrics
+from spool import Spool
+from watermarks import save_watermark
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.db import pooled_conn
+from app.teams import TEAM_IDS
+
+logger = logging.getLogger(__name__)
+
+# Seconds the background load waits for a sealed segment before looking at the spool again
+LOAD_POLL_SECONDS = 5
+
+
+def load_spool(conn, spool, loader=None) -> int:
+    """
+    Loads every sealed spool segment, oldest first, one transaction per segment.
+    A segment is only marked done once its transaction committed; if loading fails
+    the remaining segments stay in the spool for the next attempt.
+    Args:
+        conn: Open database connection with a DictCursor.
+        spool (Spool): The spool to load.
+        loader (BulkLoader): Loader kept across calls, with its cached outlets, teams and authors.
+            None creates one for this call and closes it at the end.
+    Returns:
+        int: The number of articles loaded.
+    """
+    segments = spool.ready_segments()
+    if not segments:
+        return 0
+    logger.info("Loading %d spool segments.", len(segments))
+
+    owned = loader is None
+    if owned:
+        loader = BulkLoader(conn, OUTLET_IDS, TEAM_IDS)
+    loaded, statements = loader.loaded, loader.statements
+    cur = conn.cursor()
+    try:
+        for segment in segments:
+            finished = []
+            for item in spool.read(segment):
+                if isinstance(item, tuple):
+                    finished.append(item)
+                else:
+                    loader.add(item)
+            loader.flush()
+            # The outlets whose scraper finished in this segment move their watermark
+            for outlet, newest in finished:
+                if newest is not None:
+                    save_watermark(cur, OUTLET_IDS[outlet], newest)
+            with get_metrics().timer("db_commit"):
+                conn.commit()
+            spool.mark_done(segment)
+        if owned:
+            loader.close()
+    except Exception:
+        conn.rollback()
+        logger.exception("Loading stopped, %d segments remain in the spool.", len(spool.ready_segments()))
+        raise
+    finally:
+        cur.close()
+
+    spool.prune()
+    logger.info("Loaded %d articles with %d statements.", loader.loaded - loaded, loader.statements - statements)
+    return loader.loaded - loaded
+
+
+class BackgroundLoad:
+    """
+    Loads the spool in a background thread while the scrapers still run, so the segments
+    of an outlet that finished (and its watermark) reach the database without waiting for
+    the slower outlets. Call notify() after sealing a segment, and finish() once the spool is closed.
+    After a failed load nothing more is loaded: the segments stay in the spool and finish() raises the error.
+    """
+
+    def __init__(self, conn, spool, poll_seconds=LOAD_POLL_SECONDS):
+        """
+        Args:
+            conn: Open database connection with a DictCursor, only used by the background thread until finish().
+            spool (Spool): The spool to load.
+            poll_seconds (float): Seconds waited for a notify() before looking at the spool anyway.
+        """
+        self.conn = conn
+        self.spool = spool
+        self.poll_seconds = poll_seconds
+        self.loader = BulkLoader(conn, OUTLET_IDS, TEAM_IDS)
+        self.loaded = 0
+        self.error = None
+        self._wake = threading.Event()
+        self._finishing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="load-spool", daemon=True)
+
+    def start(self) -> "BackgroundLoad":
+        self._thread.start()
+        return self
+
+    def notify(self):
+        """Wakes the thread up, a segment was sealed."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            # Read before loading: once finishing, the spool is closed and this pass loads its last segments
+            last = self._finishing.is_set()
+            try:
+                self.loaded += load_spool(self.conn, self.spool, self.loader)
+            except Exception as e:
+                self.error = e
+                return
+            if last:
+                return
+
+    def stop(self):
+        """Loads the segments left and waits for the thread to end, without raising a load error."""
+        self._finishing.set()
+        self._wake.set()
+        self._thread.join()
+
+    def finish(self) -> int:
+        """
+        Loads the segments left and stops the thread.
+        Returns:
+            int: The number of articles loaded since start().
+        Raises:
+            Exception: The error a load failed with.
+        """
+        self.stop()
+        if self.error is not None:
+            raise self.error
+        self.loader.close()
+        return self.loaded
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    spool = Spool()
+    # Segments left open by a crashed scrape are complete up to their last full line
+    spool.recover()
+    conn = pooled_conn()
+    try:
+        load_spool(conn, spool)
+    finally:
+        conn.close()
@@ -0,0 +1,198 @@
+import sys
+from pathlib import Path
+from metrics import get_metrics
+from records import ArticleRecord
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from app.bodies import body_row, body_upsert_sql
+from app.dialects import dialect_of
+from app.fingerprint import LSHIndex, assign_duplicates, band_keys, from_bytes, minhash, to_bytes
+
+# Database IDs of the outlets
+OUTLET_IDS = {"BBC": 1,
+              "TheGuardian": 2,
+              "SkySports": 3}
+# Number of articles written to the database in one batch
+DEFAULT_BATCH_SIZE = 500
+
+
+class BulkLoader:
+    """
+    Writes scraped articles to the database in batches.
+    Outlets, teams and authors already written in the run are cached in memory, and
+    every batch is stored with a constant number of statements: multi-row upserts
+    (PyMySQL's executemany sends an INSERT ... VALUES as one multi-row statement)
+    and one query resolving the IDs of the whole batch. Every article gets a MinHash
+    signature, and near-duplicates of stored articles are linked to their original
+    through the LSH band index. The texts go compressed to article_bodies, away from the
+    articles rows. Statements and their time are recorded in the run metrics.
+    Nothing is committed here, the caller owns the transaction.
+    """
+
+    def __init__(self, conn, outlet_ids, team_ids, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            conn: Open database connection with a DictCursor.
+            outlet_ids (dict): Outlet name -> outlet ID.
+            team_ids (dict): Team name -> team ID.
+            batch_size (int): Number of articles buffered before they are written.
+        """
+        self.conn = conn
+        self.cur = conn.cursor()
+        self.dialect = dialect_of(conn)
+        self.outlet_ids = outlet_ids
+        self.team_ids = team_ids
+        self.batch_size = batch_size
+        # Dimension rows known to be in the database
+        self._outlets = set()
+        self._teams = set()
+        self._author_ids = {}
+        self._pending = []
+        # Statements sent to the server and articles written, for logging and benchmarks
+        self.statements = 0
+        self.loaded = 0
+        self.metrics = get_metrics()
+
+    def _execute(self, query, args=None):
+        self.statements += 1
+        self.metrics.count("db_statements")
+        with self.metrics.timer("db_write"):
+            self.cur.execute(query, args)
+
+    def _executemany(self, query, rows):
+        if rows:
+            self.statements += 1
+            self.metrics.count("db_statements")
+            with self.metrics.timer("db_write"):
+                self.cur.executemany(query, rows)
+
+    def add(self, record: ArticleRecord) -> bool:
+        """
+        Buffers an article, writing the batch once it is full.
+        Returns:
+            bool: True if the batch was written to the database.
+        """
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        """Writes every buffered article."""
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+
+        self._load_dimensions(records)
+        author_ids = self._resolve_authors({r.author for r in records if r.author})
+
+        # Upsert the articles, the last record wins if a link appears twice in the batch
+        by_link = {r.link: r for r in records}
+        with self.metrics.timer("fingerprint"):
+            signatures = {link: minhash(r.article) for link, r in by_link.items()}
+        self._executemany(
+            self.dialect.upsert("articles", ["link", "title", "summary", "publication_date", "outlet_id", "author_id",
+                                             "minhash"],
+                                keys=["link"], update=["title", "summary", "minhash"]),
+            [(r.link, r.title, r.summary, r.date, self.outlet_ids[r.outlet],
+              author_ids.get(r.author) if r.author else None,
+              to_bytes(signatures[r.link]) if signatures[r.link] is not None else None)
+             for r in by_link.values()])
+        article_ids = self._select_ids("articles", "link", list(by_link))
+        with self.metrics.timer("compress"):
+            bodies = [body_row(article_ids[r.link], r.article) for r in by_link.values() if r.article is not None]
+        self._executemany(body_upsert_sql(self.dialect), bodies)
+        self._link_duplicates({article_ids[link]: (link, signature) for link, signature in signatures.items()})
+
+        # Link the articles with their teams
+        self._executemany(
+            self.dialect.insert_ignore("article_teams", ["article_id", "team_id"]),
+            [(article_ids[r.link], self.team_ids[team]) for r in by_link.values() for team in r.teams])
+        self.loaded += len(by_link)
+        self.metrics.count("loaded", len(by_link))
+
+    def _link_duplicates(self, articles):
+        """
+        Indexes the batch in the LSH band table and points every near-duplicate to its original.
+        Args:
+            articles (dict): Article ID -> (link, signature or None).
+        """
+        keys = {article_id: band_keys(signature)
+                for article_id, (_, signature) in articles.items() if signature is not None}
+
+        # Stored articles sharing a bucket with the batch, in one query
+        index = LSHIndex()
+        pairs = sorted({(band, bucket) for buckets in keys.values() for band, bucket in enumerate(buckets)})
+        if pairs:
+            self._execute("SELECT DISTINCT a.id, a.minhash, a.duplicate_of FROM article_lsh l "
+                          "JOIN articles a ON a.id = l.article_id "
+                          f"WHERE {self.dialect.tuple_in(['l.band', 'l.bucket'], len(pairs))}",
+                          [value for pair in pairs for value in pair])
+            for row in self.cur.fetchall():
+                if row["id"] not in articles and row["minhash"] is not None:
+                    index.add(row["id"], from_bytes(row["minhash"]), row["duplicate_of"])
+        duplicate_of = assign_duplicates(index, [(article_id, signature) for article_id, (_, signature) in articles.items()])
+
+        # Replace the band keys of the batch (an updated text changes them)
+        placeholders = ", ".join(["%s"] * len(articles))
+        self._execute(f"DELETE FROM article_lsh WHERE article_id IN ({placeholders})", list(articles))
+        self._executemany("INSERT INTO article_lsh (band, bucket, article_id) VALUES (%s, %s, %s)",
+                          [(band, bucket, article_id) for article_id, buckets in keys.items()
+                           for band, bucket in enumerate(buckets)])
+        # The rows exist, so on MySQL this multi-row insert only updates duplicate_of
+        self._executemany(self.dialect.bulk_update("articles", "id", ["duplicate_of"], required=["link"]),
+                          [{"id": article_id, "link": link, "duplicate_of": duplicate_of[article_id]}
+                           for article_id, (link, _) in articles.items()])
+
+    def _load_dimensions(self, records):
+        # Outlets and teams have fixed IDs, they are only upserted the first time they are seen
+        outlets = {r.outlet for r in records} - self._outlets
+        self._executemany(self.dialect.upsert("outlets", ["id", "name"], keys=["id"], expressions={"name": "name"}),
+                          [(self.outlet_ids[outlet], outlet) for outlet in sorted(outlets)])
+        self._outlets |= outlets
+
+        teams = {team for r in records for team in r.teams} - self._teams
+        self._executemany(self.dialect.upsert("teams", ["id", "name"], keys=["id"], expressions={"name": "name"}),
+                          [(self.team_ids[team], team) for team in sorted(teams)])
+        self._teams |= teams
+
+    def _resolve_authors(self, names) -> dict:
+        # Only the authors not seen earlier in the run go to the database
+        new = sorted(names - self._author_ids.keys())
+        if new:
+            self._executemany(self.dialect.upsert("authors", ["name"], keys=["name"], expressions={"name": "name"}),
+                              [(name,) for name in new])
+            self._author_ids.update(self._select_ids("authors", "name", new))
+        return self._author_ids
+
+    def _select_ids(self, table, column, values) -> dict:
+        """
+        Returns the IDs of the rows whose column takes one of the values, in one query.
+        Args:
+            table (str): The table to query.
+            column (str): The unique column the values belong to.
+            values (list): The values to look up.
+        Returns:
+            dict: Value -> ID.
+        Raises:
+            LookupError: If a value has no row.
+        """
+        placeholders = ", ".join(["%s"] * len(values))
+        self._execute(f"SELECT id, {column} FROM {table} WHERE {column} IN ({placeholders})", values)
+        ids = {row[column]: row["id"] for row in self.cur.fetchall()}
+        # The column collation may return a value spelled differently (case, accents, trailing spaces):
+        # those rare values are looked up one by one, as the database sees them as equal
+        for value in values:
+            if value not in ids:
+                self._execute(f"SELECT id FROM {table} WHERE {column} = %s", (value,))
+                row = self.cur.fetchone()
+                # The rows were just upserted: a missing one means the upsert was ignored, the batch cannot be linked
+                if row is None:
+                    raise LookupError(f"no {table} row with {column} = {value!r} after its upsert")
+                ids[value] = row["id"]
+        return ids
+
+    def close(self):
+        """Writes the buffered articles and closes the cursor."""
+        self.flush()
+        self.cur.close()
@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Where the run reports are written
+BASE_DIR = Path(__file__).resolve().parents[1]
+METRICS_DIR = Path(os.getenv("METRICS_DIR", BASE_DIR / "data" / "metrics"))
+# Prefix of every exported Prometheus metric
+PROM_PREFIX = "footy_scrape"
+# HELP text of the counters recorded by the scrapers, the fetcher and the loader
+COUNTER_HELP = {
+    "bytes": "Bytes of the pages and feeds downloaded (after decompression).",
+    "http_requests": "HTTP requests sent, retries included.",
+    "http_retries": "HTTP requests that were retries of a failed attempt.",
+    "http_failures": "URLs that failed after every retry.",
+    "circuit_open": "Requests refused because the outlet's circuit breaker was open.",
+    "feed_entries": "Feed entries returned by the (conditional) feed poll.",
+    "scraped": "Articles scraped and spooled.",
+    "skipped": "Feed entries or articles skipped, by reason.",
+    "outlet_failed": "Outlets whose scraper failed half-way.",
+    "db_statements": "Statements sent to the database by the loader.",
+    "loaded": "Articles written to the database.",
+}
+
+
+def _label_key(labels) -> tuple:
+    # Labels set to None are left out, so a metric without outlet has no outlet label
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+
+class RunMetrics:
+    """
+    Thread-safe stage timers and counters of one scrape run.
+    A stage timer adds up the seconds spent in a stage and how many times it ran, per label set
+    (usually the outlet). The scrapers run in parallel threads, so the seconds of a stage are
+    summed over every thread and can exceed the wall-clock duration of the run.
+    Counters hold any other quantity: bytes downloaded, articles scraped or skipped, database statements.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._timers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, stage, seconds, **labels):
+        """Adds one run of a stage that took the given seconds."""
+        key = (stage, _label_key(labels))
+        with self._lock:
+            timer = self._timers.setdefault(key, [0.0, 0])
+            timer[0] += seconds
+            timer[1] += 1
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """
+        Times the enclosed block as one run of a stage.
+        Args:
+            stage (str): The stage name, e.g. "feed", "page_fetch", "parse", "team_match", "db_write".
+            **labels: Labels of the timer, usually outlet.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start, **labels)
+
+    def count(self, name, n=1, **labels):
+        """
+        Increments a counter.
+        Args:
+            name (str): The counter name, e.g. "bytes", "scraped", "skipped", "db_statements".
+            n (int): The increment.
+            **labels: Labels of the counter, e.g. outlet or reason.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def elapsed(self) -> float:
+        """Returns the wall-clock seconds since the run started."""
+        return time.perf_counter() - self._start
+
+    def report(self, **extra) -> dict:
+        """
+        Returns the metrics of the run as a JSON-serializable dict.
+        Args:
+            **extra: Additional top-level fields, e.g. whether the run succeeded.
+        """
+        with self._lock:
+            stages = [dict(labels, stage=stage, seconds=round(seconds, 6), calls=calls)
+                      for (stage, labels), (seconds, calls) in sorted(self._timers.items())]
+            counters = [dict(labels, name=name, value=value)
+                        for (name, labels), value in sorted(self._counters.items())]
+        return dict({"started_at": self.started_at.isoformat(),
+                     "duration_seconds": round(self.elapsed(), 6),
+                     "stages": stages,
+                     "counters": counters}, **extra)
+
+    def prometheus(self, succeeded) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format, for the node_exporter textfile collector.
+        Every value describes the last run, so they are exported as gauges.
+        Args:
+            succeeded (bool): Whether the run finished without errors.
+        """
+        def sample(name, labels, value):
+            rendered = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+            return f"{PROM_PREFIX}_{name}{{{rendered}}} {value}" if rendered else f"{PROM_PREFIX}_{name} {value}"
+
+        with self._lock:
+            timers = sorted(self._timers.items())
+            counters = sorted(self._counters.items())
+
+        lines = [f"# HELP {PROM_PREFIX}_last_run_timestamp_seconds Start of the last scrape run (Unix time).",
+                 f"# TYPE {PROM_PREFIX}_last_run_timestamp_seconds gauge",
+                 sample("last_run_timestamp_seconds", (), round(self.started_at.timestamp(), 3)),
+                 f"# HELP {PROM_PREFIX}_last_run_duration_seconds Wall-clock duration of the last scrape run.",
+                 f"# TYPE {PROM_PREFIX}_last_run_duration_seconds gauge",
+                 sample("last_run_duration_seconds", (), round(self.elapsed(), 6)),
+                 f"# HELP {PROM_PREFIX}_last_run_success 1 if the last scrape run finished without errors.",
+                 f"# TYPE {PROM_PREFIX}_last_run_success gauge",
+                 sample("last_run_success", (), int(bool(succeeded))),
+                 f"# HELP {PROM_PREFIX}_stage_seconds Seconds spent in each stage of the last run, summed over threads.",
+                 f"# TYPE {PROM_PREFIX}_stage_seconds gauge"]
+        lines += [sample("stage_seconds", (("stage", stage),) + labels, round(seconds, 6))
+                  for (stage, labels), (seconds, _) in timers]
+        lines += [f"# HELP {PROM_PREFIX}_stage_calls Times each stage ran in the last run.",
+                  f"# TYPE {PROM_PREFIX}_stage_calls gauge"]
+        lines += [sample("stage_calls", (("stage", stage),) + labels, calls)
+                  for (stage, labels), (_, calls) in timers]
+
+        # One metric family per counter name, with a single HELP/TYPE header each
+        previous = None
+        for (name, labels), value in counters:
+            if name != previous:
+                lines += [f"# HELP {PROM_PREFIX}_{name} {COUNTER_HELP.get(name, name)}",
+                          f"# TYPE {PROM_PREFIX}_{name} gauge"]
+                previous = name
+            lines.append(sample(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+    def write(self, succeeded, directory=METRICS_DIR) -> Path:
+        """
+        Writes the JSON run report (runs/<start time>.json) and the Prometheus textfile (scrape.prom).
+        Both are written atomically, so the collector never reads a partial file.
+        Args:
+            succeeded (bool): Whether the run finished without errors.
+            directory (Path): Where the files are written.
+        Returns:
+            Path: The path of the JSON run report.
+        """
+        directory = Path(directory)
+        report_path = directory / "runs" / f"{self.started_at:%Y%m%dT%H%M%S}.json"
+        _write_atomic(report_path, json.dumps(self.report(succeeded=succeeded), indent=2))
+        _write_atomic(directory / "scrape.prom", self.prometheus(succeeded))
+        return report_path
+
+
+def _write_atomic(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# Process-wide metrics of the current run, recorded by the fetcher, the scrapers and the loader
+_metrics = None
+
+
+def get_metrics() -> RunMetrics:
+    """Returns the process-wide RunMetrics, creating it on first use."""
+    global _metrics
+    if _metrics is None:
+        _metrics = RunMetrics()
+    return _metrics
+
+
+def reset_metrics() -> RunMetrics:
+    """Starts a new set of process-wide metrics, e.g. between benchmark rounds."""
+    global _metrics
+    _metrics = RunMetrics()
+    return _metrics
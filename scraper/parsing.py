@@ -0,0 +1,74 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml is much faster than the pure-Python html.parser, fall back to it if lxml is not installed
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+class Selector:
+    """
+    Declarative rule selecting the tags an extractor reads.
+    Matches a tag by name (None for any tag) and by the value of one attribute.
+    """
+    __slots__ = ("name", "attr", "values", "token")
+
+    def __init__(self, name=None, attr=None, values=(), token=False):
+        """
+        Args:
+            name (str): The tag name, or None for any tag.
+            attr (str): The attribute to check, or None to match on the name only.
+            values (iterable): The accepted values of the attribute.
+            token (bool): If True, the attribute is a whitespace separated list (like class or rel)
+                and one of its tokens must be accepted. Otherwise the whole value must be accepted.
+        """
+        self.name = name
+        self.attr = attr
+        self.values = frozenset(values)
+        self.token = token
+
+    def matches(self, name, attrs) -> bool:
+        if self.name is not None and name != self.name:
+            return False
+        if self.attr is None:
+            return True
+        value = attrs.get(self.attr) if attrs else None
+        if value is None:
+            return False
+        if isinstance(value, list):
+            value = " ".join(value)
+        if self.token:
+            return not self.values.isdisjoint(value.split())
+        return value in self.values
+
+
+class OutletStrainer(SoupStrainer):
+    """
+    SoupStrainer that only builds the subtrees matched by any of the selectors.
+    Everything else in the page (navigation, scripts, related links...) is skipped while parsing.
+    """
+
+    def __init__(self, selectors):
+        super().__init__()
+        self.selectors = tuple(selectors)
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(selector.matches(name, attrs) for selector in self.selectors)
+
+    def allow_string_creation(self, string) -> bool:
+        # Text outside the selected subtrees is never needed
+        return False
+
+
+def parse_page(content, strainer) -> BeautifulSoup:
+    """
+    Parses only the parts of a page selected by the strainer, with the fastest available parser.
+    Args:
+        content (bytes): The HTML content of the page.
+        strainer (OutletStrainer): The outlet's selectors.
+    Returns:
+        BeautifulSoup: The parsed subtrees.
+    """
+    return BeautifulSoup(content, PARSER, parse_only=strainer)
@@ -0,0 +1,70 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Union
+from records import ArticleRecord
+
+logger = logging.getLogger(__name__)
+
+# Records buffered between the scrapers and the database writer
+QUEUE_SIZE = 200
+
+
+@dataclass(slots=True)
+class OutletDone:
+    """Marks the end of an outlet's records. error is set if its scraper failed."""
+    outlet: str
+    error: Exception = None
+
+
+def scrape_concurrently(jobs, queue_size=QUEUE_SIZE) -> Iterator[Union[ArticleRecord, OutletDone]]:
+    """
+    Runs every outlet scraper in its own thread and yields the records as they arrive.
+    The scrapers block while the queue is full, so memory stays bounded however
+    slow the consumer is, and the consumer starts writing as soon as the first record is ready.
+    Args:
+        jobs (dict): Outlet name -> callable without arguments returning the outlet's record iterator.
+        queue_size (int): Number of records buffered between the scrapers and the consumer.
+    Yields:
+        ArticleRecord or OutletDone: The scraped records, and one OutletDone per outlet once its scraper finished.
+    """
+    records = queue.Queue(maxsize=queue_size)
+    # Set when the consumer stops early, so the scrapers do not wait on a queue nobody reads
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                records.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(outlet, job):
+        error = None
+        try:
+            for record in job():
+                if not put(record):
+                    return
+        except Exception as e:
+            logger.exception("The %s scraper failed", outlet)
+            error = e
+        put(OutletDone(outlet, error))
+
+    threads = [threading.Thread(target=produce, args=(outlet, job), name=f"scrape-{outlet}", daemon=True)
+               for outlet, job in jobs.items()]
+    for thread in threads:
+        thread.start()
+    try:
+        remaining = len(threads)
+        while remaining:
+            item = records.get()
+            if isinstance(item, OutletDone):
+                remaining -= 1
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
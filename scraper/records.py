@@ -0,0 +1,47 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Iterable
+import pandas as pd
+
+
+@dataclass(slots=True)
+class ArticleRecord:
+    """
+    A scraped article, as yielded by the outlet scrapers.
+    Uses __slots__ so thousands of records stay compact in memory.
+    """
+    title: str
+    summary: str
+    link: str
+    date: datetime
+    author: str
+    teams: list
+    article: str
+    outlet: str
+
+
+# Column names used when the records are turned into a DataFrame
+FRAME_COLUMNS = {
+    "title": "Title",
+    "summary": "Summary",
+    "link": "Link",
+    "date": "Date",
+    "author": "Author",
+    "teams": "Teams",
+    "article": "Article",
+    "outlet": "Outlet",
+}
+
+
+def records_to_frame(records: Iterable[ArticleRecord]) -> pd.DataFrame:
+    """
+    Builds a DataFrame from the records in a single step.
+    Args:
+        records (Iterable[ArticleRecord]): The scraped articles.
+    Returns:
+        pd.DataFrame: One row per article with the columns "Title", "Summary", "Link", "Date",
+        "Author", "Teams", "Article" and "Outlet".
+    """
+    names = [f.name for f in fields(ArticleRecord)]
+    rows = [tuple(getattr(record, name) for name in names) for record in records]
+    return pd.DataFrame(rows, columns=[FRAME_COLUMNS[name] for name in names])
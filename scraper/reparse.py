@@ -0,0 +1,169 @@
+# Purpose:
+#  - Rebuild the article texts (article_bodies) and authors from the raw HTML archive.
+#  - Re-run the current outlet extractors in parallel, without touching the network.
+#  - Used after an extractor fix, instead of refetching the pages (which may have changed or disappeared).
+#
+# Usage: python scraper/reparse.py [--workers 4] [--outlet BBC] [--dry-run]
+
+import argparse
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+import bbc_scraper
+import sky_scraper
+import theguardian_scraper
+from archive import ARCHIVE_DIR, PageArchive
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.bodies import body_row, body_upsert_sql
+from app.db import pooled_conn
+from app.dialects import dialect_of
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of article updates sent to the database at once
+UPDATE_BATCH_SIZE = 200
+
+
+def outlet_for(link) -> str:
+    """Returns the outlet name of an article link, or None for links of other sites."""
+    host = urlsplit(link).netloc
+    if "bbc." in host:
+        return "BBC"
+    if "skysports." in host:
+        return "SkySports"
+    if "theguardian." in host:
+        return "TheGuardian"
+    return None
+
+
+def extract(outlet, content):
+    """
+    Runs the outlet's extractor on an archived page.
+    Args:
+        outlet (str): The outlet name.
+        content (bytes): The archived HTML content.
+    Returns:
+        Tuple[str, str]: The cleaned article text and the author's name, or None if the page should not be stored.
+    """
+    if outlet == "BBC":
+        mens_football, article, author = bbc_scraper.parse_article(content)
+        if not mens_football:
+            return None
+    elif outlet == "SkySports":
+        article, author = sky_scraper.parse_article(content)
+    else:
+        article, author, _ = theguardian_scraper.parse_article(content)
+
+    # Same filters as the scrapers: never replace a stored text with an empty or WSL one
+    if not article or "WSL" in article:
+        return None
+    return (article, author)
+
+
+def reparse_page(job):
+    """
+    Worker: loads one archived page and re-extracts it.
+    Args:
+        job (tuple): (article_id, outlet, sha256 of the archived content).
+    Returns:
+        tuple: (article_id, article text, author) or None if nothing should be updated.
+    """
+    article_id, outlet, digest = job
+    try:
+        result = extract(outlet, PageArchive(ARCHIVE_DIR).load(digest))
+    except Exception as e:
+        logger.warning("Could not re-parse article %s: %s", article_id, e)
+        return None
+    if result is None:
+        return None
+    return (article_id, *result)
+
+
+def write_updates(cur, updates):
+    """
+    Upserts the authors and updates the author of the articles, and the text of those whose text changed.
+    Only the articles with a new text lose their fingerprint (recomputed by app/pipeline/fingerprint_articles.py).
+    """
+    dialect = dialect_of(cur)
+    upsert_author = dialect.upsert("authors", ["name"], keys=["name"], expressions={"name": "name"})
+    ids = [article_id for article_id, _, _ in updates]
+    cur.execute(f"SELECT article_id, text_hash FROM article_bodies WHERE article_id IN ({', '.join(['%s'] * len(ids))})", ids)
+    stored = {row["article_id"]: bytes(row["text_hash"]) for row in cur.fetchall() if row["text_hash"] is not None}
+    rows, bodies = [], []
+    for article_id, article, author in updates:
+        author_id = None
+        if author:
+            cur.execute(upsert_author, (author,))
+            cur.execute("SELECT id FROM authors WHERE name = %s", (author,))
+            author_id = cur.fetchone()["id"]
+        rows.append((author_id, article_id))
+        if article is not None:
+            body = body_row(article_id, article)
+            if stored.get(article_id) != body[2]:
+                bodies.append(body)
+    cur.executemany("UPDATE articles SET author_id = %s WHERE id = %s", rows)
+    if bodies:
+        cur.executemany(body_upsert_sql(dialect), bodies)
+        cur.executemany("UPDATE articles SET minhash = NULL WHERE id = %s", [(body[0],) for body in bodies])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild article texts and authors from the raw HTML archive.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--outlet", choices=["BBC", "SkySports", "TheGuardian"], help="only re-parse this outlet")
+    parser.add_argument("--dry-run", action="store_true", help="parse everything but do not write to the database")
+    args = parser.parse_args()
+
+    # Latest archived version of every page
+    latest = PageArchive(ARCHIVE_DIR).latest()
+    logger.info("Archive holds %d URLs.", len(latest))
+
+    conn = pooled_conn()
+    cur = conn.cursor()
+    try:
+        # Match the stored articles with their archived pages
+        cur.execute("SELECT id, link FROM articles")
+        jobs = []
+        for row in cur.fetchall():
+            entry = latest.get(row["link"])
+            outlet = outlet_for(row["link"])
+            if entry is None or outlet is None or (args.outlet and outlet != args.outlet):
+                continue
+            jobs.append((row["id"], outlet, entry["sha256"]))
+        logger.info("Re-parsing %d archived articles with %d workers.", len(jobs), args.workers)
+
+        # Parse in parallel, write in batches as results arrive
+        updates = []
+        n_updated = 0
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for result in pool.map(reparse_page, jobs, chunksize=16):
+                if result is None:
+                    continue
+                updates.append(result)
+                if len(updates) >= UPDATE_BATCH_SIZE:
+                    if not args.dry_run:
+                        write_updates(cur, updates)
+                    n_updated += len(updates)
+                    updates = []
+        if updates and not args.dry_run:
+            write_updates(cur, updates)
+        n_updated += len(updates)
+
+        if args.dry_run:
+            logger.info("Dry run: %d articles would be updated.", n_updated)
+        else:
+            conn.commit()
+            logger.info("Updated %d articles.", n_updated)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,30 @@
-import feedparser
-from datetime import datetime
-import pandas as pd
-from aux_functions import get_team_name
-import requests
-from bs4 import BeautifulSoup
-from typing import Tuple
+from feed_scraper import scrape_feed
+from fetch import get_fetcher
+from parsing import OutletStrainer, Selector, parse_page
+from records import ArticleRecord
+from typing import Iterator, Tuple
 
+# URL of the SkySports RSS feed to parse
+FEED_URL = "https://www.skysports.com/rss/11095"
+# Outlet name stored with the articles, also the name of its circuit breaker in the fetcher
+OUTLET = "SkySports"
 
-def get_details_from_url(url) -> Tuple[str, str]:
+# Only the subtrees read by parse_article are parsed: the author name and the article body
+PARSE_ONLY = OutletStrainer([
+    Selector(None, "class", ["sdc-article-author__name"], token=True),
+    Selector(None, "class", ["sdc-article-body sdc-article-body--lead"]),
+])
+
+
+def parse_article(content) -> Tuple[str, str]:
     """
-    Extracts the article text and authors from a given URL. 
+    Parses a SkySports article page.
     Args:
-        url (str): The URL of the article to be processed.
+        content (bytes): The HTML content of the article page.
     Returns:
         Tuple[str, str]: A tuple containing the cleaned article text and the author's name.
     """
-    # Send a GET request to the URL
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
+    soup = parse_page(content, PARSE_ONLY)
 
     # Find the author name in the HTML content
     # If the author is not found, return an empty string
@@ -30,6 +37,8 @@ def get_details_from_url(url) -> Tuple[str, str]:
     # Find the article body in the HTML content
     # If the article body is not found, return an empty string
     article = soup.find(class_="sdc-article-body sdc-article-body--lead")
+    if article is None:
+        return ("", author)
     html_text = article.find_all("p", recursive=False)
     cleaned_text = ""
     for paragraph in html_text: 
@@ -38,63 +47,42 @@ def get_details_from_url(url) -> Tuple[str, str]:
     return (cleaned_text, author)
 
 
-def sky_scraper(lower_time, upper_time) -> pd.DataFrame:
+def get_details_from_url(url, fetcher=None) -> Tuple[str, str]:
     """
-    Scrapes the SkySports Football RSS feed for articles related to mens football within a specified time range.
-    The articles are filtered based on the presence of specific team names in the title or summary.
-    The scraped articles are stored in a DataFrame.
+    Extracts the article text and authors from a given URL. 
+    The page is fetched and parsed only once per run through the fetcher's cache.
+    Args:
+        url (str): The URL of the article to be processed.
+        fetcher (Fetcher): The fetch engine used to download the page. Defaults to the shared one.
+    Returns:
+        Tuple[str, str]: A tuple containing the cleaned article text and the author's name.
     """
+    return (fetcher or get_fetcher()).parse(url, parse_article, circuit=OUTLET)
 
-    # URL of the SkySports RSS feed to parse
-    url = "https://www.skysports.com/rss/11095"
-
-    # Parse the RSS feed and store the results
-    newsfeed = feedparser.parse(url)
-    posts = newsfeed.entries 
-
-    # Define the format for the published date in the RSS feed entries
-    news_format = "%a, %d %b %Y %H:%M:%S"
 
-    # Create an empty DataFrame to store the results
-    new_data = pd.DataFrame(columns=["Title", "Summary", "Link", "Date", "Author", "Teams", "Article", "Outlet"])
-
-
-    # Iterate over each post in the RSS feed
-    for post in posts: 
-        # Convert the published date to a datetime object removing the BST part
-        date_without_bst = " ".join(post.published.split(" ")[:-1])
-        new_comparison_time = datetime.strptime(date_without_bst, news_format)
-
-        # Extract team names from title and summary
-        teams = get_team_name(post.title + " " + post.summary)  
-
-        # Check if the post's published date is within the specified range, has the tag "News Story" or "Article/Blog",
-        # has teams, and is not already in the previous data
-        if new_comparison_time >= lower_time \
-            and new_comparison_time <= upper_time \
-            and post.tags[0].term in ("News Story", "Article/Blog") \
-            and teams:
-
-            # Get the article text and author from the URL
-            article, author = get_details_from_url(post.link)
+def extract(post, page) -> Tuple[str, str, str]:
+    """
+    Returns the article text, the author and the summary of a parsed SkySports article page.
+    Args:
+        post: The feed entry of the article.
+        page (Tuple[str, str]): The result of parse_article.
+    """
+    article, author = page
+    return (article, author, post.summary)
 
-            # Skip if no article text is found
-            if article == "" or "WSL" in article: 
-                continue
 
-            # Append the post details to the DataFrame
-            post = {
-                "Title": post.title,
-                "Summary": post.summary,
-                "Link": post.link,
-                "Date": new_comparison_time.strftime(news_format),
-                "Author": author,
-                "Teams": teams,
-                "Article": article,
-                "Outlet": "SkySports"
-            }
-            # Concatenate the new post to the DataFrame
-            new_data = pd.concat([new_data, pd.DataFrame([post])], ignore_index=True)
+def entry_filter(post):
+    """Returns why a feed entry is skipped, or None: only the tags "News Story" and "Article/Blog" are articles."""
+    return None if post.tags[0].term in ("News Story", "Article/Blog") else "not_news"
 
-    return new_data
 
+def sky_scraper(lower_time, upper_time, fetcher=None, feed_state=None, known_links=None, feed_url=FEED_URL) -> Iterator[ArticleRecord]:
+    """
+    Scrapes the SkySports Football RSS feed for articles related to mens football within a specified time range.
+    The articles are filtered based on the presence of specific team names in the title or summary.
+    The matching article pages are downloaded concurrently through the fetcher,
+    except for links found in known_links, which are already stored in the database.
+    The scraped articles are yielded one by one as ArticleRecord objects.
+    """
+    yield from scrape_feed(OUTLET, feed_url, lower_time, upper_time, get_details_from_url, extract,
+                           fetcher, feed_state, known_links, entry_filter=entry_filter)
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from records import ArticleRecord
+
+logger = logging.getLogger(__name__)
+
+# Where the scraped records wait to be loaded into the database
+BASE_DIR = Path(__file__).resolve().parents[1]
+SPOOL_DIR = Path(os.getenv("SPOOL_DIR", BASE_DIR / "data" / "spool"))
+# Records per segment: a crash loses at most the segment being written
+SEGMENT_SIZE = 200
+# Loaded segments are kept this many days before being deleted
+DONE_RETENTION_DAYS = 7
+# An open segment untouched for this long is abandoned, even if its process ID was reused
+STALE_SEGMENT_SECONDS = 6 * 3600
+
+
+def _fsync_dir(path):
+    # Makes a rename durable (not supported on Windows, where renames are already durable enough)
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _pid_alive(pid) -> bool:
+    """Returns whether a process with this ID is running on this machine."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        # The process exists but belongs to someone else, or the check is not supported
+        return True
+    return True
+
+
+def record_to_line(record) -> str:
+    """Serializes an ArticleRecord as a spool line."""
+    return json.dumps({"type": "article", "title": record.title, "summary": record.summary, "link": record.link,
+                       "date": record.date.isoformat(), "author": record.author, "teams": record.teams,
+                       "article": record.article, "outlet": record.outlet}) + "\n"
+
+
+def outlet_done_line(outlet, newest) -> str:
+    """Serializes the marker of an outlet whose scraper finished, with its newest publication date (or None)."""
+    return json.dumps({"type": "outlet_done", "outlet": outlet,
+                       "newest": newest.isoformat() if newest else None}) + "\n"
+
+
+class Spool:
+    """
+    Durable, append-only spool of scraped records between the scrapers and the database loader.
+    Records are appended to a segment in open/; once full (or when an outlet or the run ends) the segment
+    is fsync'd and renamed into ready/, which makes it immutable. The loader reads the
+    ready segments in order and moves each one to done/ after its transaction committed,
+    so loading can be retried or run elsewhere without scraping again. Loading is idempotent
+    (every write is an upsert), so a crash between the commit and the move only reloads a segment.
+    """
+
+    def __init__(self, root=SPOOL_DIR, segment_size=SEGMENT_SIZE):
+        self.root = Path(root)
+        self.segment_size = segment_size
+        self.open_dir = self.root / "open"
+        self.ready_dir = self.root / "ready"
+        self.done_dir = self.root / "done"
+        for directory in (self.open_dir, self.ready_dir, self.done_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._file = None
+        self._path = None
+        self._lines = 0
+        self._seq = 0
+
+    # Writing
+
+    def _new_segment(self):
+        # Names sort in creation order, and never clash between runs or processes
+        name = f"{datetime.now():%Y%m%dT%H%M%S}-{os.getpid()}-{self._seq:05d}.jsonl"
+        self._seq += 1
+        self._path = self.open_dir / name
+        self._file = open(self._path, "w", encoding="utf-8")
+        self._lines = 0
+
+    def _write(self, line):
+        if self._file is None:
+            self._new_segment()
+        self._file.write(line)
+        self._lines += 1
+
+    def append(self, record: ArticleRecord) -> bool:
+        """
+        Appends a scraped article, sealing the segment once it is full.
+        Returns:
+            bool: True if the segment was sealed.
+        """
+        self._write(record_to_line(record))
+        if self._lines >= self.segment_size:
+            self.seal()
+            return True
+        return False
+
+    def outlet_done(self, outlet, newest):
+        """
+        Records that an outlet's scraper finished, so its watermark is moved when the segment is loaded.
+        Args:
+            outlet (str): The outlet name.
+            newest (datetime): Publication date of its newest spooled article, or None.
+        """
+        self._write(outlet_done_line(outlet, newest))
+
+    def seal(self):
+        """Makes the current segment durable and hands it to the loader."""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._path, self.ready_dir / self._path.name)
+        _fsync_dir(self.ready_dir)
+        self._file = None
+        self._path = None
+
+    def close(self):
+        """Seals the segment being written."""
+        self.seal()
+
+    def recover(self) -> int:
+        """
+        Seals the segments left in open/ by a crashed run, dropping a partially written last line.
+        Segments of a scrape still running on this machine are left alone.
+        Returns:
+            int: The number of recovered segments.
+        """
+        recovered = 0
+        for path in sorted(self.open_dir.glob("*.jsonl")):
+            pid = int(path.name.split("-")[1])
+            stale = time.time() - path.stat().st_mtime > STALE_SEGMENT_SECONDS
+            if path == self._path or (pid != os.getpid() and _pid_alive(pid) and not stale):
+                continue
+            data = path.read_bytes()
+            # Everything after the last newline is a line the crash cut in half
+            complete = data[:data.rfind(b"\n") + 1]
+            if complete:
+                with open(path, "wb") as f:
+                    f.write(complete)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(path, self.ready_dir / path.name)
+                recovered += 1
+            else:
+                path.unlink()
+        if recovered:
+            _fsync_dir(self.ready_dir)
+            logger.info("Recovered %d spool segments from an interrupted run.", recovered)
+        return recovered
+
+    # Reading
+
+    def ready_segments(self) -> list:
+        """Returns the sealed segments waiting to be loaded, oldest first."""
+        return sorted(self.ready_dir.glob("*.jsonl"))
+
+    @staticmethod
+    def read(segment):
+        """
+        Reads a segment.
+        Args:
+            segment (Path): A segment from ready_segments().
+        Yields:
+            ArticleRecord, or a (outlet, newest datetime or None) tuple for an outlet_done marker.
+        """
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if item.pop("type") == "outlet_done":
+                    newest = item["newest"]
+                    yield (item["outlet"], datetime.fromisoformat(newest) if newest else None)
+                else:
+                    item["date"] = datetime.fromisoformat(item["date"])
+                    yield ArticleRecord(**item)
+
+    def mark_done(self, segment):
+        """Moves a loaded segment to done/."""
+        os.replace(segment, self.done_dir / segment.name)
+
+    def prune(self, retention_days=DONE_RETENTION_DAYS) -> int:
+        """
+        Deletes the loaded segments older than the retention.
+        Returns:
+            int: The number of deleted segments.
+        """
+        cutoff = time.time() - retention_days * 86400
+        pruned = 0
+        for path in self.done_dir.glob("*.jsonl"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                pruned += 1
+        return pruned
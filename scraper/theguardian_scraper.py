@@ -1,32 +1,44 @@
-import feedparser
-from datetime import datetime
-import pandas as pd
-from aux_functions import get_team_name
-import requests
-from bs4 import BeautifulSoup   
-from typing import Tuple
-
-
-def get_details_from_url(url) -> Tuple[str, str, str]:
+from feed_scraper import scrape_feed
+from fetch import get_fetcher
+from parsing import OutletStrainer, Selector, parse_page
+from records import ArticleRecord
+from typing import Iterator, Tuple
+
+# URL of The Guardian RSS feed to parse
+FEED_URL = "https://www.theguardian.com/football/rss"
+# Outlet name stored with the articles, also the name of its circuit breaker in the fetcher
+OUTLET = "TheGuardian"
+
+# Only the subtrees read by parse_article are parsed: the byline (or section link),
+# the standfirst and the article body
+PARSE_ONLY = OutletStrainer([
+    Selector("a", "rel", ["author"], token=True),
+    Selector("a", "data-component", ["section"]),
+    Selector("div", "data-gu-name", ["standfirst"]),
+    Selector(None, "class", ["article-body-commercial-selector article-body-viewer-selector dcr-11jq3zt"]),
+])
+
+
+def parse_article(content) -> Tuple[str, str, str]:
     """
-    Extracts the article text and authors from a given URL. 
+    Parses an article page from The Guardian.
     Args:
-        url (str): The URL of the article to be processed.
+        content (bytes): The HTML content of the article page.
     Returns:
         Tuple[str, str, str]: A tuple containing the cleaned article text, the author's name and the subtitle.
     """
-    # Send a GET request to the URL
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
+    soup = parse_page(content, PARSE_ONLY)
 
     # Find the author name in the HTML content
     author = soup.find("a", attrs={"rel":"author"})
     if not author: 
-        author = soup.find("a", attrs={"data-component": "section"}).find("span")
+        section = soup.find("a", attrs={"data-component": "section"})
+        author = section.find("span") if section else None
     author = author.text.strip() if author else ""
 
     # Find the subtitle in the HTML content
-    subtitle = soup.find("div", attrs={"data-gu-name": "standfirst"}).find("p")
+    standfirst = soup.find("div", attrs={"data-gu-name": "standfirst"})
+    subtitle = standfirst.find("p") if standfirst else None
     subtitle = subtitle.text.strip() if subtitle else ""
 
     # Find the article body in the HTML content
@@ -49,58 +61,38 @@ def get_details_from_url(url) -> Tuple[str, str, str]:
     return (cleaned_text, author, subtitle)
 
 
-def theguardian_scraper(lower_time, upper_time) -> pd.DataFrame:
-    """ 
-    Scrapes The Guardian Football RSS feed for articles related to mens football within a specified time range.
-    The articles are filtered based on the presence of specific team names in the title or summary.
-    The scraped articles are stored in a DataFrame.
+def get_details_from_url(url, fetcher=None) -> Tuple[str, str, str]:
     """
+    Extracts the article text and authors from a given URL. 
+    The page is fetched and parsed only once per run through the fetcher's cache.
+    Args:
+        url (str): The URL of the article to be processed.
+        fetcher (Fetcher): The fetch engine used to download the page. Defaults to the shared one.
+    Returns:
+        Tuple[str, str, str]: A tuple containing the cleaned article text, the author's name and the subtitle.
+    """
+    return (fetcher or get_fetcher()).parse(url, parse_article, circuit=OUTLET)
 
-    # URL of The Guardian RSS feed to parse
-    url = "https://www.theguardian.com/football/rss"
-
-    # Parse the RSS feed and store the results
-    newsfeed = feedparser.parse(url)
-    posts = newsfeed.entries
-
-    # Define the format for the published date in the RSS feed entries
-    news_format = "%a, %d %b %Y %H:%M:%S"
-
-    # Create an empty DataFrame to store the results
-    new_data = pd.DataFrame(columns=["Title", "Summary", "Link", "Date", "Author", "Teams", "Article", "Outlet"])
-
-    # Iterate over each post in the RSS feed
-    for post in posts: 
-        # Convert the published date to a datetime object removing the BST part
-        date_without_bst = " ".join(post.published.split(" ")[:-1])
-        new_comparison_time = datetime.strptime(date_without_bst, news_format)
-
-        # Extract team names from title and summary
-        teams = get_team_name(post.title + " " + post.summary)  
-
-        # Check if the post's published date is within the specified range,
-        # has the desired teams, and is not already in the previous data
-        if new_comparison_time >= lower_time \
-            and new_comparison_time <= upper_time \
-            and teams:
 
-            # Get the article text and author from the URL
-            article, author, summary = get_details_from_url(post.link)
-            # Skip if no article text is found
-            if article == "" or "WSL" in article: 
-                continue
+def extract(post, page) -> Tuple[str, str, str]:
+    """
+    Returns the article text, the author and the summary of a parsed article page from The Guardian.
+    The subtitle of the page replaces the summary of the feed.
+    Args:
+        post: The feed entry of the article.
+        page (Tuple[str, str, str]): The result of parse_article.
+    """
+    article, author, subtitle = page
+    return (article, author, subtitle)
 
-            # Append the post details to the DataFrame
-            post = {
-                "Title": post.title,
-                "Summary": summary,
-                "Link": post.link,
-                "Date": new_comparison_time.strftime(news_format),
-                "Author": author,
-                "Teams": teams,
-                "Article": article, 
-                "Outlet": "TheGuardian"
-            }
-            new_data = pd.concat([new_data, pd.DataFrame([post])], ignore_index=True)
 
-    return new_data
\ No newline at end of file
+def theguardian_scraper(lower_time, upper_time, fetcher=None, feed_state=None, known_links=None, feed_url=FEED_URL) -> Iterator[ArticleRecord]:
+    """ 
+    Scrapes The Guardian Football RSS feed for articles related to mens football within a specified time range.
+    The articles are filtered based on the presence of specific team names in the title or summary.
+    The matching article pages are downloaded concurrently through the fetcher,
+    except for links found in known_links, which are already stored in the database.
+    The scraped articles are yielded one by one as ArticleRecord objects.
+    """
+    yield from scrape_feed(OUTLET, feed_url, lower_time, upper_time, get_details_from_url, extract,
+                           fetcher, feed_state, known_links)
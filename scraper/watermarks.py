@@ -0,0 +1,58 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from app.dialects import dialect_of
+
+# Window of the first run of an outlet, when it has no watermark yet
+DEFAULT_LOOKBACK = timedelta(days=1)
+# Longest window of a normal run; older gaps are only filled in catch-up mode
+MAX_LOOKBACK = timedelta(days=2)
+# Entries can show up in a feed some time after their publication date
+# (and the feed dates carry no time zone), so every window starts a bit before the watermark
+WATERMARK_OVERLAP = timedelta(hours=6)
+
+
+def load_watermarks(cursor) -> dict:
+    """
+    Loads the newest publication date ingested for every outlet.
+    Args:
+        cursor: A cursor of the database connection.
+    Returns:
+        dict: Outlet name -> datetime of its newest stored article.
+    """
+    cursor.execute("SELECT o.name, w.last_published FROM scrape_watermarks w JOIN outlets o ON o.id = w.outlet_id")
+    return {row["name"]: row["last_published"] for row in cursor.fetchall()}
+
+
+def scrape_window(watermark, now, catch_up=False) -> tuple:
+    """
+    Returns the publication window an outlet has to be scraped for.
+    Args:
+        watermark (datetime): Newest publication date ingested for the outlet, or None.
+        now (datetime): The end of the window.
+        catch_up (bool): If True, the window reaches back to the watermark however old it is.
+    Returns:
+        tuple: (lower, upper) datetimes, and whether the window was cut to MAX_LOOKBACK.
+    """
+    if watermark is None:
+        return (now - DEFAULT_LOOKBACK, now), False
+    lower = watermark - WATERMARK_OVERLAP
+    if not catch_up and now - lower > MAX_LOOKBACK:
+        return (now - MAX_LOOKBACK, now), True
+    return (lower, now), False
+
+
+def save_watermark(cursor, outlet_id, last_published):
+    """
+    Moves the watermark of an outlet forward (never backwards) to the given publication date.
+    Args:
+        cursor: A cursor of the database connection.
+        outlet_id (int): The outlet ID.
+        last_published (datetime): Publication date of the newest article just stored.
+    """
+    dialect = dialect_of(cursor)
+    newest = dialect.greatest("last_published", dialect.excluded("last_published"))
+    cursor.execute(dialect.upsert("scrape_watermarks", ["outlet_id", "last_published", "updated_at"], keys=["outlet_id"],
+                                  expressions={"last_published": newest, "updated_at": dialect.excluded("updated_at")}),
+                   (outlet_id, last_published, datetime.now()))